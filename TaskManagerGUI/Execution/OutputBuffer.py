@@ -0,0 +1,27 @@
+import itertools
+import threading
+from collections import deque
+
+
+class OutputBuffer:
+    """Bounded ring buffer of output lines that readers consume incrementally.
+
+    Only the last max_lines lines are kept, so a command printing hundreds of MB
+    never grows the memory of the application; the full output is in the log file.
+    """
+
+    def __init__(self, max_lines=5000):
+        self.lock = threading.Lock()
+        self.lines = deque(maxlen=max_lines)
+        self.total = 0  # Number of lines ever appended, used as the read position
+
+    def append(self, line):
+        with self.lock:
+            self.lines.append(line)
+            self.total += 1
+
+    def read_since(self, position):
+        """Return (new position, lines appended after position that are still buffered)."""
+        with self.lock:
+            available = min(self.total - position, len(self.lines))
+            return self.total, list(itertools.islice(self.lines, len(self.lines) - available, None))
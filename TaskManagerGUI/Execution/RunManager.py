@@ -0,0 +1,106 @@
+import atexit
+import threading
+from datetime import datetime
+from Logging import Logger
+from SharedObjects import Settings
+from SharedObjects.RunHistory import RunHistory
+from Execution.TaskRun import TaskRun
+
+
+class RunManager:
+    """Runs several tasks at once, at most "max_concurrent_tasks" of them at the same time.
+
+    Runs beyond the limit wait in the queue. Every run tracks its own processes, so
+    cancelling one run only terminates the process groups of that run.
+    """
+    _instance = None  # Class-level variable to store the single instance
+
+    def __new__(cls, *args, **kwargs):
+        """Override __new__ to ensure only one instance of RunManager exists."""
+        if not cls._instance:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self.logger = Logger()
+            self.settings_manager = Settings()
+            self.lock = threading.Lock()
+            self.runs = {}  # Run id -> TaskRun, for the runs that are queued or running
+            self.listeners = []  # Called with ("started" | "progress" | "finished", run)
+            self.history = RunHistory()
+            self._slots = threading.Semaphore(max(1, int(self.settings_manager.get("max_concurrent_tasks", 2))))
+            # Do not leave commands running when the application exits
+            atexit.register(self.cancel_all)
+            self._initialized = True
+
+    def subscribe(self, callback):
+        """Call callback(event, run) for every run, whoever started it.
+
+        "started" is sent from the thread calling start(), "progress" and "finished" from the run thread.
+        """
+        self.listeners.append(callback)
+
+    def _notify(self, event, run):
+        for callback in list(self.listeners):
+            try:
+                callback(event, run)
+            except Exception as e:
+                self.logger.error(f"Failed to notify a listener of the run of {run.name}: {e}")
+
+    def start(self, name, commands, on_finished=None, trigger="manual", schedule_id=None):
+        """Queue a run of a task and return it; on_finished(run) is called from the run thread.
+
+        trigger ("manual" or "schedule") is kept on the run and in the run history.
+        """
+        run = TaskRun(name, commands, max_parallel=self.settings_manager.get("max_parallel_commands", 4),
+                      command_mode=self.settings_manager.get("command_mode", TaskRun.SHELL))
+        run.trigger = trigger
+        run.schedule_id = schedule_id
+        run.on_progress = lambda run: self._notify("progress", run)
+        with self.lock:
+            self.runs[run.id] = run
+
+        self._notify("started", run)
+        threading.Thread(target=self._run, args=(run, on_finished), daemon=True).start()
+        return run
+
+    def _run(self, run, on_finished):
+        acquired = False
+        started = datetime.now().isoformat(timespec="seconds")
+        try:
+            # A run cancelled while it is queued gives up waiting for a slot
+            while not run.cancelled.is_set() and not acquired:
+                acquired = self._slots.acquire(timeout=0.2)
+            run.run()
+        except Exception as e:
+            self.logger.error(f"Unexpected error while running {run.name}: {e}")
+            run.status, run.error = TaskRun.FAILED, f"An unexpected error occurred: {str(e)}"
+        finally:
+            if acquired:
+                self._slots.release()
+            with self.lock:
+                self.runs.pop(run.id, None)
+            self.history.add("task", run.name, run.status, started, datetime.now().isoformat(timespec="seconds"),
+                             trigger=run.trigger, log_file=run.log_file_path, error=run.error,
+                             schedule_id=run.schedule_id, run_id=run.id, returncode=run.returncode)
+            self._notify("finished", run)
+            if on_finished is not None:
+                on_finished(run)
+
+    def get_runs(self, name=None):
+        """Return the queued and running runs, optionally only those of one task."""
+        with self.lock:
+            return [run for run in self.runs.values() if name is None or run.name == name]
+
+    def cancel(self, run_id):
+        """Cancel a queued or running run."""
+        with self.lock:
+            run = self.runs.get(run_id)
+        if run is not None:
+            run.cancel()
+
+    def cancel_all(self):
+        for run in self.get_runs():
+            run.cancel()
@@ -0,0 +1,201 @@
+import heapq
+import threading
+import time
+from datetime import datetime
+from Logging import Logger
+from SharedObjects import Tasks
+from SharedObjects.CronExpression import CronExpression
+from SharedObjects.RunHistory import RunHistory
+from SharedObjects.Schedules import Schedules
+from Execution.RunManager import RunManager
+from Execution.TaskRun import TaskRun
+
+
+class Scheduler:
+    """Fires the schedules of config/schedules.json from a single timer thread.
+
+    The next fire time of every enabled schedule is kept in a heap, the thread sleeps
+    until the earliest one, so an idle scheduler costs nothing. Fires are handed to the
+    handler of the schedule kind: tasks go to the RunManager, other kinds (health checks)
+    are handled by whoever registered a handler for them.
+
+    What happens to a fire while the previous run of the same schedule is still going
+    depends on the overlap policy of the schedule: "skip" drops it, "queue" runs once
+    more when the current run ends (several fires are coalesced into one) and
+    "concurrent" starts another run right away.
+    """
+    _instance = None  # Class-level variable to store the single instance
+
+    def __new__(cls, *args, **kwargs):
+        """Override __new__ to ensure only one instance of Scheduler exists."""
+        if not cls._instance:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self.logger = Logger()
+            self.schedules_manager = Schedules()
+            self.history = RunHistory()
+            self.condition = threading.Condition()
+            self.heap = []  # (next fire time, schedule id)
+            self.next_fires = {}  # Schedule id -> (next fire time, (cron, interval) the time was computed for)
+            self.handlers = {"task": self.run_task}
+            self.lock = threading.Lock()
+            self.active = {}  # Schedule id -> number of its runs still going
+            self.pending = set()  # Schedule ids with a queued fire
+            self._thread = None
+            self.schedules_manager.subscribe(self.reschedule)
+            self._initialized = True
+
+    def register_handler(self, kind, handler):
+        """Run the schedules of a kind with handler(schedule, on_finished).
+
+        The handler records its run in the RunHistory and must call on_finished(status) once
+        the run ends; a fire the handler skips is reported as on_finished("skipped", error=reason).
+        """
+        self.handlers[kind] = handler
+
+    def start(self):
+        """Start the timer thread, once."""
+        if self._thread is None:
+            self.reschedule()
+            self._thread = threading.Thread(target=self._timer_loop, daemon=True)
+            self._thread.start()
+
+    @staticmethod
+    def next_fire_time(schedule, after):
+        """Return the first fire time (epoch seconds) of a schedule after a time."""
+        if schedule.get("cron"):
+            return CronExpression(schedule["cron"]).next_after(datetime.fromtimestamp(after)).timestamp()
+        return after + schedule["interval"]
+
+    @staticmethod
+    def timing(schedule):
+        """Return what the fire times of a schedule depend on."""
+        return schedule.get("cron"), schedule.get("interval")
+
+    def reschedule(self):
+        """Compute the next fire time of the added, edited and enabled schedules, after the schedules changed.
+
+        Unchanged schedules keep their next fire time, otherwise a schedule "every N seconds"
+        would start over, and never fire, when the schedules change more often than that.
+        """
+        now = time.time()
+        with self.condition:
+            next_fires = {}
+            for schedule in self.schedules_manager.get_schedules():
+                if not schedule.get("enabled", True):
+                    continue
+                timing = self.timing(schedule)
+                known = self.next_fires.get(schedule.get("id"))
+                if known is not None and known[1] == timing:
+                    next_fires[schedule["id"]] = known
+                    continue
+                try:
+                    next_fires[schedule["id"]] = (self.next_fire_time(schedule, now), timing)
+                except (KeyError, TypeError, ValueError) as e:
+                    self.logger.error(f"Schedule {schedule.get('id')} of {schedule.get('target')} is ignored: {e}")
+
+            self.next_fires = next_fires
+            self.heap = [(fire_time, schedule_id) for schedule_id, (fire_time, _) in next_fires.items()]
+            heapq.heapify(self.heap)
+            self.condition.notify()
+
+    def _timer_loop(self):
+        while True:
+            with self.condition:
+                # Sleep until the earliest fire, a change of the schedules wakes the thread up
+                while not self.heap or self.heap[0][0] > time.time():
+                    self.condition.wait(self.heap[0][0] - time.time() if self.heap else None)
+                due = self._pop_due(time.time())
+
+            # A failing fire must not stop the thread, the other schedules would never fire again
+            for schedule in due:
+                try:
+                    self.fire(schedule)
+                except Exception as e:
+                    self.logger.error(f"Scheduled run of {schedule.get('target')} failed: {e}")
+
+    def _pop_due(self, now):
+        """Pop the schedules due at now and push their next fire, with self.condition held."""
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            fire_time, schedule_id = heapq.heappop(self.heap)
+            schedule = self.schedules_manager.get_schedule(schedule_id)
+            if schedule is None or not schedule.get("enabled", True):
+                self.next_fires.pop(schedule_id, None)
+                continue  # Removed or disabled since it was scheduled
+            due.append(schedule)
+            try:
+                # Fires missed while the computer was asleep are not made up for
+                next_fire = self.next_fire_time(schedule, max(fire_time, now))
+            except Exception as e:
+                self.logger.error(f"Schedule {schedule_id} of {schedule.get('target')} is stopped: {e}")
+                self.next_fires.pop(schedule_id, None)
+                continue
+            self.next_fires[schedule_id] = (next_fire, self.timing(schedule))
+            heapq.heappush(self.heap, (next_fire, schedule_id))
+        return due
+
+    def fire(self, schedule):
+        """Start a run of a schedule, or skip or queue it according to its overlap policy."""
+        schedule_id = schedule["id"]
+        overlap = schedule.get("overlap", Schedules.SKIP)
+        with self.lock:
+            if self.active.get(schedule_id) and overlap != Schedules.CONCURRENT:
+                if overlap == Schedules.QUEUE and schedule_id not in self.pending:
+                    self.pending.add(schedule_id)
+                    self.logger.info(f"Scheduled run of {schedule['target']} is queued, the previous run is going")
+                    return
+                skipped = True
+            else:
+                skipped = False
+                self.active[schedule_id] = self.active.get(schedule_id, 0) + 1
+
+        if skipped:
+            self.logger.info(f"Scheduled run of {schedule['target']} is skipped, the previous run is going")
+            self.history.add(schedule["kind"], schedule["target"], "skipped",
+                             datetime.now().isoformat(timespec="seconds"), trigger="schedule", schedule_id=schedule_id,
+                             environment=schedule.get("environment"))
+            return
+        self.dispatch(schedule)
+
+    def dispatch(self, schedule):
+        schedule_id = schedule["id"]
+        started = datetime.now().isoformat(timespec="seconds")
+
+        def on_finished(status, error=None, recorded=True):
+            if not recorded or status == "skipped":
+                # The fire never became a run, so nobody else recorded it
+                self.history.add(schedule["kind"], schedule["target"], status, started,
+                                 datetime.now().isoformat(timespec="seconds"), trigger="schedule",
+                                 error=error, schedule_id=schedule_id, environment=schedule.get("environment"))
+            with self.lock:
+                self.active[schedule_id] -= 1
+                run_queued = self.active[schedule_id] == 0 and schedule_id in self.pending
+                if run_queued:
+                    self.pending.discard(schedule_id)
+                    self.active[schedule_id] = 1
+                elif self.active[schedule_id] == 0:
+                    del self.active[schedule_id]
+            if run_queued:
+                self.dispatch(self.schedules_manager.get_schedule(schedule_id) or schedule)
+
+        handler = self.handlers.get(schedule["kind"])
+        self.logger.info(f"Scheduled run of {schedule['kind']} {schedule['target']}")
+        try:
+            if handler is None:
+                raise RuntimeError(f"Nothing can run {schedule['kind']} schedules")
+            handler(schedule, on_finished)
+        except Exception as e:
+            self.logger.error(f"Scheduled run of {schedule['target']} failed to start: {e}")
+            on_finished(TaskRun.FAILED, error=str(e), recorded=False)
+
+    def run_task(self, schedule, on_finished):
+        task = Tasks().get_task(schedule["target"])
+        if task is None or not task["commands"]:
+            raise RuntimeError(f"Task {schedule['target']} does not exist or has no commands")
+        RunManager().start(task["name"], task["commands"], trigger="schedule", schedule_id=schedule["id"],
+                           on_finished=lambda run: on_finished(run.status))
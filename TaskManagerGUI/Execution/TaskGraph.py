@@ -0,0 +1,141 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+def command_key(command, index):
+    """Return the graph node of a command, its id or its position for commands without one."""
+    return command.get("id") or str(index)
+
+
+def build_command_graph(commands):
+    """Build the dependency graph of the commands of a task.
+
+    Commands run in their list order by default. Consecutive commands with the same
+    "group" form a stage that runs in parallel, and each stage waits for the whole
+    previous stage. A command with "depends_on" (a list of command ids) waits for
+    those commands only. Returns (nodes, graph): node -> command in list order and
+    node -> set of nodes it waits for. Raises ValueError for unknown ids and cycles.
+    """
+    nodes = {}
+    for index, command in enumerate(commands):
+        nodes[command_key(command, index)] = command
+
+    graph = {}
+    previous_stage, stage, stage_group = [], [], None
+    for node, command in nodes.items():
+        group = command.get("group") or None
+        if stage and (group is None or group != stage_group):
+            previous_stage, stage = stage, []
+        stage_group = group
+
+        depends_on = command.get("depends_on")
+        if depends_on is None:
+            graph[node] = set(previous_stage)
+        else:
+            unknown = [dependency for dependency in depends_on if dependency not in nodes]
+            if unknown:
+                raise ValueError(f"Command depends on unknown command id(s): {', '.join(map(str, unknown))}")
+            graph[node] = set(depends_on)
+        stage.append(node)
+
+    # Kahn's algorithm, whatever cannot be ordered is part of a cycle
+    remaining = {node: set(dependencies) for node, dependencies in graph.items()}
+    ready = [node for node, dependencies in remaining.items() if not dependencies]
+    while ready:
+        done = ready.pop()
+        for node, dependencies in remaining.items():
+            if done in dependencies:
+                dependencies.discard(done)
+                if not dependencies:
+                    ready.append(node)
+        del remaining[done]
+    if remaining:
+        raise ValueError(f"Command dependencies form a cycle between: {', '.join(remaining)}")
+
+    return nodes, graph
+
+
+def sequential_nodes(graph):
+    """Return the nodes that never run at the same time as another node of the graph.
+
+    Such a node comes after or before every other node, through its dependencies. In a
+    task without groups or "depends_on" that is every command.
+    """
+    # Topological order, the graph is known to have no cycle
+    remaining = {node: set(dependencies) for node, dependencies in graph.items()}
+    dependents = defaultdict(list)
+    for node, dependencies in graph.items():
+        for dependency in dependencies:
+            dependents[dependency].append(node)
+    order = [node for node, dependencies in remaining.items() if not dependencies]
+    for done in order:
+        for node in dependents[done]:
+            remaining[node].discard(done)
+            if not remaining[node]:
+                order.append(node)
+
+    ancestors = {}
+    descendant_count = dict.fromkeys(graph, 0)
+    for node in order:
+        ancestors[node] = set(graph[node]).union(*(ancestors[dependency] for dependency in graph[node]))
+        for ancestor in ancestors[node]:
+            descendant_count[ancestor] += 1
+    return {node for node in graph if len(ancestors[node]) + descendant_count[node] == len(graph) - 1}
+
+
+class DagRunner:
+    """Runs the nodes of a dependency graph on a bounded pool of worker threads."""
+
+    def __init__(self, graph, max_workers=4):
+        self.graph = graph
+        self.max_workers = max(1, int(max_workers))
+        self.order = {node: index for index, node in enumerate(graph)}
+
+    def run(self, execute, on_complete=None, on_failure=None):
+        """Run execute(node) for every node once all of its dependencies completed.
+
+        execute raises to report a failure. After the first failure no further node is
+        started, on_failure(node, error) is called and the nodes already running are
+        waited for. on_complete(node) is called after every successful node.
+        Returns (node, error) of the first failure, or None if every node completed.
+        """
+        remaining = {node: set(dependencies) for node, dependencies in self.graph.items()}
+        dependents = defaultdict(list)
+        for node, dependencies in self.graph.items():
+            for dependency in dependencies:
+                dependents[dependency].append(node)
+
+        ready = [node for node, dependencies in remaining.items() if not dependencies]
+        running = {}
+        failure = None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while ready or running:
+                if failure is None:
+                    # Start ready nodes in their list order, never queue more than the pool runs
+                    ready.sort(key=self.order.get)
+                    while ready and len(running) < self.max_workers:
+                        node = ready.pop(0)
+                        running[pool.submit(execute, node)] = node
+
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    node = running.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        if failure is None:
+                            failure = (node, error)
+                            if on_failure is not None:
+                                on_failure(node, error)
+                        continue
+
+                    if on_complete is not None:
+                        on_complete(node)
+                    for dependent in dependents[node]:
+                        remaining[dependent].discard(node)
+                        if not remaining[dependent]:
+                            ready.append(dependent)
+
+        return failure
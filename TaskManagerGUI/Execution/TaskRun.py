@@ -0,0 +1,456 @@
+import json
+import locale
+import os
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+from Logging import Logger
+from SharedObjects import CommandRenderer
+from Execution.TaskGraph import build_command_graph, sequential_nodes, DagRunner
+from Execution.OutputBuffer import OutputBuffer
+
+
+def task_name_sanitize(task_name) -> str:
+    """Sanitize the task name by replacing invalid characters with underscores."""
+    return re.sub(r'[\\/:"*?<>| ]', '_', task_name)
+
+
+class CommandError(RuntimeError):
+    """A command of a run failed; returncode is None when it could not be started."""
+
+    def __init__(self, message, returncode=None):
+        super().__init__(message)
+        self.returncode = returncode
+
+
+def wait_with_usage(process):
+    """Wait for a process and return its CPU times, None where the platform cannot tell.
+
+    On POSIX the usage comes from wait4, it includes the children the process waited for,
+    so the usage of a shell command covers the programs it ran. Its ru_maxrss is not used:
+    the exec of the child records the memory of the process that forked it, the application.
+    """
+    if not hasattr(os, "wait4"):
+        process.wait()
+        return None
+    try:
+        _, status, usage = os.wait4(process.pid, 0)
+    except ChildProcessError:
+        # Reaped by poll() from another thread in the meantime, the usage is lost
+        process.wait()
+        return None
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return {
+        "user_time": round(usage.ru_utime, 3),
+        "system_time": round(usage.ru_stime, 3),
+    }
+
+
+def peak_rss_kb(pid):
+    """Return the largest peak resident memory (VmHWM, in KB) of a process and its descendants on Linux.
+
+    Returns None once the process has exited, /proc no longer has its memory then.
+    """
+    peak = None
+    pending, seen = [pid], set()
+    while pending:
+        current = pending.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        try:
+            with open(f"/proc/{current}/status", "rb") as status:
+                for line in status:
+                    if line.startswith(b"VmHWM:"):
+                        peak = max(peak or 0, int(line.split()[1]))
+                        break
+            # Needs a kernel with CONFIG_PROC_CHILDREN, without it only the process itself is measured
+            with open(f"/proc/{current}/task/{current}/children", "rb") as children:
+                pending.extend(int(child) for child in children.read().split())
+        except (OSError, ValueError):
+            continue
+    return peak
+
+
+class MemorySampler:
+    """Samples the peak memory of a running command from /proc, where wait4 cannot tell it.
+
+    Samples are taken more and more rarely, up to every interval seconds, so short commands
+    are measured too. Growth in the last interval before the command exits can be missed.
+    """
+
+    def __init__(self, pid, interval):
+        self.pid = pid
+        self.interval = interval
+        self.peak_kb = None
+        self.stopped = threading.Event()
+        self.thread = None
+        if sys.platform.startswith("linux"):
+            self.thread = threading.Thread(target=self._sample, daemon=True)
+            self.thread.start()
+
+    def _sample(self):
+        delay = 0.01
+        while True:
+            sample = peak_rss_kb(self.pid)
+            if sample is not None:
+                self.peak_kb = max(self.peak_kb or 0, sample)
+            if self.stopped.wait(delay):
+                return
+            delay = min(delay * 2, self.interval)
+
+    def stop(self):
+        """Stop sampling and return the peak, None where it is unknown."""
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+        return self.peak_kb
+
+
+class TaskRun:
+    """A single execution of a task, with its own processes, progress and log file."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    log_dir = "Execution_Logs"
+    read_size = 8192  # Longest chunk of output read at once, longer lines are split
+    kill_grace_period = 5  # Seconds a terminated command gets to exit before it is killed
+    memory_sample_interval = 0.2  # Longest time in seconds between two samples of the memory of a command
+
+    SHELL = "shell"  # Command lines are run by /bin/sh or cmd.exe
+    EXEC = "exec"  # Commands are started directly, those that need a shell still use one
+    COMMAND_MODES = (SHELL, EXEC)
+
+    def __init__(self, name, commands, max_parallel=4, command_mode=SHELL):
+        self.id = uuid.uuid4().hex[:8]
+        self.name = name
+        self.commands = list(commands)
+        self.max_parallel = max_parallel
+        self.command_mode = command_mode  # Default of the commands without a "mode" field
+        self.trigger = "manual"  # "schedule" for runs started by the scheduler, "cli" for run.py
+        self.schedule_id = None
+        self.logger = Logger()
+        self.renderer = CommandRenderer()
+
+        self.status = self.QUEUED
+        self.error = None  # Message for the user when the run failed
+        self.returncode = None  # Exit code of the command that failed the run
+        self.completed = 0
+        self.total = len(self.commands)
+        self.log_file_path = None
+
+        self.lock = threading.Lock()
+        self.processes = []
+        self.cancelled = threading.Event()
+        self.on_progress = None  # Called with the run after every completed command, from a worker thread
+        self.output = OutputBuffer()  # Latest output lines of all commands, for live display
+        self.usage = []  # Resource usage of every command that ran, see run_command_node
+
+    def run(self):
+        """Run the commands as a dependency graph and return the final status."""
+        if self.cancelled.is_set():
+            self.status = self.CANCELLED
+            return self.status
+
+        self.status = self.RUNNING
+        if self.on_progress is not None:
+            self.on_progress(self)
+        try:
+            nodes, graph = build_command_graph(self.commands)
+        except ValueError as e:
+            # The dependencies of the commands cannot be scheduled
+            self.logger.error(f"Task {self.name} cannot be run: {e}")
+            self.error = f"Task {self.name} cannot be run: {e}"
+            self.status = self.FAILED
+            return self.status
+
+        positions = {node: position for position, node in enumerate(nodes, start=1)}
+        log_lock = threading.Lock()
+        # The output of a command that runs alone goes straight to the log, so it can be followed
+        alone = set(graph) if self.max_parallel <= 1 else sequential_nodes(graph)
+        self.log_file_path = self.create_log_file()
+
+        def execute(node):
+            if self.cancelled.is_set():
+                raise CommandError(f"Task {self.name} was cancelled.")
+            self.run_command_node(nodes[node], positions[node], len(nodes), log_lock, stream=node in alone)
+
+        def on_complete(node):
+            self.completed += 1
+            if self.on_progress is not None:
+                self.on_progress(self)
+
+        try:
+            # A failed command stops the whole run, the commands still running are terminated
+            runner = DagRunner(graph, max_workers=self.max_parallel)
+            failure = runner.run(execute, on_complete=on_complete,
+                                 on_failure=lambda node, error: self.terminate_processes())
+        finally:
+            self.terminate_processes()
+
+        if failure is None:
+            self.status = self.SUCCEEDED
+        else:
+            skipped = len(nodes) - self.completed - 1
+            with open(self.log_file_path, "a") as log_file:
+                if self.cancelled.is_set():
+                    log_file.write("The run was cancelled.\n")
+                elif skipped > 0:
+                    log_file.write(f"{skipped} command(s) were not completed after the failure.\n")
+            self.status = self.CANCELLED if self.cancelled.is_set() else self.FAILED
+            self.error = str(failure[1])
+            self.returncode = getattr(failure[1], "returncode", None)
+
+        self.write_usage()
+        self.logger.info(f"Execution of {self.name} finished: {self.status}")
+        return self.status
+
+    def create_log_file(self):
+        """Create an empty log for the run, named after the task and the time, and return its path."""
+        os.makedirs(self.log_dir, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")  # Format: YYYYMMDD_HHMMSS
+        log_file_path = f"{self.log_dir}/{task_name_sanitize(self.name)}_{timestamp}.log"
+        suffix = 1
+        while True:
+            try:
+                # Exclusive creation: two runs of a task started within a second never share a log
+                open(log_file_path, "x").close()
+                return log_file_path
+            except FileExistsError:
+                log_file_path = f"{self.log_dir}/{task_name_sanitize(self.name)}_{timestamp}_{suffix}.log"
+                suffix += 1
+
+    @staticmethod
+    def command_limits(command_dict):
+        """Return the (timeout, retries, backoff) of a command, raises ValueError for invalid values.
+
+        timeout is in seconds (None for no limit), a failed command is started again up to retries
+        times, waiting backoff seconds before the first retry and twice as long before every next one.
+        """
+        timeout = command_dict.get("timeout")
+        timeout = float(timeout) if timeout not in (None, "") else None
+        retries = int(command_dict.get("retries") or 0)
+        backoff = float(command_dict.get("backoff") or 1.0)
+        if (timeout is not None and timeout <= 0) or retries < 0 or backoff < 0:
+            raise ValueError("timeout must be positive, retries and backoff cannot be negative")
+        return timeout, retries, backoff
+
+    def run_command_node(self, command_dict, position, total, log_lock, stream=False):
+        """Run a single command and tee its output to the task log and the output buffer.
+
+        A command that runs alone (stream) writes its section of the log as its output arrives.
+        Commands that may run side by side write to their own part file, appended to the log as
+        one section once the command ends. A command that fails or times out is retried
+        according to its "retries" and "backoff" fields.
+
+        Raises CommandError with a message for the user when the command fails.
+        """
+        command = self.renderer.render(command_dict)
+        self.logger.info(f"Starting execution for {command} of {self.name}")
+        header = f"===== [{position}/{total}] {command} =====\n"
+        part_path = None if stream else f"{self.log_file_path}.{position}.part"
+        error = None
+        returncode = None
+        usage = None
+        attempt = 0
+        started = time.monotonic()
+
+        try:
+            if stream:
+                with open(self.log_file_path, "a") as log_file:
+                    log_file.write(header)
+                # Unbuffered, a followed log and the log index see the output as soon as it is read
+                output_file = open(self.log_file_path, "ab", buffering=0)
+            else:
+                output_file = open(part_path, "wb")
+            with output_file:
+                timeout, retries, backoff = self.command_limits(command_dict)
+                while True:
+                    attempt += 1
+                    returncode, usage, timed_out = self.run_process(command_dict, position, output_file, timeout)
+                    if timed_out:
+                        error = f"Command '{command}' timed out after {timeout:g} seconds."
+                    elif returncode != 0:
+                        error = f"Command '{command}' failed with exit code {returncode}."
+                    else:
+                        error = None
+
+                    if error is None or attempt > retries or self.cancelled.is_set():
+                        break
+                    delay = backoff * 2 ** (attempt - 1)
+                    note = f"{error} Retrying in {delay:g}s ({attempt}/{retries})."
+                    output_file.write(f"{note}\n".encode())
+                    self.output.append(f"[{position}] {note}")
+                    self.logger.warning(note)
+                    # Cancelling the run interrupts the wait
+                    if self.cancelled.wait(delay):
+                        break
+        except ValueError as e:
+            error = f"Command '{command}' has invalid options: {e}"
+        except FileNotFoundError:
+            error = f"Command '{command}' not found."
+        except Exception as e:
+            error = f"An unexpected error occurred: {str(e)}"
+
+        with self.lock:
+            self.usage.append({
+                "position": position,
+                "command": command,
+                "returncode": returncode,
+                "attempts": attempt,
+                "wall_time": round(time.monotonic() - started, 3),
+                **(usage or {"user_time": None, "system_time": None, "max_rss_kb": None}),
+            })
+
+        # Commands running in parallel keep their output together in their own section
+        with log_lock:
+            with open(self.log_file_path, "a") as log_file:
+                if not stream:
+                    log_file.write(header)
+                    if os.path.exists(part_path):
+                        # Copy the raw output without loading it into memory
+                        log_file.flush()
+                        with open(part_path, "rb") as part_file:
+                            shutil.copyfileobj(part_file, log_file.buffer)
+                        os.remove(part_path)
+                if error is not None:
+                    log_file.write(error + "\n")
+
+        if error is not None:
+            self.logger.error(error)
+            raise CommandError(error, returncode)
+
+    def use_shell(self, command_dict):
+        """Tell whether a command is run by the shell, according to its mode and its syntax."""
+        mode = command_dict.get("mode", self.command_mode)
+        if mode not in self.COMMAND_MODES:
+            raise ValueError(f"mode must be one of {', '.join(self.COMMAND_MODES)}")
+        return mode == self.SHELL or self.renderer.needs_shell(command_dict)
+
+    def run_process(self, command_dict, position, output_file, timeout):
+        """Run one attempt of a command writing its output to a binary file, return (returncode, usage, timed out)."""
+        shell = self.use_shell(command_dict)
+        # Without a shell the command is started directly, saving a /bin/sh process per command
+        process = subprocess.Popen(
+            self.renderer.render(command_dict) if shell else self.renderer.argv(command_dict),
+            shell=shell,
+            stdout=subprocess.PIPE,  # Read standard output through a pipe
+            stderr=subprocess.STDOUT,  # Errors go to the same pipe
+            creationflags=subprocess.CREATE_NEW_PROCESS_GROUP if os.name == "nt" else 0,
+            start_new_session=os.name != "nt"  # Own process group, stop_process kills the group
+        )
+        with self.lock:
+            self.processes.append(process)
+            cancelled = self.cancelled.is_set()
+        if cancelled:
+            # cancel() ran while the process was being started
+            self.stop_process(process)
+
+        sampler = MemorySampler(process.pid, self.memory_sample_interval)
+        timed_out = threading.Event()
+        watchdog = None
+        if timeout is not None:
+            watchdog = threading.Timer(timeout, lambda: (timed_out.set(), self.stop_process(process)))
+            watchdog.daemon = True
+            watchdog.start()
+
+        try:
+            # Tee the output as it arrives, the log keeps the bytes exactly as written
+            encoding = locale.getpreferredencoding(False)
+            for chunk in iter(lambda: process.stdout.readline(self.read_size), b""):
+                output_file.write(chunk)
+                self.output.append(f"[{position}] " + chunk.decode(encoding, errors="replace").rstrip("\r\n"))
+            process.stdout.close()
+            if hasattr(os, "waitid"):
+                # Sample until the command exits but not after it is reaped, its pid could be reused by then
+                try:
+                    os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOWAIT)
+                except ChildProcessError:
+                    pass  # Reaped by poll() from another thread
+            max_rss_kb = sampler.stop()
+            usage = wait_with_usage(process)
+            if usage is not None:
+                usage["max_rss_kb"] = max_rss_kb
+        finally:
+            sampler.stop()
+            if watchdog is not None:
+                watchdog.cancel()
+            with self.lock:
+                self.processes.remove(process)
+        return process.returncode, usage, timed_out.is_set()
+
+    def write_usage(self):
+        """Append the resource usage of the commands to the log and write it to a .usage.json sidecar."""
+        with self.lock:
+            usage = sorted(self.usage, key=lambda entry: entry["position"])
+        if not usage:
+            return
+
+        def number(value, unit):
+            return "-" if value is None else f"{value}{unit}"
+
+        try:
+            with open(self.log_file_path, "a") as log_file:
+                log_file.write("===== Resource usage =====\n")
+                log_file.write(f"{'#':>4} {'exit':>5} {'tries':>5} {'wall':>10} {'user':>10} {'system':>10} "
+                               f"{'max rss':>12}  command\n")
+                for entry in usage:
+                    log_file.write(f"{entry['position']:>4} {number(entry['returncode'], ''):>5} "
+                                   f"{entry['attempts']:>5} "
+                                   f"{number(entry['wall_time'], 's'):>10} {number(entry['user_time'], 's'):>10} "
+                                   f"{number(entry['system_time'], 's'):>10} {number(entry['max_rss_kb'], ' KB'):>12}"
+                                   f"  {entry['command']}\n")
+
+            sidecar = {"task": self.name, "run_id": self.id, "log_file": self.log_file_path, "commands": usage}
+            with open(f"{self.log_file_path}.usage.json", "w") as usage_file:
+                json.dump(sidecar, usage_file, indent=4)
+        except OSError as e:
+            self.logger.error(f"Failed to write the resource usage of {self.name}: {e}")
+
+    def cancel(self):
+        """Stop the run: no further command is started and the running ones are terminated."""
+        with self.lock:
+            self.cancelled.set()
+        self.terminate_processes()
+
+    def terminate_processes(self):
+        """Terminate the process groups of this run that are still running."""
+        with self.lock:
+            processes = list(self.processes)
+        for process in processes:
+            self.stop_process(process)
+
+    def stop_process(self, process):
+        """Ask the process group of a command to stop, kill it if it is still running after the grace period."""
+        self.signal_process(process, kill=False)
+        escalation = threading.Timer(self.kill_grace_period, self.signal_process, args=(process, True))
+        escalation.daemon = True
+        escalation.start()
+
+    def signal_process(self, process, kill):
+        # returncode is only set once the process is reaped, polling here would take its exit status away
+        if process.returncode is not None:
+            return
+        try:
+            if os.name == "nt":
+                if kill:
+                    process.kill()
+                else:
+                    os.kill(process.pid, signal.CTRL_BREAK_EVENT)
+            else:
+                # The command runs in its own session, its process group id is its pid
+                os.killpg(process.pid, signal.SIGKILL if kill else signal.SIGTERM)
+        except ProcessLookupError:
+            pass  # Ended in the meantime
+        except Exception as e:
+            self.logger.error(f"Failed to terminate process {process.pid}: {e}")
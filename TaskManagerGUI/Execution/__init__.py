@@ -0,0 +1,11 @@
+"""
+Execution package
+
+This package contains the engine that runs the commands of tasks
+"""
+
+from .TaskGraph import build_command_graph, sequential_nodes, DagRunner
+from .TaskRun import TaskRun, CommandError, task_name_sanitize
+from .RunManager import RunManager
+from .OutputBuffer import OutputBuffer
+from .Scheduler import Scheduler
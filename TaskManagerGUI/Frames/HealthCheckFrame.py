@@ -1,12 +1,14 @@
 import customtkinter as ctk
-from SharedObjects import Environments, Settings, EnvironmentCredentials, OracleDB, HealthCheck
+from SharedObjects import (Environments, Settings, EnvironmentCredentials, OracleDB, HealthCheck, FileWatcher, RunHistory,
+                           UIDispatcher)
+from Execution import Scheduler
 import re
 import threading
 import os
 import subprocess
 from datetime import datetime
 from tkinter import messagebox
-from custom_widgets import CustomInputDialog
+from custom_widgets import CustomInputDialog, show_log_viewer
 import string
 import requests
 import json
@@ -48,6 +50,7 @@ class HealthCheckFrame(ctk.CTkFrame):
         self.credential_manager = EnvironmentCredentials()
         self.database_manager = OracleDB()
         self.healthcheck_manager = HealthCheck()
+        self.dispatcher = UIDispatcher()  # The health checks run in threads, their widget updates go through it
         self.logger = Logger()
 
         self.client_token = None
@@ -58,6 +61,8 @@ class HealthCheckFrame(ctk.CTkFrame):
         self.buttons = {}
         self.button_configs = []
         self.buttons_state = ctk.NORMAL
+        # Only one health check runs at a time, the connection of the database manager is shared
+        self.running_lock = threading.Lock()
 
         # Frame title
         title_label = ctk.CTkLabel(self, text="Health Check", font=("Arial", 24))
@@ -100,6 +105,11 @@ class HealthCheckFrame(ctk.CTkFrame):
 
         # Create buttons
         self.create_buttons_in_ui()
+        # Recreate them when healthcheck.json is changed by someone else
+        FileWatcher().subscribe(HealthCheck.file_path,
+                                lambda changes: self.dispatcher.post(self.create_buttons_in_ui, key=(self, "reloaded")))
+        # Health check schedules are run by this frame, it knows how to get the credentials
+        Scheduler().register_handler("healthcheck", self.run_scheduled_check)
 
     def update_buttons_based_on_environment(self, selected_environment):
         """Update button visibility based on the selected environment."""
@@ -117,45 +127,91 @@ class HealthCheckFrame(ctk.CTkFrame):
     def run_command(self, name, config):
         selected_environment = self.environment_combobox.get().strip()
         if messagebox.askyesno("Confirm!", f"Are you sure you want to execute {name} on {selected_environment}?"):
-            threading.Thread(target=self.run_commands_thread, args=[name, config]).start()
+            if not self.start_running():
+                messagebox.showinfo("Busy", "Another health check is running, try again when it has finished.")
+                return
+            threading.Thread(target=self.run_commands_thread, args=[name, config, selected_environment]).start()
+
+    def run_scheduled_check(self, schedule, on_finished):
+        """Start a scheduled health check on the environment of the schedule, without asking."""
+        if schedule["target"] not in self.healthcheck_manager.get_options():
+            raise RuntimeError(f"Health check {schedule['target']} does not exist")
+        if self.environment_manager.get_environment(schedule["environment"]) is None:
+            raise RuntimeError(f"Environment {schedule['environment']} does not exist")
+        if not self.start_running():
+            on_finished("skipped", error="Another health check is running")
+            return
+
+        threading.Thread(target=self.run_commands_thread,
+                         args=[schedule["target"], self.healthcheck_manager.get_config(schedule["target"]),
+                               schedule["environment"]],
+                         kwargs={"on_finished": on_finished},
+                         daemon=True).start()
+
+    def start_running(self) -> bool:
+        """Claim the database manager for one health check, False if another one is running.
+
+        Called before the thread of the check is started, run_commands_thread releases it.
+        """
+        if not self.running_lock.acquire(blocking=False):
+            return False
+        self.set_running(True)
+        return True
 
-    def run_commands_thread(self, name, config):
-        """Run a series of subprocesses with progress tracking and log output/errors."""
-        self._configure_buttons(ctk.DISABLED)
-        self.environment_combobox.configure(state="disabled")
-        # Ensure the Execution_Logs directory exists
-        log_dir = "Execution_Logs"
-        os.makedirs(log_dir, exist_ok=True)
+    def run_commands_thread(self, name, config, environment, on_finished=None):
+        """Run a health check claimed by start_running and release it when it is done."""
+        try:
+            self.run_commands(name, config, environment, on_finished)
+        finally:
+            self.set_running(False)
+            self.running_lock.release()
+
+    def run_commands(self, name, config, environment, on_finished=None):
+        """Run a series of subprocesses with progress tracking and log output/errors.
+
+        Runs in its own thread, widgets and message boxes are only used through the dispatcher.
+        Scheduled runs pass on_finished(status), they do not show the result.
+        """
+        started = datetime.now().isoformat(timespec="seconds")
+        selected_environment = environment
+        log_file_path = None
+        log_file = None
+        loop_complete = True
+        error = None  # Message of an unexpected failure
 
-        self.config_validation(config)
+        # Everything that can fail is in the try, a scheduled run must always report its end to the scheduler
+        try:
+            # Ensure the Execution_Logs directory exists
+            log_dir = "Execution_Logs"
+            os.makedirs(log_dir, exist_ok=True)
 
-        # Generate a unique log file name with a timestamp
-        selected_environment = self.environment_combobox.get().strip()
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")  # Format: YYYYMMDD_HHMMSS
-        log_file_path = f"{log_dir}/{task_name_sanitize(selected_environment + '_' + name)}_{timestamp}.log"
+            self.config_validation(config)
 
-        environment_details = self.environment_manager.get_environment(selected_environment)
-        host = environment_details.get("host", None)
-        service = environment_details.get("service_name", None)
-        port = environment_details.get("port", None)
+            # Generate a unique log file name with a timestamp
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")  # Format: YYYYMMDD_HHMMSS
+            log_file_path = f"{log_dir}/{task_name_sanitize(selected_environment + '_' + name)}_{timestamp}.log"
 
-        run_as_sysdba = config.get('run_as_sysdba', False)
-        use_oracle_client = config.get('oracle_client', False)
+            environment_details = self.environment_manager.get_environment(selected_environment)
+            if environment_details is None:
+                raise RuntimeError(f"Environment {selected_environment} does not exist")
+            host = environment_details.get("host", None)
+            service = environment_details.get("service_name", None)
+            port = environment_details.get("port", None)
 
-        unique_name = str(host) + "_" + str(service)
-        loop_complete = True
-        password = None
-        local_retrieved_password = False
+            run_as_sysdba = config.get('run_as_sysdba', False)
+            use_oracle_client = config.get('oracle_client', False)
 
-        log_file = open(log_file_path, "w")
+            unique_name = str(host) + "_" + str(service)
+            password = None
+            local_retrieved_password = False
 
+            log_file = open(log_file_path, "w")
 
-        try:
             for user in config.get("users", None).split(","):
                 self.logger.info(f"Starting execution of '{name}' for '{user}'")
                 # Get Password for user
                 if user:
-                    success, password, local_retrieved_password = self.get_credentials(username=user, service_name=environment_details.get("service_name"), unique_name=unique_name)
+                    success, password, local_retrieved_password = self.get_credentials(username=user, service_name=environment_details.get("service_name"), unique_name=unique_name, environment=selected_environment)
 
                     # Check if we retrieved a password
                     if not success:
@@ -175,14 +231,16 @@ class HealthCheckFrame(ctk.CTkFrame):
                             # If password was retrieved from local file maybe it is outdated
                             # or user proved wrong password
                             if local_retrieved_password:
-                                messagebox.showerror("Error", "Incorrect password. Deleting local entry!")
+                                self.dispatcher.post(messagebox.showerror, "Error",
+                                                     "Incorrect password. Deleting local entry!")
                             # Password was pulled from vault and something went terribly wrong
                             else:
-                                messagebox.showerror("Error", "Incorrect password. Something went wrong!")
+                                self.dispatcher.post(messagebox.showerror, "Error",
+                                                     "Incorrect password. Something went wrong!")
 
                             self.credential_manager.delete(unique_name)
                     else:
-                        messagebox.showerror("Error", f"Something went wrong!\n {errormsg}")
+                        self.dispatcher.post(messagebox.showerror, "Error", f"Something went wrong!\n {errormsg}")
 
                     loop_complete = False
                     break
@@ -194,37 +252,66 @@ class HealthCheckFrame(ctk.CTkFrame):
 
                     # We disconnect because we need to reconnect next time with different user
                     self.database_manager.disconnect()
+        except Exception as e:
+            loop_complete = False
+            error = f"'{name}' on {selected_environment} failed: {e}"
+            self.logger.error(error)
+            if on_finished is None:
+                self.dispatcher.post(messagebox.showerror, "Error", error)
         finally:
             # Close file in write mode
-            log_file.close()
-
-            # Open file in read mode
-            log_file = open(log_file_path, "r")
-            log_content = log_file.read()
-            log_file.close()
+            if log_file is not None:
+                log_file.close()
+
+            # Only whether the checks wrote anything matters here, the popup reads the log itself
+            log_written = log_file is not None and os.path.getsize(log_file_path) > 0
+            # An empty log is removed, one that could not be created is not there
+            remove_log = log_file is not None and not log_written
+
+            status = "succeeded" if loop_complete else "failed"
+            try:
+                RunHistory().add("healthcheck", name, status, started, datetime.now().isoformat(timespec="seconds"),
+                                 trigger="manual" if on_finished is None else "schedule",
+                                 log_file=log_file_path if log_written else None, environment=selected_environment,
+                                 error=error)
+            except Exception as e:
+                self.logger.error(f"Failed to record the run of '{name}': {e}")
 
             # Loop finished means we didnt have any errors
-            if loop_complete:
-                if len(log_content) > 0:
-                    if messagebox.askyesno("Finished!", f"Would you like to view the log output?"):
-                        # Display the log content in a popup
-                        self.show_log_popup(log_content)
-                else:
-                    messagebox.showinfo("Finished!", f"{name} has finished!")
+            if on_finished is not None:
+                if remove_log:
                     os.remove(log_file_path)
+                self.logger.info(f"Scheduled '{name}' on {selected_environment} has finished"
+                                 f"{'' if loop_complete else ' with errors'}.")
+                on_finished(status, error=error)
+            elif loop_complete:
+                if log_written:
+                    if self.dispatcher.call(messagebox.askyesno, "Finished!", f"Would you like to view the log output?"):
+                        # Display the log in a popup
+                        self.dispatcher.post(self.show_log_popup, log_file_path)
+                else:
+                    self.dispatcher.post(messagebox.showinfo, "Finished!", f"{name} has finished!")
+                    if remove_log:
+                        os.remove(log_file_path)
                 self.logger.info(f"'{name}' has finished!")
             else:
-                if len(log_content) > 0:
-                    if messagebox.askyesno("Finished!", f"{name} has finished with errors. Would you like to view the log output?"):
-                        # Display the log content in a popup
-                        self.show_log_popup(log_content)
-                else:
+                if log_written:
+                    if self.dispatcher.call(messagebox.askyesno, "Finished!",
+                                            f"{name} has finished with errors. Would you like to view the log output?"):
+                        # Display the log in a popup
+                        self.dispatcher.post(self.show_log_popup, log_file_path)
+                elif remove_log:
                     os.remove(log_file_path)
                 self.logger.info(f"'{name}' has finished with errors.")
 
+    def set_running(self, running):
+        """Disable the buttons and the environment selection while a health check runs, from any thread."""
+        self.buttons_state = ctk.DISABLED if running else ctk.NORMAL
+        self.dispatcher.post(self._show_running_state, key=(self, "running"))
 
-            self._configure_buttons(ctk.NORMAL)
-            self.environment_combobox.configure(state="normal")
+    def _show_running_state(self):
+        self._configure_buttons(self.buttons_state)
+        self.environment_combobox.configure(state="disabled" if self.buttons_state == ctk.DISABLED else "normal")
 
     def _configure_buttons(self, state):
         """Configure all buttons to the specified state."""
@@ -232,51 +319,17 @@ class HealthCheckFrame(ctk.CTkFrame):
         for button in self.buttons.values():
             button.configure(state=state)
 
-    def show_log_popup(self, log_content):
-        """Display the log content in a modal, scrollable popup window using CustomTkinter."""
-        root = self.winfo_toplevel()
-        log_window = ctk.CTkToplevel(root)
-        log_window.title("Log Output")
-
-        # Center the popup in the parent window
-        parent_x = self.winfo_rootx()
-        parent_y = self.winfo_rooty()
-        parent_width = self.winfo_width()
-        parent_height = self.winfo_height()
-
-        popup_width = 600
-        popup_height = 400
-        position_x = parent_x + (parent_width - popup_width) // 2
-        position_y = parent_y + (parent_height - popup_height) // 2
-
-        log_window.geometry(f"{popup_width}x{popup_height}+{position_x}+{position_y}")
-
-        # Make the popup modal
-        log_window.transient(root)  # Set the popup as a child of the parent window
-        log_window.grab_set()  # Disable interaction with the parent window
-        log_window.focus_force()
-        log_window.lift()
-
-        # Create a frame to hold the Textbox and scrollbar
-        frame = ctk.CTkFrame(log_window)
-        frame.pack(fill="both", expand=True, padx=10, pady=10)
-
-        # Create the CTkTextbox
-        text_widget = ctk.CTkTextbox(frame, wrap="word", font=("Arial", 12))
-        text_widget.insert("0.0", log_content)  # Insert the log content at the start
-        text_widget.configure(state="disabled")
-        text_widget.pack(side="left", fill="both", expand=True)
-
-        # Wait for the popup to close
-        log_window.wait_window()
-        root.attributes('-alpha', 1.0)
-
-    def get_credentials(self, username, service_name, unique_name):
+    def show_log_popup(self, log_file_path):
+        """Display the log in a modal popup, only the part in view is read from the file."""
+        show_log_viewer(self, log_file_path, title="Log Output")
+        self.winfo_toplevel().attributes('-alpha', 1.0)
+
+    def get_credentials(self, username, service_name, unique_name, environment=None):
         if self.credential_manager.exists(unique_name, username):
             self.logger.info(f"Password retrieved locally for {username} of {service_name}")
             return True, sanitize_password(self.credential_manager.get(unique_name).get(username)), True
 
-        elif self.vault_defined() and self.is_rds():
+        elif self.vault_defined() and self.is_rds(environment):
 
             if self.client_token is None:
 
@@ -292,7 +345,7 @@ class HealthCheckFrame(ctk.CTkFrame):
 
                 if client_token_response.status_code != 200:
                     self.logger.error(f"Failed to retrieve client token for vault. Status code {client_token_response.status_code}")
-                    messagebox.showerror("Error",
+                    self.dispatcher.post(messagebox.showerror, "Error",
                                          f"Failed to retrieve client token for vault. Status code {client_token_response.status_code}")
                     return False, None, None
 
@@ -308,7 +361,7 @@ class HealthCheckFrame(ctk.CTkFrame):
 
             if response.status_code != 200:
                 self.logger.error(f"Failed to retrieve credentials for {service_name}. Status code {response.status_code}")
-                messagebox.showerror("Error",
+                self.dispatcher.post(messagebox.showerror, "Error",
                                      f"Failed to retrieve credentials for {service_name}. Status code {response.status_code}")
                 return False, None, None
 
@@ -320,14 +373,9 @@ class HealthCheckFrame(ctk.CTkFrame):
             self.logger.info(f"Password retrieved successfully for {username}")
             return True, sanitize_password(password), False
 
-        elif self.is_rds():
-            if messagebox.askyesno("Input Required", f"It appears that neither vault settings or default passwords have not been configured\n Would you like to provide password manually"):
-                dialog = CustomInputDialog(
-                    title=f"Provide Password for {username.upper()} of {service_name}",
-                    parent=self,
-                    fields=["Password"]
-                )
-                result = dialog.show()
+        elif self.is_rds(environment):
+            if self.dispatcher.call(messagebox.askyesno, "Input Required", f"It appears that neither vault settings or default passwords have not been configured\n Would you like to provide password manually"):
+                result = self.dispatcher.call(self.ask_password, username, service_name)
 
                 # If the user cancels the dialog, return the original template
                 if result is None or result == "":
@@ -340,13 +388,8 @@ class HealthCheckFrame(ctk.CTkFrame):
             else:
                 return False, None, None
         else:
-            if messagebox.askyesno("Input Required", f"It appears this is not an RDS instance and default passwords have not been configured\n Would you like to provide password manually"):
-                dialog = CustomInputDialog(
-                    title=f"Provide Password for {username.upper()} of {service_name}",
-                    parent=self,
-                    fields=["Password"]
-                )
-                result = dialog.show()
+            if self.dispatcher.call(messagebox.askyesno, "Input Required", f"It appears this is not an RDS instance and default passwords have not been configured\n Would you like to provide password manually"):
+                result = self.dispatcher.call(self.ask_password, username, service_name)
 
                 # If the user cancels the dialog, return the original template
                 if result is None or result == "":
@@ -360,11 +403,20 @@ class HealthCheckFrame(ctk.CTkFrame):
                 return False, None, None
 
 
+    def ask_password(self, username, service_name):
+        dialog = CustomInputDialog(
+            title=f"Provide Password for {username.upper()} of {service_name}",
+            parent=self,
+            fields=["Password"]
+        )
+        return dialog.show()
+
     def vault_defined(self) -> bool:
         return self.settings_manager.exists("role_id") and self.settings_manager.exists("secret_id") and self.settings_manager.exists("vault_url")
 
-    def is_rds(self) -> bool:
-        return True if "rds.amazonaws.com" in self.environment_manager.get_environment(self.environment_combobox.get().strip()).get("host") else False
+    def is_rds(self, environment=None) -> bool:
+        environment = environment or self.environment_combobox.get().strip()
+        return True if "rds.amazonaws.com" in self.environment_manager.get_environment(environment).get("host") else False
 
     def is_localdb(self, selected_environment) -> bool:
         return True if any(env in self.environment_manager.get_environment(selected_environment.strip()).get("host") for env in ["localhost", "127.0.0.1"]) else False
@@ -407,17 +459,17 @@ class HealthCheckFrame(ctk.CTkFrame):
 
         if not plsql_block:
             self.logger.error("No PLSQL block is configured in this Health Check Procedure!")
-            messagebox.showerror("Error!", "No PLSQL block is configured in this Health Check Procedure!")
+            self.dispatcher.post(messagebox.showerror, "Error!", "No PLSQL block is configured in this Health Check Procedure!")
             return False
 
         if users and use_oracle_client:
             self.logger.error("Combination of users and use of oracle client is not supported!")
-            messagebox.showerror("Error!", "Combination of users and use of oracle client is not supported!")
+            self.dispatcher.post(messagebox.showerror, "Error!", "Combination of users and use of oracle client is not supported!")
             return False
 
         if use_oracle_client and not only_local:
             self.logger.error("Combination of Non local procedure and use of oracle client is not supported!")
-            messagebox.showerror("Error!", "Combination of Non local procedure and use of oracle client is not supported!")
+            self.dispatcher.post(messagebox.showerror, "Error!", "Combination of Non local procedure and use of oracle client is not supported!")
             return False
 
 
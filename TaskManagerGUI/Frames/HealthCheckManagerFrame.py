@@ -1,8 +1,8 @@
 import customtkinter as ctk
 import tkinter as tk
 from tkinter import ttk, messagebox
-from SharedObjects import HealthCheck
-from custom_widgets import HealthCheckDialog
+from SharedObjects import HealthCheck, FileWatcher, Schedules, UIDispatcher
+from custom_widgets import HealthCheckDialog, CustomInputDialog
 
 class HealthCheckManagerFrame(ctk.CTkFrame):
     ORDER = 96
@@ -13,6 +13,7 @@ class HealthCheckManagerFrame(ctk.CTkFrame):
 
         # Initialize the shared Tasks object
         self.healthcheck_manager = HealthCheck()
+        self.schedules_manager = Schedules()
 
         # Frame title
         title_label = ctk.CTkLabel(self, text="Health Check Configuration", font=("Arial", 24))
@@ -25,6 +26,9 @@ class HealthCheckManagerFrame(ctk.CTkFrame):
         self.tree.bind("<Button-3>", self.show_context_menu)
 
         self.display_options()
+        # Refresh when healthcheck.json is changed by someone else
+        FileWatcher().subscribe(HealthCheck.file_path,
+                                lambda changes: UIDispatcher().post(self.display_options, key=(self, "reloaded")))
 
     def display_options(self):
         """Display options in the treeview widget."""
@@ -60,6 +64,12 @@ class HealthCheckManagerFrame(ctk.CTkFrame):
                 self.context_menu.add_command(label="Edit Health Check Procedure",
                                               command=lambda: self.edit_procedure(selected_items[0]))
                 self.context_menu.add_separator()
+                self.context_menu.add_command(label="Add Schedule",
+                                              command=lambda: self.add_schedule(selected_items[0]))
+                if self.schedules_manager.get_schedules_for("healthcheck", self.tree.item(selected_items[0], "text")):
+                    self.context_menu.add_command(label="Remove Schedules",
+                                                  command=lambda: self.remove_schedules(selected_items[0]))
+                self.context_menu.add_separator()
                 self.context_menu.add_command(label="Delete Health Check Procedure",
                                               command=lambda: self.delete_procedure(selected_items[0]))
             else:
@@ -103,6 +113,7 @@ class HealthCheckManagerFrame(ctk.CTkFrame):
                 if procedure_name != result.get('procedure_name'):
                     self.healthcheck_manager.delete_option(procedure_name)
                     self.healthcheck_manager.add_new_option(result.get('procedure_name'), result)
+                    self.schedules_manager.rename_target("healthcheck", procedure_name, result.get('procedure_name'))
                 else:
                     self.healthcheck_manager.edit_option(procedure_name, result)
                 self.display_options()  # Refresh Treeview after editing
@@ -112,8 +123,37 @@ class HealthCheckManagerFrame(ctk.CTkFrame):
     def delete_procedure(self, item_id):
         procedure_name = self.tree.item(item_id, "text")
         self.healthcheck_manager.delete_option(procedure_name)
+        self.schedules_manager.delete_target("healthcheck", procedure_name)
         self.display_options()
 
+    def add_schedule(self, item_id):
+        """Run a health check on an environment on a cron expression or every number of seconds."""
+        procedure_name = self.tree.item(item_id, "text")
+        dialog = CustomInputDialog(
+            title=f"Schedule {procedure_name}",
+            parent=self,
+            fields=["Cron expression or interval in seconds", "Environment",
+                    "If still running (skip, queue or concurrent)"],
+            default_values=["0 2 * * *", "", Schedules.SKIP]
+        )
+        result = dialog.show()
+
+        if result:
+            cron, interval = Schedules.parse_when(result[0])
+            try:
+                self.schedules_manager.add_schedule("healthcheck", procedure_name, cron=cron, interval=interval,
+                                                    overlap=result[2].strip().lower(), environment=result[1].strip())
+            except ValueError as e:
+                messagebox.showerror("Error", str(e))
+
+    def remove_schedules(self, item_id):
+        """Remove all the schedules of a health check."""
+        procedure_name = self.tree.item(item_id, "text")
+        schedules = self.schedules_manager.get_schedules_for("healthcheck", procedure_name)
+        descriptions = "\n".join(Schedules.describe(schedule) for schedule in schedules)
+        if messagebox.askyesno("Confirm Delete", f"Are you sure you want to remove the schedules of "
+                                                 f"'{procedure_name}'?\n\n{descriptions}"):
+            self.schedules_manager.delete_target("healthcheck", procedure_name)
 
     def on_show(self):
         self.display_options()
@@ -6,28 +6,48 @@ import datetime
 from tkinter import messagebox
 from tkinter import ttk, messagebox
 from tkcalendar import DateEntry
+from SharedObjects import RunHistory, LogIndex, UIDispatcher
+from Logging import Logger
+from custom_widgets import show_log_viewer
 
 class LogsFrame(ctk.CTkFrame):
     ORDER = 97
+    content_hit_limit = 1000  # Matching lines a search of the log contents looks at
 
     def __init__(self, parent, main_window):
         super().__init__(parent)
         self.parent = parent
         self.filter_timer = None
+        self.history = RunHistory()
+        self.log_index = LogIndex()
+        self.logger = Logger()
 
         # Frame title
         title_label = ctk.CTkLabel(self, text="Task Logs", font=("Arial", 24))
         title_label.pack(pady=10)
 
-        # Search by name
-        search_label = ctk.CTkLabel(self, text="Search logs by name:", font=("Arial", 14))
+        # Search by name, or by the text printed in the logs
+        search_label = ctk.CTkLabel(self, text="Search runs by name:", font=("Arial", 14))
         search_label.pack(pady=5, padx=10, anchor="w")
 
+        search_frame = ctk.CTkFrame(self, fg_color="transparent")
+        search_frame.pack(pady=10, padx=10, fill=ctk.X)
+
         self.search_var = ctk.StringVar()
         self.search_var.trace_add("write", self.filter_logs)
 
-        search_entry = ctk.CTkEntry(self, textvariable=self.search_var, placeholder_text="Search name")
-        search_entry.pack(pady=10, padx=10, fill=ctk.X)
+        search_entry = ctk.CTkEntry(search_frame, textvariable=self.search_var, placeholder_text="Search name")
+        search_entry.pack(side=ctk.LEFT, fill=ctk.X, expand=True)
+
+        self.search_contents_var = ctk.BooleanVar(value=False)
+        search_contents_checkbox = ctk.CTkCheckBox(search_frame, text="Search log contents",
+                                                   variable=self.search_contents_var, command=self.filter_logs)
+        search_contents_checkbox.pack(side=ctk.LEFT, padx=(10, 0))
+
+        # Number of runs shown, and whether a search of the log contents was cut off
+        self.result_label = ctk.CTkLabel(search_frame, text="", font=("Arial", 12))
+        self.result_label.pack(side=ctk.LEFT, padx=(10, 0))
+        self.results_truncated = False
 
         # Date range filtering
         date_frame = ctk.CTkFrame(self)
@@ -49,14 +69,46 @@ class LogsFrame(ctk.CTkFrame):
                                   foreground='white', borderwidth=2, date_pattern="dd/MM/yyyy")
         self.end_date.grid(row=0, column=3, padx=5)
 
-        # Apply date range filter button
-        date_filter_button = ctk.CTkButton(date_frame, text="Apply Date Filter", command=self.filter_logs)
-        date_filter_button.grid(row=0, column=4, padx=(20, 10))
+        # Status
+        status_label = ctk.CTkLabel(date_frame, text="Status:", font=("Arial", 12))
+        status_label.grid(row=0, column=4, padx=(20, 5))
 
-        # Treeview widget
+        self.status_combobox = ctk.CTkComboBox(date_frame, values=["All"], width=120, state="readonly",
+                                               command=lambda choice: self.filter_logs())
+        self.status_combobox.set("All")
+        self.status_combobox.grid(row=0, column=5, padx=5)
+
+        # Apply date range filter button
+        date_filter_button = ctk.CTkButton(date_frame, text="Apply Date Filter", command=self.apply_date_filter)
+        date_filter_button.grid(row=0, column=6, padx=(20, 10))
+
+        # The date entries always hold a date, so whether they filter is a separate choice; off by default
+        self.date_filter_var = ctk.BooleanVar(value=False)
+        date_filter_checkbox = ctk.CTkCheckBox(date_frame, text="Filter by date", variable=self.date_filter_var,
+                                               command=self.filter_logs)
+        date_filter_checkbox.grid(row=0, column=7, padx=(0, 10))
+        for date_entry in (self.start_date, self.end_date):
+            date_entry.bind("<<DateEntrySelected>>", lambda event: self.apply_date_filter())
+
+        # Treeview widget, one row per recorded run
+        self.columns = {
+            # Column -> key of the run used for sorting
+            "Name": "name",
+            "Status": "status",
+            "Environment": "environment",
+            "Started": "started",
+            "Duration": "duration",
+            "Log Size": "bytes",
+            "Match": "match",  # First matching line of the log, when searching the log contents
+        }
+        # Only the rows in view exist in the treeview, the scrollbar moves them over the runs
+        treeview_frame = ctk.CTkFrame(self, fg_color="transparent")
+        treeview_frame.pack(expand=True, fill="both", padx=10, pady=10)
+        self.scrollbar = ctk.CTkScrollbar(treeview_frame, command=self.on_scrollbar)
+        self.scrollbar.pack(side=ctk.RIGHT, fill=ctk.Y)
         self.logs_treeview = ttk.Treeview(
-            self,
-            columns=("Log File", "File Size", "Creation Date"),
+            treeview_frame,
+            columns=tuple(self.columns),
             show="headings",
             height=10,
             selectmode="extended",
@@ -64,61 +116,78 @@ class LogsFrame(ctk.CTkFrame):
 
         # Define column headings
         # Bind a sorting function to the column headers
-        self.logs_treeview.heading("Log File", text="Log File", command=lambda: self.sort_treeview("Log File", False))
-        self.logs_treeview.heading("File Size", text="File Size",
-                                   command=lambda: self.sort_treeview("File Size", False))
-        self.logs_treeview.heading("Creation Date", text="Creation Date",
-                                   command=lambda: self.sort_treeview("Creation Date", False))
+        for column in self.columns:
+            self.logs_treeview.heading(column, text=column, command=lambda c=column: self.sort_treeview(c, False))
 
         # Adjust column widths
-        self.logs_treeview.column("Log File", width=300)
-        self.logs_treeview.column("File Size", width=100, anchor="center")
-        self.logs_treeview.column("Creation Date", width=150, anchor="center")
+        self.logs_treeview.column("Name", width=250)
+        self.logs_treeview.column("Status", width=90, anchor="center")
+        self.logs_treeview.column("Environment", width=120, anchor="center")
+        self.logs_treeview.column("Started", width=150, anchor="center")
+        self.logs_treeview.column("Duration", width=80, anchor="center")
+        self.logs_treeview.column("Log Size", width=100, anchor="center")
+        self.logs_treeview.column("Match", width=300)
 
-        self.logs_treeview.pack(expand=True, fill="both", padx=10, pady=10)
+        self.logs_treeview.pack(side=ctk.LEFT, expand=True, fill="both")
 
         # Initialize the filtered_log_files list
-        self.filtered_log_files = []
+        self.filtered_log_files = []  # Runs matching the filters, newest first
+        self.sorted_runs = []  # The same runs in the order of the sort column
+        self.runs_by_item = {}  # Row id (the history id) -> run, for every filtered run
+        self.sort_keys = {}  # Key of the runs -> sort key of each filtered run, computed on the first sort
+        self.sort_column = None
+        self.sort_reverse = False
+        self.selected_items = {}  # Row ids of the selected runs in selection order, also those out of view
+        self.visible_items = []  # Row ids of the runs in view
+        self.first_row = 0  # Index in sorted_runs of the first run in view
+        self.visible_rows = 20
+        self.header_height = 25  # Measured on the first rows shown
+        self.row_height = 20
 
         # Load log files from the Execution_Logs directory
         self.load_logs()
 
-        # Bind right-click to show context menu
+        # Bind right-click to show context menu, double-click opens the log at the match
         self.logs_treeview.bind("<Button-3>", self.show_context_menu)
+        self.logs_treeview.bind("<Double-1>", lambda event: self.view_log())
+        self.logs_treeview.bind("<<TreeviewSelect>>", self.on_select)
+        self.logs_treeview.bind("<ButtonPress-1>", self.on_click)
+        self.logs_treeview.bind("<Configure>", self.on_resize)
+        self.logs_treeview.bind("<MouseWheel>", lambda event: self.scroll_by(-3 if event.delta > 0 else 3))
+        self.logs_treeview.bind("<Button-4>", lambda event: self.scroll_by(-3))
+        self.logs_treeview.bind("<Button-5>", lambda event: self.scroll_by(3))
+        self.logs_treeview.bind("<Prior>", lambda event: self.scroll_by(-(self.visible_rows - 1)))
+        self.logs_treeview.bind("<Next>", lambda event: self.scroll_by(self.visible_rows - 1))
+        self.logs_treeview.bind("<Up>", lambda event: self.move_selection(-1))
+        self.logs_treeview.bind("<Down>", lambda event: self.move_selection(1))
+        # Show the new matches once the indexer has caught up with the logs
+        self.log_index.subscribe(self.on_log_index_updated)
 
 
         # Create the context menu
         self.context_menu = tk.Menu(self, tearoff=False)
 
     def load_logs(self):
-        """Load log files from the Execution_Logs directory."""
-        logs_dir = "Execution_Logs"
+        """Load the recorded runs that match the current filters, the log directory is checked in a thread."""
+        threading.Thread(target=self.sync_logs, daemon=True).start()
+        self.log_index.request_update()
 
-        if not os.path.exists(logs_dir):
-            return
+    def on_log_index_updated(self):
+        """Called from the indexer thread after it indexed new log lines."""
+        if self.search_contents_var.get() and self.search_var.get().strip():
+            UIDispatcher().post(self.apply_filter, key=(self, "index_updated"))
 
-        # List all files in the directory and filter for .log files
-        self.log_files = [
-            {
-                "name": f,
-                "size": os.path.getsize(os.path.join(logs_dir, f)),
-                "creation_date": datetime.datetime.fromtimestamp(
-                    os.path.getctime(os.path.join(logs_dir, f))
-                ),
-            }
-            for f in os.listdir(logs_dir)
-            if f.endswith(".log")
-        ]
-
-        # Sort the log files by timestamp (extracted from the filename)
-        self.log_files.sort(key=lambda x: self.extract_timestamp(x["name"]), reverse=True)
+    def sync_logs(self):
+        """Pick up the logs added or removed by someone else, then show the runs."""
+        try:
+            self.history.sync_log_dir()
+        except Exception as e:
+            self.logger.error(f"Failed to scan the execution logs: {e}")
+        UIDispatcher().post(self.show_statuses, self.history.get_statuses(), key=(self, "statuses"))
 
-        # Initialize the filtered log files
-        self.filtered_log_files = self.log_files
-
-        # Insert log file names into the treeview
-        if self.filtered_log_files:
-            self.update_log_treeview()
+    def show_statuses(self, statuses):
+        self.status_combobox.configure(values=["All"] + statuses)
+        self.apply_filter()
 
     def filter_logs(self, *args):
         if self.filter_timer:
@@ -126,75 +195,190 @@ class LogsFrame(ctk.CTkFrame):
 
         self.filter_timer = self.after(500, self.apply_filter)
 
-    def apply_filter(self):
-        search_term = self.search_var.get().lower()
-        start_date = self.start_date.get_date() if self.start_date.get() else None
-        end_date = self.end_date.get_date() if self.end_date.get() else None
+    def apply_date_filter(self):
+        self.date_filter_var.set(True)
+        self.filter_logs()
 
-        filter_thread = threading.Thread(target=self.perform_filter, args=(search_term, start_date, end_date))
+    def apply_filter(self):
+        self.filter_timer = None
+        search_term = self.search_var.get().strip()
+        start_date = end_date = None
+        if self.date_filter_var.get():
+            start_date = self.start_date.get_date() if self.start_date.get() else None
+            end_date = self.end_date.get_date() if self.end_date.get() else None
+        status = self.status_combobox.get()
+        search_contents = self.search_contents_var.get()
+
+        filter_thread = threading.Thread(target=self.perform_filter,
+                                         args=(search_term, start_date, end_date, None if status == "All" else status,
+                                               search_contents),
+                                         daemon=True)
         filter_thread.start()
 
-    def perform_filter(self, search_term, start_date, end_date):
-        def match_date(file_info):
-            """Check if the log file matches the selected date range."""
-            try:
-                # Extract timestamp from file name (assuming it's in the 'Log File' field)
-                timestamp = self.extract_timestamp(file_info["name"])  # Adjust for correct key
-                if not timestamp:
-                    return False
-
-                # Convert timestamp to a date object
-                file_date = timestamp.date()
-
-                # Compare dates
-                if start_date and file_date < start_date:
-                    return False
-                if end_date and file_date > end_date:
-                    return False
-
-                return True
-            except Exception as e:
-                print(f"Error in match_date: {e}")
-                return False
-
-
-        filtered_files = [
-            f for f in self.log_files
-            if search_term in f["name"].replace("_", " ").lower() and match_date(f)
-        ]
+    def perform_filter(self, search_term, start_date, end_date, status, search_contents=False):
+        """Query the run history, the filtering is done by the database indexes.
+
+        When searching the log contents, the runs are those whose log has a line matching the search.
+        """
+        truncated = False
+        if search_contents and search_term:
+            # One more hit than shown tells whether the search was cut off
+            hits = self.log_index.search(search_term, limit=self.content_hit_limit + 1)
+            truncated = len(hits) > self.content_hit_limit
+            first_hits = {}
+            for hit in hits[:self.content_hit_limit]:
+                first_hits.setdefault(hit["log_file"], hit)
+            runs = self.history.get_entries(status=status, since=start_date, until=end_date,
+                                            log_files=list(first_hits))
+            for run in runs:
+                hit = first_hits[run["log_file"]]
+                run["match"] = f"{hit['line']}: {hit['text'].strip()}"
+                run["match_line"] = hit["line"]
+        else:
+            runs = self.history.get_entries(search=search_term, status=status, since=start_date, until=end_date)
+        # Only the result of the latest query is shown when several finish before the next poll
+        UIDispatcher().post(self.update_filtered_list, runs, truncated, key=(self, "filter"))
 
-        self.after(0, self.update_filtered_list, filtered_files)
+    def update_filtered_list(self, filtered_files, truncated=None):
+        """Show new runs in the current sort order, keeping the scroll position and the selection of those left.
 
-    def extract_timestamp(self, log_file_name):
-        try:
-            log_file_name_without_extension = log_file_name[:-4]
-            timestamp_str = "_".join(log_file_name_without_extension.split('_')[-2:])
-            return datetime.datetime.strptime(timestamp_str, "%Y%m%d_%H%M%S")
-        except Exception as e:
-            print(f"Error extracting timestamp: {e}")
-            return datetime.datetime.min
-
-    def update_filtered_list(self, filtered_files):
+        truncated tells whether the runs come from a content search that was cut off, None keeps it as it was.
+        """
+        if truncated is not None:
+            self.results_truncated = truncated
         self.filtered_log_files = filtered_files
+        count = f"{len(filtered_files)} run{'' if len(filtered_files) == 1 else 's'}"
+        if self.results_truncated:
+            count += f" in the logs of the first {self.content_hit_limit} matching lines, refine the search to see all"
+        self.result_label.configure(text=count)
+        # The row id of a run is its history id
+        self.runs_by_item = {str(run["id"]): run for run in filtered_files}
+        self.selected_items = {item: True for item in self.selected_items if item in self.runs_by_item}
+        self.sort_keys = {}
+        self.sort_runs()
         self.update_log_treeview()
 
-    def update_log_treeview(self):
-        """Update the treeview with log files."""
-        # Clear existing entries
-        for row in self.logs_treeview.get_children():
-            self.logs_treeview.delete(row)
+    def sort_runs(self):
+        """Order the filtered runs by the sort column, on their values rather than the displayed text."""
+        if self.sort_column is None:
+            self.sorted_runs = self.filtered_log_files
+            return
+        if self.columns[self.sort_column] == "started":
+            # The history returns the runs newest first, there is nothing to compare
+            runs = self.filtered_log_files
+            self.sorted_runs = runs if self.sort_reverse else runs[::-1]
+            return
+        key = self.columns[self.sort_column]
+        keys = self.sort_keys.get(key)
+        if keys is None:
+            # Text sorts ignoring case, the ISO start times as they are, durations and sizes as numbers
+            if key in ("name", "status", "environment", "match"):
+                keys = [run.get(key).lower() if run.get(key) is not None else None for run in self.filtered_log_files]
+            else:
+                keys = [run.get(key) for run in self.filtered_log_files]
+            self.sort_keys[key] = keys
+        # Runs without a value (no log, not finished) go last in both directions
+        present = [index for index, value in enumerate(keys) if value is not None]
+        present.sort(key=keys.__getitem__, reverse=self.sort_reverse)
+        missing = [index for index, value in enumerate(keys) if value is None]
+        runs = self.filtered_log_files
+        self.sorted_runs = [runs[index] for index in present] + [runs[index] for index in missing]
 
-        # Populate the Treeview with log files
-        for log_file in self.filtered_log_files:
+    def update_log_treeview(self):
+        """Show the runs in view, the treeview only has a row for each of them."""
+        last_first_row = max(0, len(self.sorted_runs) - self.visible_rows)
+        self.first_row = min(max(0, self.first_row), last_first_row)
+        self.logs_treeview.delete(*self.logs_treeview.get_children())
+        self.visible_items = []
+        for run in self.sorted_runs[self.first_row:self.first_row + self.visible_rows]:
+            item_id = str(run["id"])
+            self.visible_items.append(item_id)
             self.logs_treeview.insert(
                 "",
                 "end",
+                iid=item_id,
                 values=(
-                    log_file["name"],
-                    f"{log_file['size'] / 1024:.2f} KB",  # Convert size to KB
-                    log_file["creation_date"].strftime("%d/%m/%Y %H:%M:%S"),
+                    run["name"],
+                    run["status"],
+                    run["environment"] or "",
+                    datetime.datetime.fromisoformat(run["started"]).strftime("%d/%m/%Y %H:%M:%S"),
+                    f"{run['duration']:.0f}s" if run["duration"] is not None else "",
+                    f"{run['bytes'] / 1024:.2f} KB" if run["bytes"] is not None else "",  # Convert size to KB
+                    run.get("match") or "",
                 ),
             )
+        self.logs_treeview.selection_set([item for item in self.visible_items if item in self.selected_items])
+
+        if self.sorted_runs:
+            self.scrollbar.set(self.first_row / len(self.sorted_runs),
+                               min(1.0, (self.first_row + self.visible_rows) / len(self.sorted_runs)))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+        if self.visible_items:
+            # The number of rows that fit depends on the font of the rows and the headings
+            bbox = self.logs_treeview.bbox(self.visible_items[0])
+            if bbox and (bbox[1], bbox[3]) != (self.header_height, self.row_height):
+                self.header_height, self.row_height = bbox[1], bbox[3]
+                self.fit_rows(self.logs_treeview.winfo_height())
+
+    def on_resize(self, event):
+        self.fit_rows(event.height)
+
+    def fit_rows(self, height):
+        """Show as many rows as fit in the treeview, a partial row would let the treeview scroll by itself."""
+        visible_rows = max(1, (height - self.header_height) // max(1, self.row_height))
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.update_log_treeview()
+
+    def on_scrollbar(self, action, *args):
+        """Handle the "moveto" and "scroll" commands of the scrollbar."""
+        if action == "moveto":
+            self.first_row = round(float(args[0]) * len(self.sorted_runs))
+            self.update_log_treeview()
+        elif action == "scroll":
+            step = self.visible_rows - 1 if args[1] == "pages" else 1
+            self.scroll_by(int(args[0]) * max(1, step))
+
+    def scroll_by(self, rows):
+        self.first_row += rows
+        self.update_log_treeview()
+        return "break"  # The treeview must not scroll its few rows itself
+
+    def move_selection(self, step):
+        """Select the run above or below the focused one, scrolling when it is out of view."""
+        focus = self.logs_treeview.focus()
+        index = self.first_row + (self.visible_items.index(focus) if focus in self.visible_items else -step)
+        index = min(max(0, index + step), len(self.sorted_runs) - 1)
+        if index < 0:
+            return "break"
+        if index < self.first_row:
+            self.first_row = index
+        elif index >= self.first_row + self.visible_rows:
+            self.first_row = index - self.visible_rows + 1
+        item_id = str(self.sorted_runs[index]["id"])
+        self.selected_items = {item_id: True}
+        self.update_log_treeview()
+        self.logs_treeview.focus(item_id)
+        return "break"
+
+    def on_click(self, event):
+        """A click without Shift or Control selects one run, the runs out of view are unselected here."""
+        if not event.state & 0x0005 and self.logs_treeview.identify_region(event.x, event.y) in ("cell", "tree"):
+            self.selected_items = {item: True for item in self.selected_items if item in self.visible_items}
+
+    def on_select(self, event):
+        """Record the selection of the runs in view, the treeview does not know the others."""
+        selection = set(self.logs_treeview.selection())
+        for item in self.visible_items:
+            if item in selection:
+                self.selected_items.setdefault(item, True)
+            else:
+                self.selected_items.pop(item, None)
+
+    def selected_runs(self):
+        return [self.runs_by_item[item] for item in self.selected_items if item in self.runs_by_item]
 
     def show_context_menu(self, event):
         """Show the context menu on right-click."""
@@ -207,17 +391,18 @@ class LogsFrame(ctk.CTkFrame):
 
             # If no item is selected yet, select the item under the cursor
             if not selected_items or item_id not in selected_items:
+                self.selected_items = {item_id: True} if item_id else {}
                 self.logs_treeview.selection_set(item_id)
-                selected_items = self.logs_treeview.selection()
 
             # Clear the existing context menu options
             self.context_menu.delete(0, tk.END)
 
-            # Show options based on the number of selected items
-            if len(self.logs_treeview.selection()) == 1:  # If only one item is selected
+            # Show options based on the number of selected runs, those out of view included
+            if len(self.selected_items) == 1:  # If only one item is selected
                 self.context_menu.add_command(label="View Log", command=self.view_log)
+                self.context_menu.add_command(label="Follow Log", command=lambda: self.view_log(follow=True))
                 self.context_menu.add_command(label="Delete Log", command=self.delete_log)
-            elif len(self.logs_treeview.selection()) > 1:  # If multiple items are selected
+            elif len(self.selected_items) > 1:  # If multiple items are selected
                 self.context_menu.add_command(label="Delete Selected Logs", command=self.delete_multiple_logs)
 
             # Show the context menu
@@ -228,92 +413,54 @@ class LogsFrame(ctk.CTkFrame):
 
     def delete_multiple_logs(self):
         """Delete the selected multiple log files after confirmation."""
-        selected_items = self.logs_treeview.selection()  # Get the selected items
-        if not selected_items:
+        if not self.selected_items:
             messagebox.showerror("Error", "No log files selected.")
             return
 
-        log_files_to_delete = []
-        for item in selected_items:
-            log_file_name = self.logs_treeview.item(item, "values")[0]  # Get the log file name
-            log_file_path = os.path.join("Execution_Logs", log_file_name)  # Build the full path to the log file
-            log_files_to_delete.append((log_file_name, log_file_path))
+        log_files_to_delete = [run["log_file"] for run in self.selected_runs() if run["log_file"]]
 
         # Show a confirmation dialog before deleting
         if messagebox.askyesno("Confirm Deletion",
                                f"Are you sure you want to delete the following logs?\nThis action cannot be undone!"):
             try:
-                for log_file_name, log_file_path in log_files_to_delete:
+                for log_file_path in log_files_to_delete:
                     if os.path.exists(log_file_path):
                         os.remove(log_file_path)  # Delete the log file
                     else:
                         print(f"File not found: {log_file_path}")
 
-                    # Find and remove the dictionary that has 'name': log_file_name
-                    self.filtered_log_files = [log for log in self.filtered_log_files if
-                                               log.get('name') != log_file_name]
-
-                self.update_log_treeview()  # Update the Treeview
+                    # The run goes with its log
+                    self.history.forget_log(log_file_path)
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to delete log file(s): {e}")
+            # Update the Treeview, also with the logs deleted before a failure
+            deleted = {log_file_path for log_file_path in log_files_to_delete if not os.path.exists(log_file_path)}
+            self.update_filtered_list([log for log in self.filtered_log_files if log.get('log_file') not in deleted])
 
-    def view_log(self):
-        """View the log file content in a popup when selected from the context menu."""
-        selected_item = self.logs_treeview.selection()  # Get the selected item
+    def view_log(self, follow=False):
+        """View the log file content in a popup when selected from the context menu.
 
-        if selected_item:
-            log_file_name = self.logs_treeview.item(selected_item[0])["values"][0]  # Get the log file name
-            log_file_path = os.path.join("Execution_Logs", log_file_name)  # Build the full path to the log file
+        With follow, the popup shows the end of the log and the lines a running task appends to it.
+        """
+        selected_runs = self.selected_runs()  # Get the selected run
 
-            if os.path.exists(log_file_path):
-                # Read the log file content
-                with open(log_file_path, "r") as file:
-                    log_content = file.read()
+        if selected_runs:
+            log_file_path = selected_runs[0]["log_file"]
+            if not log_file_path:
+                messagebox.showinfo("No Log", f"The run of '{selected_runs[0]['name']}' did not write a log.")
+                return
+            log_file_name = os.path.basename(log_file_path)
 
-                # Now, call show_log_popup with both the log content and log file path
-                self.show_log_popup(log_file_name, log_content, log_file_path)
+            if os.path.exists(log_file_path):
+                self.show_log_popup(log_file_name, log_file_path, None if follow else selected_runs[0].get("match_line"),
+                                    follow)
             else:
                 messagebox.showerror("Error", f"Log file '{log_file_name}' does not exist.")
 
-    def show_log_popup(self, log_file_name, log_content, log_file_path):
-        """Display the log content in a modal, scrollable popup window using CustomTkinter."""
-        log_window = ctk.CTkToplevel(self)
-        log_window.title(log_file_name)
-
-        # Center the popup in the parent window
-        parent_x = self.winfo_rootx()
-        parent_y = self.winfo_rooty()
-        parent_width = self.winfo_width()
-        parent_height = self.winfo_height()
-
-        popup_width = 600
-        popup_height = 400
-        position_x = parent_x + (parent_width - popup_width) // 2
-        position_y = parent_y + (parent_height - popup_height) // 2
-
-        log_window.geometry(f"{popup_width}x{popup_height}+{position_x}+{position_y}")
-
-        # Make the popup modal
-        log_window.transient(self)  # Set the popup as a child of the parent window
-        log_window.grab_set()  # Disable interaction with the parent window
-
-        # Create a frame to hold the Textbox and scrollbar
-        frame = ctk.CTkFrame(log_window)
-        frame.pack(fill="both", expand=True, padx=10, pady=10)
-
-        # Create the CTkTextbox
-        text_widget = ctk.CTkTextbox(frame, wrap="word", font=("Arial", 12))
-        text_widget.insert("0.0", log_content)  # Insert the log content at the start
-        text_widget.configure(state="disabled")  # Make the textbox read-only
-        text_widget.pack(side="left", fill="both", expand=True)
-
-        # Create Show in Directory button
-        show_in_dir_button = ctk.CTkButton(log_window, text="Show in Directory",
-                                           command=lambda: self.show_in_directory(log_file_path))
-        show_in_dir_button.pack(pady=(5,20), fill='x', padx=20)
-
-        # Wait for the popup to close
-        log_window.wait_window()
+    def show_log_popup(self, log_file_name, log_file_path, line=None, follow=False):
+        """Display the log in a modal popup, scrolled to the line and with the line highlighted when given."""
+        show_log_viewer(self, log_file_path, title=log_file_name, line=line, follow=follow,
+                        buttons=[("Show in Directory", lambda: self.show_in_directory(log_file_path))])
 
     def show_in_directory(self, log_file_path):
         """Open the directory containing the log file in Explorer."""
@@ -322,46 +469,33 @@ class LogsFrame(ctk.CTkFrame):
 
     def delete_log(self):
         """Delete the selected log file after confirmation."""
-        selected_item = self.logs_treeview.selection()  # Get the selected item
-        if not selected_item:
+        selected_runs = self.selected_runs()  # Get the selected run
+        if not selected_runs:
             messagebox.showerror("Error", "No log file selected.")
             return
 
-        log_file_name = self.logs_treeview.item(selected_item, "values")[0]  # Get the log file name
-        log_file_path = os.path.join("Execution_Logs", log_file_name)  # Build the full path to the log file
+        log_file_path = selected_runs[0]["log_file"]
+        if not log_file_path:
+            messagebox.showerror("Error", "The selected run did not write a log.")
+            return
+        log_file_name = os.path.basename(log_file_path)
 
         # Show a confirmation dialog before deleting
         if messagebox.askyesno("Confirm Deletion", f"Are you sure you want to delete '{log_file_name}'? This action cannot be undone!"):
             try:
-                os.remove(log_file_path)  # Delete the log file
-                self.filtered_log_files = [log for log in self.filtered_log_files if
-                                           log.get('name') != log_file_name]
-                self.update_log_treeview()  # Update the Treeview
+                if os.path.exists(log_file_path):
+                    os.remove(log_file_path)  # Delete the log file
+                self.history.forget_log(log_file_path)
+                self.update_filtered_list([log for log in self.filtered_log_files if
+                                           log.get('log_file') != log_file_path])  # Update the Treeview
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to delete log file: {e}")
 
     def sort_treeview(self, column, reverse):
-        """Sort the Treeview by the specified column."""
-        # Retrieve all rows from the Treeview
-        rows = [
-            (self.logs_treeview.set(row_id, column), row_id)
-            for row_id in self.logs_treeview.get_children()
-        ]
-
-        # Sort the rows based on the column's data type
-        if column == "File Size":
-            # Convert file size to float for sorting
-            rows.sort(key=lambda x: float(x[0].replace(" KB", "")), reverse=reverse)
-        elif column == "Creation Date":
-            # Convert date string to datetime for sorting
-            rows.sort(key=lambda x: datetime.datetime.strptime(x[0], "%d/%m/%Y %H:%M:%S"), reverse=reverse)
-        else:
-            # Default string sorting for "Log File"
-            rows.sort(key=lambda x: x[0].lower(), reverse=reverse)
-
-        # Rearrange rows in the Treeview
-        for index, (_, row_id) in enumerate(rows):
-            self.logs_treeview.move(row_id, "", index)
+        """Sort the runs by the specified column, the order is kept when the filters change."""
+        self.sort_column, self.sort_reverse = column, reverse
+        self.sort_runs()
+        self.update_log_treeview()
 
         # Reverse the sorting order for the next click
         self.logs_treeview.heading(column, command=lambda: self.sort_treeview(column, not reverse))
@@ -57,6 +57,7 @@ class PasswordRetrieverFrame(ctk.CTkFrame):
         self.environment_manager = Environments(parent=self)
         self.settings_manager = Settings()
         self.credential_manager = EnvironmentCredentials()
+        self.dispatcher = UIDispatcher()  # Passwords are retrieved in a thread, it fills the textbox through it
 
         self.users = {}
         self.client_token = None
@@ -149,9 +150,7 @@ class PasswordRetrieverFrame(ctk.CTkFrame):
             self.get_passwords(islist=True)
 
     def get_passwords(self, islist=False):
-        threading.Thread(target=self.get_passwords_thread, args=[islist,]).start()
-
-    def get_passwords_thread(self, islist=False):
+        """Prepare the tab of the selected service, the passwords are retrieved in a thread."""
         if not self.vault_defined():
             messagebox.showwarning("Warning!", "Vault settings have not been configured!\nAborting action!")
             return
@@ -159,7 +158,6 @@ class PasswordRetrieverFrame(ctk.CTkFrame):
         self.toggle_buttons()
         self.environment_combobox.configure(state="disabled")
 
-        """Retrieve and display passwords for the selected service."""
         selected_environment = self.environment_combobox.get().strip()
         environment_details = self.environment_manager.get_environment(selected_environment)
         host = environment_details.get("host", None)
@@ -179,28 +177,35 @@ class PasswordRetrieverFrame(ctk.CTkFrame):
         finally:
             tab = self.tabview.add(selected_environment)
 
+        # create_right_click_menu(self.tabview)  # Bind right-click menu to the new tab
+        textbox = ctk.CTkTextbox(tab, height=10)
+        textbox.pack(padx=10, pady=10, fill="both", expand=True)
+        textbox.delete("1.0", ctk.END)
+
+        users_to_iterate = self.users if islist else self.users.get(system)
+        threading.Thread(target=self.get_passwords_thread,
+                         args=[users_to_iterate, service, unique_name, textbox, selected_environment]).start()
+
+    def get_passwords_thread(self, users, service, unique_name, textbox, selected_environment):
+        """Retrieve the passwords of the users, the textbox is filled through the dispatcher."""
         try:
-            if tab:
-                # create_right_click_menu(self.tabview)  # Bind right-click menu to the new tab
-
-                textbox = ctk.CTkTextbox(tab, height=10)
-                textbox.pack(padx=10, pady=10, fill="both", expand=True)
-                textbox.delete("1.0", ctk.END)
-                users_to_iterate = self.users if islist else self.users.get(system)
-                for user in users_to_iterate:
-                    success, password, error = self.get_credentials(user, service, unique_name)
-                    if success:
-                        formatted_data = json.dumps({"username": user, "password": password}, indent=4)
-                        textbox.insert("1.0", formatted_data + ",\n")
-                    else:
-                        # 404 means not found
-                        if error == 404:
-                            pass
-
-                self.tabview.set(selected_environment)
+            for user in users:
+                success, password, error = self.get_credentials(user, service, unique_name)
+                if success:
+                    formatted_data = json.dumps({"username": user, "password": password}, indent=4)
+                    self.dispatcher.post(textbox.insert, "1.0", formatted_data + ",\n")
+                else:
+                    # 404 means not found
+                    if error == 404:
+                        pass
+
+            self.dispatcher.post(self.tabview.set, selected_environment)
         finally:
-            self.toggle_buttons()
-            self.environment_combobox.configure(state="normal")
+            self.dispatcher.post(self.enable_controls)
+
+    def enable_controls(self):
+        self.toggle_buttons()
+        self.environment_combobox.configure(state="normal")
 
     def get_credentials(self, username, service_name, unique_name):
         if self.client_token is None:
@@ -216,7 +221,7 @@ class PasswordRetrieverFrame(ctk.CTkFrame):
                                                   verify=False)
 
             if client_token_response.status_code != 200:
-                messagebox.showerror("Error",
+                self.dispatcher.post(messagebox.showerror, "Error",
                                      f"Failed to retrieve client token for vault. Status code {client_token_response.status_code}")
                 return False, None, client_token_response.status_code
 
@@ -230,7 +235,7 @@ class PasswordRetrieverFrame(ctk.CTkFrame):
         response = requests.get(url, headers={"X-Vault-Token": self.client_token}, verify=False)
 
         if response.status_code != 200:
-            messagebox.showerror("Error",
+            self.dispatcher.post(messagebox.showerror, "Error",
                                  f"Failed to retrieve credentials for {service_name}. Status code {response.status_code}")
             return False, None, response.status_code
 
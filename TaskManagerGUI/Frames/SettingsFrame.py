@@ -5,7 +5,7 @@ from tkinter import messagebox
 import json
 from Update_module.Update_module import *
 from custom_widgets import RestartMessageDialog
-from SharedObjects import Settings
+from SharedObjects import Settings, Database, FileWatcher, UIDispatcher
 
 def load_or_generate_key():
     """Load the encryption key from a file or generate a new one if not found."""
@@ -49,7 +49,13 @@ class SettingsFrame(ctk.CTkFrame):
         self.theme_switch = ctk.CTkSwitch(body_frame, text="Dark Mode", command=self.change_theme_mode)
         self.theme_switch.pack(pady=10, anchor="w", padx=20)
 
+        # Storage backend toggle (JSON files/SQLite)
+        self.sqlite_switch = ctk.CTkSwitch(body_frame, text="SQLite Storage", command=self.set_storage_backend)
+        self.sqlite_switch.pack(pady=10, anchor="w", padx=20)
 
+        # Command mode toggle (shell/direct execution)
+        self.exec_switch = ctk.CTkSwitch(body_frame, text="Run Commands Without Shell", command=self.set_command_mode)
+        self.exec_switch.pack(pady=10, anchor="w", padx=20)
 
         # Healthchecks frame
         healthcheck_frame = ctk.CTkFrame(body_frame)
@@ -95,8 +101,22 @@ class SettingsFrame(ctk.CTkFrame):
         self.save_button.pack(pady=20)
 
         self.load_theme_mode()
+        self.load_storage_backend()
+        self.load_command_mode()
         self.load_healthcheck_save_credentials()
         self.load_healthcheck_data()
+        FileWatcher().subscribe(self.settings_manager.file_path, self.on_settings_reloaded)
+
+    def on_settings_reloaded(self, changes):
+        """Called from the file watcher thread when settings.json was changed by someone else."""
+        UIDispatcher().post(self.refresh_settings, key="settings_reloaded")
+
+    def refresh_settings(self):
+        """Update the switches from the reloaded settings, the entries are left as typed."""
+        self.load_theme_mode()
+        self.load_storage_backend()
+        self.load_command_mode()
+        self.load_healthcheck_save_credentials()
 
     def load_healthcheck_data(self):
         """Load the username and encrypted password from settings.json and decrypt the password."""
@@ -147,6 +167,45 @@ class SettingsFrame(ctk.CTkFrame):
         ctk.set_appearance_mode(new_theme)
         self.settings_manager.add_or_update("theme", new_theme)
 
+    def load_storage_backend(self):
+        """Load the storage backend; the migration to SQLite is one way so the switch locks afterwards."""
+        if Database.enabled():
+            self.sqlite_switch.select()
+            self.sqlite_switch.configure(state="disabled")
+        elif self.settings_manager.get("storage_backend") == "sqlite":
+            self.sqlite_switch.select()
+        else:
+            self.sqlite_switch.deselect()
+
+    def set_storage_backend(self):
+        """Schedule the migration of the JSON files to SQLite, it runs on the next start."""
+        if not self.sqlite_switch.get():
+            self.settings_manager.delete("storage_backend")
+            return
+
+        self.settings_manager.add_or_update("storage_backend", "sqlite")
+        dialog = RestartMessageDialog(
+            self,
+            message="Tasks, health checks, settings and the audit log\n"
+                    "will be moved to SQLite when the application restarts."
+        )
+        if dialog.show() == "restart_now":
+            self.updater.restart_application()
+
+    def load_command_mode(self):
+        """Commands are run by the shell unless direct execution was chosen."""
+        if self.settings_manager.get("command_mode", "shell") == "exec":
+            self.exec_switch.select()
+        else:
+            self.exec_switch.deselect()
+
+    def set_command_mode(self):
+        """Start commands directly; those using pipes, redirections, globs or builtins still go through the shell."""
+        if self.exec_switch.get():
+            self.settings_manager.add_or_update("command_mode", "exec")
+        else:
+            self.settings_manager.delete("command_mode")
+
     def load_healthcheck_save_credentials(self):
         """Load sidebar position from settings."""
         option = self.settings_manager.get("save_healthcheck_credentials_locally", False)  # Default to "left"
@@ -1,8 +1,7 @@
 import customtkinter as ctk
 import tkinter as tk
 from tkinter import ttk
-import os
-import json
+from SharedObjects import AuditLog
 
 
 class TaskManagementLogsFrame(ctk.CTkFrame):
@@ -54,32 +53,24 @@ class TaskManagementLogsFrame(ctk.CTkFrame):
         self.log_tree.pack(expand=True, fill=tk.BOTH)
 
     def load_logs(self):
-        """Load logs from a JSON file and populate the Treeview."""
-        log_file = "Logs/task_auditlog.json"
-        if os.path.exists(log_file):
-            with open(log_file, "r") as file:
-                try:
-                    logs = json.load(file)
-                    if isinstance(logs, list):
-                        for log in logs:
-                            # Ensure the log entry has the correct structure
-                            if isinstance(log, dict) and all(k in log for k in ["timestamp", "action", "task_name", "old_value", "new_value"]):
-                                timestamp = log["timestamp"]
-                                action = log["action"]
-                                task_name = log["task_name"]
-                                old_value = log.get("old_value", "")
-                                new_value = log.get("new_value", "")
-
-                                self.log_tree.insert("", tk.END, values=(timestamp, action, task_name, old_value, new_value))
-                            else:
-                                print("Invalid log entry structure:", log)
-                    else:
-                        print("Logs object is not a list:", logs)
-                except json.JSONDecodeError as e:
-                    print("Failed to decode JSON:", e)
-                    self.log_tree.insert("", tk.END, values=("Error loading logs.", "", "", "", ""))
-        else:
+        """Load logs from the audit log and populate the Treeview."""
+        logs = AuditLog().get_entries()
+        if not logs:
             self.log_tree.insert("", tk.END, values=("No logs found.", "", "", "", ""))
+            return
+
+        for log in logs:
+            # Ensure the log entry has the correct structure
+            if all(k in log for k in ["timestamp", "action", "task_name", "old_value", "new_value"]):
+                timestamp = log["timestamp"]
+                action = log["action"]
+                task_name = log["task_name"]
+                old_value = log.get("old_value", "")
+                new_value = log.get("new_value", "")
+
+                self.log_tree.insert("", tk.END, values=(timestamp, action, task_name, old_value, new_value))
+            else:
+                print("Invalid log entry structure:", log)
 
     def on_log_select(self, event):
         """Display the old and new values for the selected log entry."""
@@ -1,30 +1,42 @@
 import customtkinter as ctk
 import tkinter as tk
 from tkinter import ttk, messagebox
-import datetime
-from SharedObjects import Tasks
+from SharedObjects import Tasks, AuditLog, CommandRenderer, FileWatcher, Schedules, TaskSearch, UIDispatcher
+from Execution import TaskRun
 import json
-import os
 from Frames.TaskManagementLogsFrame import TaskManagementLogsFrame
 from tkinterdnd2 import TkinterDnD, DND_FILES  # Import drag-and-drop support
 from custom_widgets import CustomInputDialog
 
 class TaskManagerFrame(ctk.CTkFrame):
     ORDER = 95
+    limit_keys = ("timeout", "retries", "backoff")  # Optional fields of a command, see TaskRun.command_limits
+    debounce_delay = 300  # Milliseconds without typing before the search runs
 
     def __init__(self, parent, main_window):
         super().__init__(parent)
         self.main_window = main_window
         self.parent = parent
-        self.logs = self.load_logs()
+        self.audit_log = AuditLog()
 
         # Initialize the shared Tasks object
         self.tasks_manager = Tasks()
+        self.renderer = CommandRenderer()
+        self.schedules_manager = Schedules()
+        self.task_search = TaskSearch()
+        self.task_search.prepare()  # The postings of thousands of tasks take a while, build them off the Tk thread
 
         # Frame title
         title_label = ctk.CTkLabel(self, text="Task Manager", font=("Arial", 24))
         title_label.pack(pady=10)
 
+        # Search by task name or command line, the matching tasks are shown best first
+        self.search_var = ctk.StringVar()
+        self.search_job = None
+        self.search_var.trace_add("write", self.on_search_input)
+        search_entry = ctk.CTkEntry(self, textvariable=self.search_var, placeholder_text="Search tasks or commands")
+        search_entry.pack(pady=5, padx=10, fill=tk.X)
+
         # Task and Command Treeview
         self.tree = ttk.Treeview(self, columns=["Type"], show='tree headings')
         self.tree.heading('#0', text='Tasks')
@@ -34,6 +46,7 @@ class TaskManagerFrame(ctk.CTkFrame):
 
         # Display tasks
         self.display_tasks()
+        FileWatcher().subscribe(Tasks.file_path, self.on_tasks_reloaded)
 
         # Context menu
         self.context_menu = tk.Menu(self, tearoff=0)
@@ -43,13 +56,6 @@ class TaskManagerFrame(ctk.CTkFrame):
         self.drop_target_register(DND_FILES)
         self.dnd_bind('<<Drop>>', self.on_drop)
 
-    def load_logs(self):
-        """Load task logs from file."""
-        if os.path.exists("Logs/task_auditlog.json"):
-            with open("Logs/task_auditlog.json", "r") as log_file:
-                return json.load(log_file)
-        return []
-
     def show_context_menu(self, event):
         # Identify the item under the cursor
         item_id = self.tree.identify_row(event.y)
@@ -83,6 +89,12 @@ class TaskManagerFrame(ctk.CTkFrame):
                     self.context_menu.add_command(label="Rename Task",
                                                   command=lambda: self.rename_task(selected_items[0]))
                     self.context_menu.add_separator()
+                    self.context_menu.add_command(label="Add Schedule",
+                                                  command=lambda: self.add_schedule(selected_items[0]))
+                    if self.schedules_manager.get_schedules_for("task", self.tree.item(selected_items[0], "text")):
+                        self.context_menu.add_command(label="Remove Schedules",
+                                                      command=lambda: self.remove_schedules(selected_items[0]))
+                    self.context_menu.add_separator()
                     self.context_menu.add_command(label="Delete Task",
                                                   command=lambda: self.delete_task(selected_items[0]))
                 else:
@@ -121,22 +133,65 @@ class TaskManagerFrame(ctk.CTkFrame):
                 json.dump(tasks_to_export, json_file, indent=4)
             messagebox.showinfo("Export Successful", f"Tasks exported to {file_path}")
 
+    def on_search_input(self, *args):
+        """Search once typing pauses, every keystroke restarts the delay."""
+        if self.search_job is not None:
+            self.after_cancel(self.search_job)
+        self.search_job = self.after(self.debounce_delay, self.display_tasks)
+
     def display_tasks(self):
-        """Display tasks in the treeview widget."""
+        """Display the tasks matching the search in the treeview widget."""
+        self.search_job = None
         # Clear the Treeview
         for item in self.tree.get_children():
             self.tree.delete(item)
 
-        # Sort tasks alphabetically by their name
-        tasks = self.tasks_manager.get_tasks()
-        tasks_sorted = sorted(tasks, key=lambda task: task["name"].lower())
-
-        # Populate the Treeview with sorted tasks
-        for task in tasks_sorted:
+        # Without a search the tasks are sorted alphabetically by their name, else best match first
+        for task_name in self.task_search.search(self.search_var.get()):
+            task = self.tasks_manager.get_task(task_name)
+            if task is None:
+                continue
             task_id = self.tree.insert("", tk.END, text=task["name"], values=["Task"])
-            for command_parts in task["commands"]:
-                command_text = self.generate_command_from_parts(command_parts)
-                self.tree.insert(task_id, tk.END, text=command_text, values=["Command"])
+            self.insert_commands(task_id, task)
+
+    def insert_commands(self, task_id, task):
+        """Insert the command rows of a task below its tree item."""
+        for command_parts in task["commands"]:
+            command_text = self.renderer.render(command_parts)
+            # Command rows use the command id as their item id
+            self.tree.insert(task_id, tk.END, iid=command_parts["id"], text=command_text, values=["Command"])
+
+    def on_tasks_reloaded(self, changes):
+        """Called from the file watcher thread when tasks.json was changed by someone else."""
+        # Not coalesced, every reload carries its own changes
+        UIDispatcher().post(self.refresh_tasks, changes)
+
+    def refresh_tasks(self, changes):
+        """Update only the tree items of the tasks that changed on disk."""
+        if self.search_var.get().strip():
+            # The changed tasks may now match the search or not, show the new result
+            self.display_tasks()
+            return
+
+        task_items = {self.tree.item(item, "text"): item for item in self.tree.get_children()}
+
+        for task_name in changes["removed"]:
+            if task_name in task_items:
+                self.tree.delete(task_items.pop(task_name))
+
+        # Drop the old command rows first, a command id may move between two changed tasks
+        updated = [task_name for task_name in changes["added"] + changes["changed"] if self.tasks_manager.get_task(task_name)]
+        for task_name in updated:
+            if task_name in task_items:
+                self.tree.delete(*self.tree.get_children(task_items[task_name]))
+
+        for task_name in updated:
+            if task_name not in task_items:
+                # Keep the alphabetical order used by display_tasks
+                index = next((i for i, item in enumerate(self.tree.get_children())
+                              if self.tree.item(item, "text").lower() > task_name.lower()), tk.END)
+                task_items[task_name] = self.tree.insert("", index, text=task_name, values=["Task"])
+            self.insert_commands(task_items[task_name], self.tasks_manager.get_task(task_name))
 
     def add_task(self):
         """Add a new task."""
@@ -146,7 +201,7 @@ class TaskManagerFrame(ctk.CTkFrame):
         if task_name:
             task_name = task_name[0].strip()
             # Check if the task name already exists
-            if any(task["name"] == task_name for task in self.tasks_manager.get_tasks()):
+            if self.tasks_manager.get_task(task_name) is not None:
                 messagebox.showerror("Error", "Task names must be unique.")
                 return
 
@@ -166,12 +221,13 @@ class TaskManagerFrame(ctk.CTkFrame):
 
         if new_task_name:
             # Check if the new task name already exists
-            if any(task["name"] == new_task_name[0].strip() for task in self.tasks_manager.get_tasks()):
+            if self.tasks_manager.get_task(new_task_name[0].strip()) is not None:
                 messagebox.showerror("Error", "Task names must be unique.")
                 return
 
             # Update the task name in the tasks_manager and tree
             self.tasks_manager.rename_task(task_name, new_task_name[0].strip())
+            self.schedules_manager.rename_target("task", task_name, new_task_name[0].strip())
             self.tree.item(item_id, text=new_task_name[0].strip())  # Update the tree with the new name
             self.log_action("Renamed task", f"{task_name} -> {new_task_name[0].strip()}")
 
@@ -180,32 +236,51 @@ class TaskManagerFrame(ctk.CTkFrame):
         input_dialog = CustomInputDialog(
             title="Add Command",
             parent=self,
-            fields=["Prefix", "Executable Path", "Executable Name", "Arguments"]
+            fields=["Prefix", "Executable Path", "Executable Name", "Arguments", "Parallel Group",
+                    "Timeout (s)", "Retries", "Backoff (s)"]
         )
         command_parts = input_dialog.show()
 
         if command_parts:
-            prefix, path, executable, arguments = map(str.strip, command_parts)
+            prefix, path, executable, arguments, group, *limits = map(str.strip, command_parts)
             command_dict = {
                 "prefix": prefix,
                 "path": path,
                 "executable": executable,
                 "arguments": arguments
             }
+            if group:
+                # Consecutive commands of the same group run in parallel
+                command_dict["group"] = group
+            if not self.apply_limits(command_dict, *limits):
+                return
 
             # Retrieve the task name
             task_name = self.tree.item(task_id, "text")
 
             # Add the command to the task
-            self.tasks_manager.add_command(task_name, command_dict)
+            command_id = self.tasks_manager.add_command(task_name, command_dict)
 
             # Insert the new command into the Treeview under the corresponding task
-            command_text = self.generate_command_from_parts(command_dict)
-            self.tree.insert(task_id, tk.END, text=command_text, values=["Command"])
+            command_text = self.renderer.render(command_dict)
+            self.tree.insert(task_id, tk.END, iid=command_id, text=command_text, values=["Command"])
 
             # Log the addition of the command
             self.log_action("Added command", task_name, new_value=command_text)
 
+    def apply_limits(self, command_dict, timeout, retries, backoff):
+        """Set the timeout, retries and backoff typed in a command dialog, empty fields are left out."""
+        try:
+            for key, value, convert in (("timeout", timeout, float), ("retries", retries, int),
+                                        ("backoff", backoff, float)):
+                if value:
+                    command_dict[key] = convert(value)
+            TaskRun.command_limits(command_dict)
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid timeout, retries or backoff: {e}")
+            return False
+        return True
+
     def edit_command(self, command_id):
         """Edit an existing command."""
         # Retrieve the task and command
@@ -213,35 +288,49 @@ class TaskManagerFrame(ctk.CTkFrame):
         task_name = self.tree.item(task_id, 'text')
         command_text = self.tree.item(command_id, 'text')
 
-        # Parse the current command using the tasks manager
-        current_command = self.tasks_manager.get_command(task_name, command_text)
+        # Look the command up by its id, commands with the same text stay distinct
+        _, current_command = self.tasks_manager.find_command(command_id)
+        if current_command is None:
+            messagebox.showerror("Error", "The command no longer exists.")
+            return
         # Open the CustomInputDialog with the current values
-        fields = ["Prefix", "Path", "Executable", "Arguments"]
+        fields = ["Prefix", "Path", "Executable", "Arguments", "Parallel Group", "Timeout (s)", "Retries", "Backoff (s)"]
         default_values = [
             current_command.get("prefix", ""),
             current_command.get("path", ""),
             current_command.get("executable", ""),
-            current_command.get("arguments", "")
+            current_command.get("arguments", ""),
+            current_command.get("group", ""),
+            *(str(current_command.get(key, "")) for key in self.limit_keys)
         ]
         dialog = CustomInputDialog(title="Edit Command", parent=self, fields=fields, default_values=default_values)
         dialog_result = dialog.show()
 
         if dialog_result:
-            new_prefix, new_path, new_executable, new_arguments = map(str.strip, dialog_result)
-            new_command_dict = {
+            new_prefix, new_path, new_executable, new_arguments, new_group, *limits = map(str.strip, dialog_result)
+            # Keep the fields the dialog does not show, like depends_on
+            new_command_dict = {k: v for k, v in current_command.items()
+                                if k not in ("id", "group", *self.limit_keys)}
+            new_command_dict.update({
                 "prefix": new_prefix,
                 "path": new_path,
                 "executable": new_executable,
                 "arguments": new_arguments
-            }
+            })
+            if new_group:
+                new_command_dict["group"] = new_group
+            if not self.apply_limits(new_command_dict, *limits):
+                return
 
             # Confirm the edit
-            new_command_text = self.generate_command_from_parts(new_command_dict)
-            if new_command_text != command_text:
+            new_command_text = self.renderer.render(new_command_dict)
+            changed_options = any(new_command_dict.get(key) != current_command.get(key)
+                                  for key in ("group", *self.limit_keys))
+            if new_command_text != command_text or changed_options:
                 confirm = messagebox.askyesno("Confirm Edit", "Are you sure you want to edit the command?")
                 if confirm:
                     # Update the command in the tasks manager
-                    self.tasks_manager.update_command(task_name, current_command, new_command_dict)
+                    self.tasks_manager.update_command_by_id(command_id, new_command_dict)
 
                     # Update the Treeview with the new command name
                     self.tree.item(command_id, text=new_command_text)
@@ -249,6 +338,37 @@ class TaskManagerFrame(ctk.CTkFrame):
                     # Log the action
                     self.log_action("Updated command", task_name, old_value=command_text, new_value=new_command_text)
 
+    def add_schedule(self, task_id):
+        """Run a task on a cron expression or every number of seconds."""
+        task_name = self.tree.item(task_id, "text")
+        dialog = CustomInputDialog(
+            title=f"Schedule {task_name}",
+            parent=self,
+            fields=["Cron expression or interval in seconds", "If still running (skip, queue or concurrent)"],
+            default_values=["0 2 * * *", Schedules.SKIP]
+        )
+        result = dialog.show()
+
+        if result:
+            cron, interval = Schedules.parse_when(result[0])
+            try:
+                schedule = self.schedules_manager.add_schedule("task", task_name, cron=cron, interval=interval,
+                                                               overlap=result[1].strip().lower())
+            except ValueError as e:
+                messagebox.showerror("Error", str(e))
+                return
+            self.log_action("Added schedule", task_name, new_value=Schedules.describe(schedule))
+
+    def remove_schedules(self, task_id):
+        """Remove all the schedules of a task."""
+        task_name = self.tree.item(task_id, "text")
+        schedules = self.schedules_manager.get_schedules_for("task", task_name)
+        descriptions = "\n".join(Schedules.describe(schedule) for schedule in schedules)
+        if messagebox.askyesno("Confirm Delete", f"Are you sure you want to remove the schedules of '{task_name}'?\n\n"
+                                                 f"{descriptions}"):
+            self.schedules_manager.delete_target("task", task_name)
+            self.log_action("Removed schedules", task_name, old_value=descriptions)
+
     def delete_task(self, task_id):
         """Delete an existing task."""
         task_name = self.tree.item(task_id, 'text')
@@ -257,6 +377,7 @@ class TaskManagerFrame(ctk.CTkFrame):
         if confirm:
             self.tree.delete(task_id)
             self.tasks_manager.delete_task(task_name)
+            self.schedules_manager.delete_target("task", task_name)
             self.log_action("Deleted task", task_name)
 
     def delete_multiple_tasks(self, task_ids):
@@ -273,6 +394,7 @@ class TaskManagerFrame(ctk.CTkFrame):
             for task_id in task_ids:
                 task_name = self.tree.item(task_id, 'text')
                 self.tasks_manager.delete_task(task_name)
+                self.schedules_manager.delete_target("task", task_name)
                 self.tree.delete(task_id)
 
             # Log the deletion
@@ -286,21 +408,12 @@ class TaskManagerFrame(ctk.CTkFrame):
         confirm = messagebox.askyesno("Confirm Delete", "Are you sure you want to delete the command?")
         if confirm:
             self.tree.delete(command_id)
-            self.tasks_manager.delete_command(task_name, command_name)
+            self.tasks_manager.delete_command_by_id(command_id)
             self.log_action("Deleted command", task_name, old_value=command_name)
 
     def log_action(self, action, task_name, old_value="", new_value=""):
         """Log changes made to tasks and commands."""
-        log_entry = {
-            "timestamp": datetime.datetime.now().isoformat(),
-            "action": action,
-            "task_name": task_name,
-            "old_value": old_value,
-            "new_value": new_value
-        }
-        self.logs.append(log_entry)
-        with open("Logs/task_auditlog.json", "w") as log_file:
-            json.dump(self.logs, log_file, indent=4)
+        self.audit_log.add(action, task_name, old_value=old_value, new_value=new_value)
 
     def view_taskmanager_logs(self):
         """Show the TaskManager logs in a new window, centered on the main window."""
@@ -346,24 +459,33 @@ class TaskManagerFrame(ctk.CTkFrame):
         """Handle dropped files."""
         file_path = event.data
         if file_path.endswith('.json'):
-            with open(file_path, 'r') as json_file:
-                new_tasks = json.load(json_file)
-                self.tasks_manager.add_bulk_tasks(new_tasks)
-                self.display_tasks()
-                self.log_action("Imported tasks from file", file_path)
-        else:
-            messagebox.showerror("Invalid File", "Only JSON files are allowed.")
+            try:
+                with open(file_path, 'r') as json_file:
+                    new_tasks = json.load(json_file)
+            except (OSError, ValueError) as e:  # ValueError includes json.JSONDecodeError
+                messagebox.showerror("Invalid File", f"Could not read {file_path}: {e}")
+                return
 
-    def generate_command_from_parts(self, parts):
-        """Generate a command string from its dictionary parts."""
-        prefix = parts.get("prefix", "").strip()
-        path = parts.get("path", "").strip()
-        executable = parts.get("executable", "").strip()
-        arguments = parts.get("arguments", "").strip()
+            # Collect the user's decisions up front, then import everything in one go
+            choices = {
+                task_name: self.tasks_manager.ask_conflict_policy(task_name)
+                for task_name in self.tasks_manager.find_conflicts(new_tasks)
+            }
+            try:
+                summary = self.tasks_manager.import_tasks(new_tasks, policy=choices)
+            except ValueError as e:
+                messagebox.showerror("Invalid File", str(e))
+                return
+            except Exception as e:
+                # The tasks were restored by import_tasks, nothing was saved
+                self.tasks_manager.logger.error(f"Failed to import tasks from {file_path}: {e}")
+                messagebox.showerror("Import Failed", f"The tasks were not imported: {e}")
+                return
 
-        # Construct the full command
-        if path:
-            command = f"{prefix} {os.path.join(path, executable)} {arguments}".strip()
+            self.display_tasks()
+            self.log_action(
+                "Imported tasks from file", file_path,
+                new_value=", ".join(f"{len(names)} {result}" for result, names in summary.items())
+            )
         else:
-            command = f"{prefix} {executable} {arguments}".strip()
-        return command
+            messagebox.showerror("Invalid File", "Only JSON files are allowed.")
@@ -1,295 +1,194 @@
-import atexit
-import signal
-
 import customtkinter as ctk
-import subprocess
-import threading
 import tkinter.messagebox as messagebox
-import time
-from datetime import datetime
-import re
-from SharedObjects import Tasks  # Import the shared Tasks object
-import os
+from SharedObjects import Tasks, FileWatcher, TaskSearch, UIDispatcher  # Import the shared Tasks object
+from Execution import RunManager, TaskRun
 from Logging import Logger
-
-def task_name_sanitize(task_name) -> str:
-    """Sanitize the task name by replacing invalid characters with underscores."""
-    return re.sub(r'[\\/:"*?<>| ]', '_', task_name)
+from custom_widgets import VirtualButtonList, show_log_viewer
 
 
 class TaskRunnerFrame(ctk.CTkFrame):
     ORDER = 2
+    console_interval = 250  # Milliseconds between two updates of the output console
+    console_max_lines = 2000  # Lines kept in the output console, older lines are dropped
+    debounce_delay = 300  # Milliseconds without typing before the search runs
 
     def __init__(self, parent, main_window):
         super().__init__(parent)
         self.parent = parent
-        self.processes = []
-        self.lock = threading.Lock()
         self.logger = Logger()
 
-        atexit.register(self.cleanup_processes)
-
         label = ctk.CTkLabel(self, text="Task Runner", font=("Arial", 24))
         label.pack(pady=20)
 
         self.tasks_manager = Tasks()
+        self.task_search = TaskSearch()
+        self.task_search.prepare()  # The postings of thousands of tasks take a while, build them off the Tk thread
+        self.run_manager = RunManager()
+        self.dispatcher = UIDispatcher()
 
-        search_label = ctk.CTkLabel(self, text="Search tasks by name:", font=("Arial", 14))
+        search_label = ctk.CTkLabel(self, text="Search tasks by name or command:", font=("Arial", 14))
         search_label.pack(pady=5, padx=10, anchor="w")
 
         self.search_var = ctk.StringVar()
+        self.search_job = None
         self.search_var.trace_add("write", self.on_search_input)
 
         search_entry = ctk.CTkEntry(self, textvariable=self.search_var, placeholder_text="Search tasks")
         search_entry.pack(pady=10, padx=10, fill=ctk.X)
 
-        self.button_frame = ctk.CTkFrame(self)
-        self.button_frame.pack(fill=ctk.BOTH, expand=True, padx=10, pady=10)
-
-        self.progress_bar = ctk.CTkProgressBar(self, height=15)
-        self.progress_bar.pack(fill=ctk.X, padx=10, pady=(5, 10))
-        self.progress_bar.set(0)
-
-        self.task_buttons = {}  # Keep track of buttons by task name
-        self.update_task_buttons()
-
-        self.last_search_time = time.time()
-        self.debounce_delay = 0.3
-
-
-    def cleanup_processes(self):
-        with self.lock:
-            for process in self.processes:
-                if process.poll() is None: # Process is stil running
-                    try:
-                        if os.name == "nt":
-                            os.kill(process.pid, signal.CTRL_BREAK_EVENT)
-                        else:
-                            os.killpg(os.getpgid(process.pid), signal.SIGTERM)
-                    except Exception as e:
-                        self.logger.error(f"Failed to terminate process {process.pid}: {e}")
+        # Only the visible task buttons exist, scrolling reuses them for other tasks
+        self.task_list = VirtualButtonList(self, command=self.run_task,
+                                           is_disabled=lambda name: bool(self.run_manager.get_runs(name)))
+        self.task_list.pack(fill=ctk.BOTH, expand=True, padx=10, pady=10)
+
+        # One row with a progress bar and a cancel button per queued or running task
+        self.runs_frame = ctk.CTkFrame(self, fg_color="transparent")
+        self.runs_frame.pack(fill=ctk.X, padx=10, pady=(5, 10))
+        self.run_rows = {}  # Run id -> (row frame, label, progress bar)
+        # Scheduled runs show up here as well as the ones started from the buttons
+        self.run_manager.subscribe(self.post_run_event)
+
+        # Live output of the selected run, click a run to follow its output
+        self.console_label = ctk.CTkLabel(self, text="Output:", anchor="w")
+        self.console_label.pack(fill=ctk.X, padx=10)
+        self.console = ctk.CTkTextbox(self, height=150, wrap="none", font=("Courier New", 12))
+        self.console.pack(fill=ctk.X, padx=10, pady=(0, 10))
+        self.console.configure(state="disabled")
+        self.console_run = None
+        self.console_position = 0  # Read position in the output buffer of console_run
+        self.console_job = None
+
+        self.update_task_list()
+        # The list follows the changes made to tasks.json by someone else
+        FileWatcher().subscribe(Tasks.file_path,
+                                lambda changes: self.dispatcher.post(self.update_task_list, key=(self, "tasks")))
 
     def on_search_input(self, *args):
-        """Handle the search input with debounce."""
-        current_time = time.time()
-        if current_time - self.last_search_time >= self.debounce_delay:
-            self.last_search_time = current_time
-            self.update_task_buttons()
-
-    def update_task_buttons(self):
-        """Update task buttons using a background thread."""
-        search_text = self.search_var.get().lower()
-
-        threading.Thread(target=self.update_buttons_thread, args=(search_text,), daemon=True).start()
-
-    def update_buttons_thread(self, search_text):
-        """Filter tasks and synchronize buttons in the background."""
-        tasks = self.tasks_manager.get_tasks()
-        filtered_tasks = [task for task in tasks if search_text in task["name"].lower()]
-
-        # Sort tasks alphabetically by their name
-        filtered_tasks_sorted = sorted(filtered_tasks, key=lambda task: task["name"].lower())
-
-        current_task_names = {task["name"] for task in filtered_tasks_sorted}
-
-        # Prepare lists of tasks to add, remove, or update
-        tasks_to_add = [task for task in filtered_tasks_sorted if task["name"] not in self.task_buttons]
-        tasks_to_remove = [task_name for task_name in self.task_buttons if task_name not in current_task_names]
-        tasks_to_update = [task for task in filtered_tasks_sorted if
-                           task["name"] in self.task_buttons and task["commands"] != self.get_current_commands(
-                               task["name"])]
-
-        # Update the UI in the main thread
-        self.after(0, self.update_buttons_in_ui, tasks_to_add, tasks_to_remove, tasks_to_update)
-
-    def get_current_commands(self, task_name):
-        """Get the current commands associated with a task button."""
-        if task_name in self.task_buttons:
-            # Retrieve the command for the task button, assuming the button's command is set as a lambda function
-            button_command = self.task_buttons[task_name].cget('command')
-            return button_command.__defaults__[
-                0] if button_command.__defaults__ else []  # Get the default 'cmds' value from the lambda
-        return []
-
-    def update_buttons_in_ui(self, tasks_to_add, tasks_to_remove, tasks_to_update):
-        """Update the task buttons in the main UI thread."""
-        # Determine the current state of buttons (disabled or normal)
-        button_state = "normal"
-        if self.task_buttons:
-            # Check the state of any existing button
-            button_state = list(self.task_buttons.values())[0].cget("state")
-
-        # Remove buttons for tasks that no longer exist
-        for task_name in tasks_to_remove:
-            self.task_buttons[task_name].destroy()
-            del self.task_buttons[task_name]
-
-        # Add buttons for new tasks
-        for task in tasks_to_add:
-            task_name = task["name"]
-            commands = task["commands"]
-            if commands:
-                button = ctk.CTkButton(
-                    self.button_frame,
-                    text=task_name,
-                    command=lambda cmds=commands, name=task_name: self.run_commands(cmds, name),
-                    state=button_state  # Set the state based on existing buttons
-                )
-                button.pack(pady=5, padx=10, fill=ctk.X)
-                self.task_buttons[task_name] = button
-
-        # Update buttons for tasks with changed commands
-        for task in tasks_to_update:
-            task_name = task["name"]
-            commands = task["commands"]
-            if commands:
-                # Update the command associated with the button
-                self.task_buttons[task_name].configure(
-                    command=lambda cmds=commands, name=task_name: self.run_commands(cmds, name)
-                )
-
-    def run_commands(self, args, name):
-        threading.Thread(target=self.run_commands_thread, args=[args, name], daemon=True).start()
-
-    def run_commands_thread(self, commands, name):
-        """Run a series of subprocesses with progress tracking and log output/errors."""
-        self._configure_buttons("disabled")
-
-        # Ensure the Execution_Logs directory exists
-        log_dir = "Execution_Logs"
-        os.makedirs(log_dir, exist_ok=True)
-
-        # Generate a unique log file name with a timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")  # Format: YYYYMMDD_HHMMSS
-        log_file_path = f"{log_dir}/{task_name_sanitize(name)}_{timestamp}.log"
-
-        try:
-            with open(log_file_path, "w") as log_file:  # Open log file for writing
-                for i, command_dict in enumerate(commands):
-                    command = self.generate_command_from_parts(command_dict)
-                    self.logger.info(f"Starting execution for {command} of {name}")
-                    try:
-                        # Run the command and capture output and errors
-                        result = subprocess.Popen(
-                            command,
-                            shell=True,
-                            stdout=log_file,  # Log standard output to the file
-                            stderr=log_file,  # Log errors to the same file
-                            text=True,  # Ensure output is in text format
-                            creationflags= subprocess.CREATE_NEW_PROCESS_GROUP if os.name == "nt" else 0
-                        )
-                        with self.lock:
-                            self.processes.append(result)
-
-                        result.wait()
-
-                        if result.returncode != 0:
-                            log_file.write(f"Command failed with exit code {result.returncode}.\n")
-                            self.logger.error(f"Command '{command}' failed with exit code {result.returncode}.")
-                            messagebox.showerror("Error",
-                                                 f"Command '{command}' failed with exit code {result.returncode}.")
-                            break
-
-                        self.update_progress_bar(i + 1, len(commands))
-                    except subprocess.CalledProcessError as e:
-                        # Log the error to the file and show a messagebox
-                        log_file.write(f"Command failed with exit code {e.returncode}.\n")
-                        self.logger.error(f"Command '{command}' failed with exit code {result.returncode}.")
-                        messagebox.showerror("Error", f"Command '{command}' failed with exit code {e.returncode}.")
-                        break
-
-                    except FileNotFoundError:
-                        # Log the error to the file and show a messagebox
-                        log_file.write(f"Command '{command}' not found.\n")
-                        self.logger.error(f"Command '{command}' not found.")
-                        messagebox.showerror("Error", f"Command '{command}' not found.")
-                        break
-
-                    except Exception as e:
-                        # Log the unexpected error to the file and show a messagebox
-                        log_file.write(f"An unexpected error occurred: {str(e)}\n")
-                        self.logger.error(f"An unexpected error occurred: {str(e)}")
-                        messagebox.showerror("Error", f"An unexpected error occurred: {str(e)}")
-                        break
-
-                else:
-                    if messagebox.askyesno("Completed", f"Task {name} has been completed successfully.\n"
-                                                        "Would you like to view the log output?"):
-                        with open(log_file_path, "r") as log_file:
-                            log_content = log_file.read()
-                        # Display the log content in a popup
-                        self.show_log_popup(log_content)
-
-        finally:
-            self.cleanup_processes()
-            self.update_progress_bar(len(commands), len(commands))
-            self._configure_buttons("normal")
-            self.logger.info(f"Execution of {name} finished")
-
-    def show_log_popup(self, log_content):
-        """Display the log content in a modal, scrollable popup window using CustomTkinter."""
-        root = self.winfo_toplevel()
-        log_window = ctk.CTkToplevel(root)
-        log_window.title("Log Output")
-
-        # Center the popup in the parent window
-        parent_x = self.winfo_rootx()
-        parent_y = self.winfo_rooty()
-        parent_width = self.winfo_width()
-        parent_height = self.winfo_height()
-
-        popup_width = 600
-        popup_height = 400
-        position_x = parent_x + (parent_width - popup_width) // 2
-        position_y = parent_y + (parent_height - popup_height) // 2
-
-        log_window.geometry(f"{popup_width}x{popup_height}+{position_x}+{position_y}")
-
-        # Make the popup modal
-        log_window.transient(root)  # Set the popup as a child of the parent window
-        log_window.grab_set()  # Disable interaction with the parent window
-        log_window.focus_force()
-        log_window.lift()
-
-        # Create a frame to hold the Textbox and scrollbar
-        frame = ctk.CTkFrame(log_window)
-        frame.pack(fill="both", expand=True, padx=10, pady=10)
-
-        # Create the CTkTextbox
-        text_widget = ctk.CTkTextbox(frame, wrap="word", font=("Arial", 12))
-        text_widget.insert("0.0", log_content)  # Insert the log content at the start
-        text_widget.configure(state="disabled")
-        text_widget.pack(side="left", fill="both", expand=True)
-
-        # Wait for the popup to close
-        log_window.wait_window()
-        root.attributes('-alpha', 1.0)
-
-    def update_progress_bar(self, completed, total):
-        if total > 0:
-            progress = completed / total
-            self.progress_bar.set(progress)
-            self.update_idletasks()
-
-    def _configure_buttons(self, state):
-        """Configure all buttons to the specified state."""
-        for button in self.task_buttons.values():
-            button.configure(state=state)
-
-
-    def generate_command_from_parts(self, command_dict):
-        """Generate a command string from its dictionary parts."""
-        prefix = command_dict.get("prefix", "").strip()
-        path = command_dict.get("path", "").strip()
-        executable = command_dict.get("executable", "").strip()
-        arguments = command_dict.get("arguments", "").strip()
-
-        # Construct the full command
-        if path:
-            command = f"{prefix} {os.path.join(path, executable)} {arguments}".strip()
-        else:
-            command = f"{prefix} {executable} {arguments}".strip()
-        return command
+        """Search once typing pauses, every keystroke restarts the delay so the last one is never lost."""
+        if self.search_job is not None:
+            self.after_cancel(self.search_job)
+        self.search_job = self.after(self.debounce_delay, self.update_task_list)
+
+    def update_task_list(self):
+        """Show the tasks matching the search, best matches first, filtering the data rather than the widgets."""
+        self.search_job = None
+        names = [name for name in self.task_search.search(self.search_var.get())
+                 if (self.tasks_manager.get_task(name) or {}).get("commands")]
+        self.task_list.set_items((name, name) for name in names)
+
+    def run_task(self, name):
+        """Start a run of a task with its current commands, other tasks keep running and stay available."""
+        task = self.tasks_manager.get_task(name)
+        if task is None or not task["commands"]:
+            return
+        self.run_manager.start(name, task["commands"])
+        self.task_list.refresh()  # Disable the button of the task right away
+
+    def post_run_event(self, event, run):
+        """Called from the run threads, the progress of a run is only drawn at its latest value."""
+        key = (self, "progress", run.id) if event == "progress" else None
+        self.dispatcher.post(self.on_run_event, event, run, key=key)
+
+    def on_run_event(self, event, run):
+        """Follow the runs of the RunManager, in the main UI thread."""
+        if event == "started":
+            self.task_list.refresh()
+            self.add_run_row(run)
+        elif event == "progress":
+            self.update_run_row(run)
+        elif event == "finished":
+            self.on_run_finished(run)
+
+    def add_run_row(self, run):
+        """Add the progress bar and cancel button of a run."""
+        row = ctk.CTkFrame(self.runs_frame)
+        row.pack(fill=ctk.X, pady=2)
+
+        label = ctk.CTkLabel(row, text="", width=250, anchor="w", cursor="hand2")
+        label.pack(side=ctk.LEFT, padx=10)
+        label.bind("<Button-1>", lambda event: self.show_run_output(run))
+
+        cancel_button = ctk.CTkButton(row, text="Cancel", width=80, command=lambda: self.cancel_run(run))
+        cancel_button.pack(side=ctk.RIGHT, padx=10, pady=5)
+
+        progress_bar = ctk.CTkProgressBar(row, height=15)
+        progress_bar.pack(side=ctk.LEFT, fill=ctk.X, expand=True, padx=10)
+        progress_bar.set(0)
+
+        self.run_rows[run.id] = (row, label, progress_bar)
+        self.update_run_row(run)
+
+        # Follow the new run unless another run is still being followed
+        if self.console_run is None or self.console_run.id not in self.run_rows:
+            self.show_run_output(run)
+
+    def show_run_output(self, run):
+        """Follow the output of a run in the console."""
+        self.console_run = run
+        self.console_position = 0
+        self.console_label.configure(text=f"Output of {run.name}:")
+        self.console.configure(state="normal")
+        self.console.delete("1.0", "end")
+        self.console.configure(state="disabled")
+        if self.console_job is None:
+            self.refresh_console()
+
+    def refresh_console(self):
+        """Append the output produced since the last refresh, in one batch per timer tick."""
+        self.console_job = None
+        if self.console_run is None:
+            return
+
+        self.console_position, lines = self.console_run.output.read_since(self.console_position)
+        if lines:
+            self.console.configure(state="normal")
+            self.console.insert("end", "\n".join(lines) + "\n")
+            # Keep the widget small, the complete output is in the log file
+            line_count = int(self.console.index("end-1c").split(".")[0])
+            if line_count > self.console_max_lines:
+                self.console.delete("1.0", f"{line_count - self.console_max_lines}.0")
+            self.console.configure(state="disabled")
+            self.console.see("end")
+
+        # Keep polling while runs are active, the last tick picks up the final output
+        if self.run_rows:
+            self.console_job = self.after(self.console_interval, self.refresh_console)
+
+    def update_run_row(self, run):
+        """Show the status and progress of a run."""
+        if run.id not in self.run_rows:
+            return
+        _, label, progress_bar = self.run_rows[run.id]
+        scheduled = ", scheduled" if run.trigger == "schedule" else ""
+        label.configure(text=f"{run.name} ({run.status}{scheduled}, {run.completed}/{run.total})")
+        if run.total > 0:
+            progress_bar.set(run.completed / run.total)
+
+    def cancel_run(self, run):
+        if messagebox.askyesno("Cancel Task", f"Are you sure you want to cancel the task {run.name}?"):
+            self.run_manager.cancel(run.id)
+
+    def on_run_finished(self, run):
+        """Remove the row of a finished run and report its result."""
+        if run.id in self.run_rows:
+            self.run_rows.pop(run.id)[0].destroy()
+        if run is self.console_run:
+            self.refresh_console()
+        self.task_list.refresh()
+
+        if run.trigger != "manual":
+            return  # Nobody is waiting for the result of a scheduled run, it is in the run history
+        if run.status == TaskRun.SUCCEEDED:
+            if messagebox.askyesno("Completed", f"Task {run.name} has been completed successfully.\n"
+                                                "Would you like to view the log output?"):
+                self.show_log_popup(run.log_file_path)
+        elif run.status == TaskRun.FAILED:
+            messagebox.showerror("Error", run.error)
+
+    def show_log_popup(self, log_file_path):
+        """Display the log in a modal popup, only the part in view is read from the file."""
+        show_log_viewer(self, log_file_path, title="Log Output")
+        self.winfo_toplevel().attributes('-alpha', 1.0)
 
     def on_show(self):
-        self.update_task_buttons()
+        self.update_task_list()
@@ -6,7 +6,9 @@ from Frames import *
 import re
 import os
 import json
-from SharedObjects import Settings
+from SharedObjects import Settings, Database, UIDispatcher
+from SharedObjects.Database import migrate_json_files, read_json_file
+from Execution import Scheduler
 from tkinterdnd2 import TkinterDnD, DND_FILES
 from Logging import Logger
 
@@ -23,6 +25,15 @@ class ApplicationInterface:
         # Initialize the logger
         self.logger = Logger()
 
+        # Move the JSON configuration into SQLite before any shared object loads it, Settings included:
+        # it is only loaded once and would keep using settings.json
+        if (read_json_file(Settings.file_path, {}).get("storage_backend") == "sqlite"
+                and not Database.enabled()):
+            try:
+                migrate_json_files()
+            except Exception as e:
+                self.logger.error(f"Migration to SQLite failed, keeping the JSON files: {e}")
+
         # Load settings and set current theme
         self.settings_manager = Settings()
         current_theme = self.settings_manager.get("theme", "dark")  # Default to "dark" if no theme is found
@@ -47,9 +58,14 @@ class ApplicationInterface:
         # Create buttons for the sidebar in a custom order
         self.create_sidebar_buttons()
 
+        # Background threads update the widgets through the dispatcher, it runs their updates on this thread
+        UIDispatcher().start(self.parent)
+
         # Initialize all frames and set the current frame
         self.frames = {}
         self.init_frames()
+        # Start the scheduled runs once the frames have registered their handlers
+        Scheduler().start()
         self.current_frame = None
         self.show_frame(HomeFrame)
 
@@ -0,0 +1,81 @@
+import datetime
+import json
+import os
+import threading
+from Logging import Logger
+from SharedObjects.Database import Database
+
+
+class AuditLog:
+    """Audit trail of the changes made to tasks and commands in the Task Manager."""
+    _instance = None  # Class-level variable to store the single instance
+    file_path = "Logs/task_auditlog.json"
+
+    def __new__(cls, *args, **kwargs):
+        """Override __new__ to ensure only one instance of AuditLog exists."""
+        if not cls._instance:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self.logger = Logger()
+            self.lock = threading.Lock()
+            self.database = Database() if Database.enabled() else None
+            # The JSON file is read lazily, the SQLite store is queried directly
+            self.entries = None
+            self._initialized = True
+
+    def load_entries(self):
+        """Load the audit entries from the JSON file."""
+        if os.path.exists(self.file_path):
+            with open(self.file_path, "r") as log_file:
+                try:
+                    entries = json.load(log_file)
+                    if isinstance(entries, list):
+                        return entries
+                    self.logger.error(f"{self.file_path} does not contain a list of entries.")
+                except json.JSONDecodeError as e:
+                    self.logger.error(f"Failed to decode {self.file_path}: {e}")
+        return []
+
+    def add(self, action, task_name, old_value="", new_value=""):
+        """Record a change made to a task or command."""
+        entry = {
+            "timestamp": datetime.datetime.now().isoformat(),
+            "action": action,
+            "task_name": task_name,
+            "old_value": old_value,
+            "new_value": new_value
+        }
+
+        if self.database is not None:
+            self.database.add_audit_entry(entry)
+            return
+
+        with self.lock:
+            if self.entries is None:
+                self.entries = self.load_entries()
+            self.entries.append(entry)
+            os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+            with open(self.file_path, "w") as log_file:
+                json.dump(self.entries, log_file, indent=4)
+
+    def get_entries(self, task_name=None, since=None, until=None):
+        """Return the audit entries, oldest first, optionally filtered by task name and ISO timestamps."""
+        if self.database is not None:
+            return self.database.get_audit_entries(task_name=task_name, since=since, until=until)
+
+        with self.lock:
+            if self.entries is None:
+                self.entries = self.load_entries()
+            entries = list(self.entries)
+
+        return [
+            entry for entry in entries
+            if isinstance(entry, dict)
+            and (task_name is None or entry.get("task_name") == task_name)
+            and (since is None or entry.get("timestamp", "") >= since)
+            and (until is None or entry.get("timestamp", "") <= until)
+        ]
@@ -0,0 +1,127 @@
+import os
+import re
+import shlex
+import threading
+
+# Characters that only mean something to a shell outside of quotes: pipes, redirections,
+# command lists, variables, globs and subshells. A command using any of them is run by the shell.
+SHELL_SYNTAX = re.compile(r"[|&;<>()$`*?\[\]{}~!\n]" if os.name != "nt" else r"[|&<>^\n]")
+# Quoted text the shell passes on as it is: single quotes, and double quotes without $ or `
+# (cmd.exe expands %VAR% even inside quotes, so that is checked on the whole command)
+QUOTED_TEXT = re.compile(r"'[^']*'|\"(?:[^\"\\$`]|\\.)*\"" if os.name != "nt" else r'"[^"]*"')
+# Commands built into the shell, they have no executable to start
+SHELL_BUILTINS = {"cd", "export", "source", ".", "set", "unset", "alias", "ulimit", "umask", "exit", "exec",
+                  "eval", "trap", "wait"} if os.name != "nt" else \
+    {"cd", "chdir", "copy", "del", "dir", "echo", "erase", "md", "mkdir", "move", "rd", "ren", "rename", "rmdir",
+     "set", "start", "type", "ver", "vol", "mklink", "call", "exit"}
+
+
+class CommandRenderer:
+    """Renders command dicts into command lines, memoised per command id.
+
+    Every cache entry remembers the dict it was rendered from, so a command that was
+    replaced by an edited copy with the same id is rendered again on its next use.
+    """
+    _instance = None  # Class-level variable to store the single instance
+
+    def __new__(cls, *args, **kwargs):
+        """Override __new__ to ensure only one instance of CommandRenderer exists."""
+        if not cls._instance:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self.lock = threading.Lock()
+            self._cache = {}  # Command id -> (command dict, rendered command, argv, needs a shell)
+            self._initialized = True
+
+    def render(self, command_dict):
+        """Return the command line of a command dict."""
+        return self._lookup(command_dict)[1]
+
+    def argv(self, command_dict):
+        """Return the arguments of a command dict, for starting it without a shell."""
+        return list(self._lookup(command_dict)[2])
+
+    def needs_shell(self, command_dict):
+        """Tell whether a command uses shell syntax or a shell builtin and cannot be started directly."""
+        return self._lookup(command_dict)[3]
+
+    def invalidate(self, command_id):
+        """Forget the rendering of a command that was edited or deleted."""
+        with self.lock:
+            self._cache.pop(command_id, None)
+
+    def clear(self):
+        """Forget every rendered command."""
+        with self.lock:
+            self._cache.clear()
+
+    def _lookup(self, command_dict):
+        command_id = command_dict.get("id")
+        with self.lock:
+            entry = self._cache.get(command_id)
+        if entry is not None and entry[0] is command_dict:
+            return entry
+
+        command = self.build_command(command_dict)
+        argv = self.build_argv(command_dict)
+        needs_shell = not argv or self.uses_shell_syntax(command) or argv[0].lower() in SHELL_BUILTINS
+        entry = (command_dict, command, tuple(argv), needs_shell)
+        if command_id:
+            # Commands without an id (e.g. the values of an edit dialog) are not cached
+            with self.lock:
+                self._cache[command_id] = entry
+        return entry
+
+    @staticmethod
+    def build_command(command_dict):
+        """Generate a command string from its dictionary parts."""
+        prefix = command_dict.get("prefix", "").strip()
+        path = command_dict.get("path", "").strip()
+        executable = command_dict.get("executable", "").strip()
+        arguments = command_dict.get("arguments", "").strip()
+
+        # Construct the full command
+        if path:
+            command = f"{prefix} {os.path.join(path, executable)} {arguments}".strip()
+        else:
+            command = f"{prefix} {executable} {arguments}".strip()
+        return command
+
+    @classmethod
+    def build_argv(cls, command_dict):
+        """Generate the arguments of a command from its dictionary parts.
+
+        The executable stays one argument even when its path contains spaces, the prefix and
+        the arguments are split following the quoting rules of the platform.
+        """
+        path = command_dict.get("path", "").strip()
+        executable = command_dict.get("executable", "").strip()
+        if path:
+            executable_argv = [os.path.join(path, executable)]
+        else:
+            executable_argv = cls.split_command(executable)
+        return (cls.split_command(command_dict.get("prefix", "").strip()) + executable_argv +
+                cls.split_command(command_dict.get("arguments", "").strip()))
+
+    @staticmethod
+    def uses_shell_syntax(command):
+        if os.name == "nt" and "%" in command:
+            return True
+        return bool(SHELL_SYNTAX.search(QUOTED_TEXT.sub("", command)))
+
+    @staticmethod
+    def split_command(command):
+        """Split a command line into arguments, following the quoting rules of the platform."""
+        try:
+            if os.name == "nt":
+                # Windows keeps backslashes in paths, only the surrounding quotes are removed
+                return [part[1:-1] if len(part) > 1 and part[0] == part[-1] == '"' else part
+                        for part in shlex.split(command, posix=False)]
+            return shlex.split(command)
+        except ValueError:
+            # Unbalanced quotes, fall back to splitting on whitespace
+            return command.split()
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+
+
+class CronExpression:
+    """Five field cron expression: minute, hour, day of month, month and day of week.
+
+    Fields accept *, numbers, ranges (1-5), lists (1,15) and steps (*/10, 8-18/2).
+    Days of week go from 0 (Sunday) to 6, 7 is accepted for Sunday as well. When both
+    the day of month and the day of week are restricted, a day matching either fires.
+    """
+
+    ALIASES = {
+        "@hourly": "0 * * * *",
+        "@daily": "0 0 * * *",
+        "@weekly": "0 0 * * 0",
+        "@monthly": "0 0 1 * *",
+        "@yearly": "0 0 1 1 *",
+    }
+    FIELDS = [("minute", 0, 59), ("hour", 0, 23), ("day of month", 1, 31), ("month", 1, 12), ("day of week", 0, 7)]
+    search_years = 5  # An expression that does not fire within this many years never fires (e.g. 30 February)
+
+    def __init__(self, expression):
+        self.expression = expression.strip()
+        parts = self.ALIASES.get(self.expression.lower(), self.expression).split()
+        if len(parts) != 5:
+            raise ValueError(f"A cron expression needs 5 fields, got '{expression}'")
+
+        fields = [self.parse_field(part, *field) for part, field in zip(parts, self.FIELDS)]
+        self.minutes, self.hours, self.days, self.months, self.weekdays = fields
+        self.weekdays = {day % 7 for day in self.weekdays}  # 7 is Sunday as well
+        self.any_day = parts[2] == "*"
+        self.any_weekday = parts[4] == "*"
+
+    @staticmethod
+    def parse_field(text, name, low, high):
+        """Return the set of values matched by one field."""
+        values = set()
+        for item in text.split(","):
+            value_range, _, step = item.partition("/")
+            try:
+                step = int(step) if step else 1
+                if value_range == "*":
+                    start, end = low, high
+                elif "-" in value_range:
+                    start, end = map(int, value_range.split("-", 1))
+                else:
+                    start = int(value_range)
+                    end = high if step > 1 else start  # "5/15" means from 5 to the end, every 15
+            except ValueError:
+                raise ValueError(f"Invalid {name} field '{text}'") from None
+
+            if step < 1 or start < low or end > high or start > end:
+                raise ValueError(f"Invalid {name} field '{text}', values go from {low} to {high}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def matches_day(self, moment):
+        day_matches = moment.day in self.days
+        weekday_matches = moment.isoweekday() % 7 in self.weekdays
+        if self.any_day and self.any_weekday:
+            return True
+        if self.any_day:
+            return weekday_matches
+        if self.any_weekday:
+            return day_matches
+        return day_matches or weekday_matches
+
+    def next_after(self, moment):
+        """Return the first datetime after moment (local time, minute precision) matching the expression."""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        last_year = candidate.year + self.search_years
+
+        # Skip whole months, days and hours that cannot match instead of testing every minute
+        while candidate.year <= last_year:
+            if candidate.month not in self.months:
+                year, month = divmod(candidate.month, 12)
+                candidate = datetime(candidate.year + year, month + 1, 1)
+            elif not self.matches_day(candidate):
+                candidate = datetime(candidate.year, candidate.month, candidate.day) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            else:
+                minute = min((m for m in self.minutes if m >= candidate.minute), default=None)
+                if minute is not None:
+                    return candidate.replace(minute=minute)
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+        raise ValueError(f"The cron expression '{self.expression}' never fires")
@@ -0,0 +1,316 @@
+import json
+import os
+import sqlite3
+import threading
+from Logging import Logger
+from SharedObjects.TaskJournal import TaskJournal
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS commands (
+    id INTEGER PRIMARY KEY,
+    task_id INTEGER NOT NULL REFERENCES tasks(id) ON DELETE CASCADE,
+    ordinal INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_commands_task ON commands(task_id, ordinal);
+CREATE INDEX IF NOT EXISTS idx_commands_data ON commands(task_id, data);
+CREATE INDEX IF NOT EXISTS idx_commands_uid ON commands(json_extract(data, '$.id'));
+
+CREATE TABLE IF NOT EXISTS healthchecks (
+    name TEXT PRIMARY KEY,
+    config TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS audit_log (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    action TEXT NOT NULL,
+    task_name TEXT NOT NULL,
+    old_value TEXT NOT NULL DEFAULT '',
+    new_value TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_audit_log_timestamp ON audit_log(timestamp);
+CREATE INDEX IF NOT EXISTS idx_audit_log_task ON audit_log(task_name, timestamp);
+"""
+
+
+def encode(value):
+    """Encode a value for storage; keys are sorted so equal dicts give equal strings."""
+    return json.dumps(value, sort_keys=True)
+
+
+class Database:
+    """SQLite store shared by Tasks, HealthCheck, Settings and the audit log.
+
+    The database is used instead of the JSON files once it exists, which is the case
+    after migrate() has been run once.
+    """
+    _instance = None  # Class-level variable to store the single instance
+    file_path = "config/taskmanager.db"
+
+    def __new__(cls, *args, **kwargs):
+        """Override __new__ to ensure only one instance of Database exists."""
+        if not cls._instance:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self.logger = Logger()
+            self.lock = threading.RLock()
+            os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+            # The connection is shared by the UI and worker threads, access goes through self.lock
+            self.connection = sqlite3.connect(self.file_path, check_same_thread=False, isolation_level=None)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.execute("PRAGMA foreign_keys=ON")
+            self.connection.executescript(SCHEMA)
+            self._initialized = True
+
+    @classmethod
+    def enabled(cls):
+        """Return True if the SQLite store should be used instead of the JSON files."""
+        return os.path.exists(cls.file_path)
+
+    def execute(self, query, parameters=()):
+        """Execute a single statement and return all resulting rows."""
+        with self.lock:
+            return self.connection.execute(query, parameters).fetchall()
+
+    def transaction(self, statements):
+        """Execute a list of (query, parameters) pairs atomically."""
+        with self.lock:
+            self.connection.execute("BEGIN")
+            try:
+                for query, parameters in statements:
+                    self.connection.execute(query, parameters)
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+            self.connection.execute("COMMIT")
+
+    # Tasks
+
+    def load_tasks(self):
+        """Return every task with its commands, in the format of tasks.json."""
+        with self.lock:
+            tasks = {}
+            for task_id, name in self.connection.execute("SELECT id, name FROM tasks ORDER BY id"):
+                tasks[task_id] = {"name": name, "commands": []}
+            for task_id, data in self.connection.execute("SELECT task_id, data FROM commands ORDER BY task_id, ordinal"):
+                tasks[task_id]["commands"].append(json.loads(data))
+        return list(tasks.values())
+
+    def task_statements(self, operation, **details):
+        """Translate a Tasks mutation into the statements that apply it."""
+        task_id = "(SELECT id FROM tasks WHERE name = ?)"
+        next_ordinal = f"(SELECT COALESCE(MAX(ordinal), 0) + 1 FROM commands WHERE task_id = {task_id})"
+
+        if operation == "add_task":
+            return [("INSERT OR IGNORE INTO tasks (name) VALUES (?)", (details["name"],))]
+
+        if operation == "rename_task":
+            return [("UPDATE tasks SET name = ? WHERE name = ?", (details["new"], details["old"]))]
+
+        if operation == "delete_task":
+            return [("DELETE FROM tasks WHERE name = ?", (details["name"],))]
+
+        if operation == "add_command":
+            task = details["task"]
+            return [
+                ("INSERT OR IGNORE INTO tasks (name) VALUES (?)", (task,)),
+                (f"INSERT INTO commands (task_id, ordinal, data) VALUES ({task_id}, {next_ordinal}, ?)",
+                 (task, task, encode(details["command"]))),
+            ]
+
+        if operation == "set_commands":
+            task = details["task"]
+            statements = [
+                ("INSERT OR IGNORE INTO tasks (name) VALUES (?)", (task,)),
+                (f"DELETE FROM commands WHERE task_id = {task_id}", (task,)),
+            ]
+            for ordinal, command in enumerate(details["commands"], start=1):
+                statements.append((f"INSERT INTO commands (task_id, ordinal, data) VALUES ({task_id}, ?, ?)",
+                                   (task, ordinal, encode(command))))
+            return statements
+
+        if operation == "update_command":
+            if details["old"].get("id"):
+                return [("UPDATE commands SET data = ? WHERE json_extract(data, '$.id') = ?",
+                         (encode(details["new"]), details["old"]["id"]))]
+            return [(f"UPDATE commands SET data = ? WHERE task_id = {task_id} AND data = ?",
+                     (encode(details["new"]), details["task"], encode(details["old"])))]
+
+        if operation == "delete_command":
+            if details["command"].get("id"):
+                return [("DELETE FROM commands WHERE json_extract(data, '$.id') = ?", (details["command"]["id"],))]
+            return [(f"DELETE FROM commands WHERE id = (SELECT MIN(id) FROM commands WHERE task_id = {task_id} AND data = ?)",
+                     (details["task"], encode(details["command"])))]
+
+        raise ValueError(f"Unknown task operation: {operation}")
+
+    # Health checks
+
+    def load_healthchecks(self):
+        return {name: json.loads(config) for name, config in self.execute("SELECT name, config FROM healthchecks ORDER BY rowid")}
+
+    def save_healthcheck(self, name, config):
+        self.execute("INSERT OR REPLACE INTO healthchecks (name, config) VALUES (?, ?)", (name, encode(config)))
+
+    def delete_healthcheck(self, name):
+        self.execute("DELETE FROM healthchecks WHERE name = ?", (name,))
+
+    # Settings
+
+    def load_settings(self):
+        return {key: json.loads(value) for key, value in self.execute("SELECT key, value FROM settings")}
+
+    def save_setting(self, key, value):
+        self.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, encode(value)))
+
+    def delete_setting(self, key):
+        self.execute("DELETE FROM settings WHERE key = ?", (key,))
+
+    # Audit log
+
+    def add_audit_entry(self, entry):
+        self.execute(
+            "INSERT INTO audit_log (timestamp, action, task_name, old_value, new_value) VALUES (?, ?, ?, ?, ?)",
+            (entry["timestamp"], entry["action"], entry["task_name"], entry.get("old_value", ""), entry.get("new_value", ""))
+        )
+
+    def get_audit_entries(self, task_name=None, since=None, until=None):
+        """Return audit entries, oldest first, optionally filtered through the indexes."""
+        conditions, parameters = [], []
+        if task_name is not None:
+            conditions.append("task_name = ?")
+            parameters.append(task_name)
+        if since is not None:
+            conditions.append("timestamp >= ?")
+            parameters.append(since)
+        if until is not None:
+            conditions.append("timestamp <= ?")
+            parameters.append(until)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self.execute(
+            f"SELECT timestamp, action, task_name, old_value, new_value FROM audit_log {where} ORDER BY timestamp, id",
+            parameters
+        )
+        return [
+            {"timestamp": row[0], "action": row[1], "task_name": row[2], "old_value": row[3], "new_value": row[4]}
+            for row in rows
+        ]
+
+    # Migration
+
+    def migrate(self, tasks, healthchecks, settings, audit_entries):
+        """Copy the content of the JSON files into the database in a single transaction."""
+        statements = [
+            ("DELETE FROM tasks", ()),
+            ("DELETE FROM healthchecks", ()),
+            ("DELETE FROM settings", ()),
+            ("DELETE FROM audit_log", ()),
+        ]
+        for task in tasks:
+            statements.extend(self.task_statements("set_commands", task=task["name"], commands=task["commands"]))
+        for name, config in healthchecks.items():
+            statements.append(("INSERT INTO healthchecks (name, config) VALUES (?, ?)", (name, encode(config))))
+        for key, value in settings.items():
+            statements.append(("INSERT INTO settings (key, value) VALUES (?, ?)", (key, encode(value))))
+        for entry in audit_entries:
+            statements.append((
+                "INSERT INTO audit_log (timestamp, action, task_name, old_value, new_value) VALUES (?, ?, ?, ?, ?)",
+                (entry["timestamp"], entry["action"], entry["task_name"], entry.get("old_value", ""), entry.get("new_value", ""))
+            ))
+
+        self.transaction(statements)
+        self.logger.info(
+            f"Migrated {len(tasks)} tasks, {len(healthchecks)} health checks, {len(settings)} settings "
+            f"and {len(audit_entries)} audit entries to {self.file_path}"
+        )
+
+
+def read_json_file(file_path, default):
+    """Read a JSON file, returning default if it is missing or invalid."""
+    if os.path.exists(file_path):
+        try:
+            with open(file_path, "r") as file:
+                return json.load(file)
+        except json.JSONDecodeError:
+            Logger().error(f"{file_path} is not in a valid format and was not migrated.")
+    return default
+
+
+def migrate_json_files(tasks_path="config/tasks.json", healthcheck_path="config/healthcheck.json",
+                       settings_path="config/settings.json", audit_path="Logs/task_auditlog.json"):
+    """One-shot migration of the JSON configuration files into a new SQLite database."""
+    if TaskJournal.exists(tasks_path):
+        # Journal mode may hold changes that are not part of tasks.json yet
+        tasks = TaskJournal(tasks_path, None, threading.RLock()).load()
+    else:
+        tasks = read_json_file(tasks_path, {}).get("tasks", [])
+
+    audit_entries = read_json_file(audit_path, [])
+    audit_entries = [
+        entry for entry in audit_entries
+        if isinstance(entry, dict) and all(k in entry for k in ["timestamp", "action", "task_name"])
+    ]
+
+    database = Database()
+    try:
+        database.migrate(
+            tasks=tasks,
+            healthchecks=read_json_file(healthcheck_path, {}),
+            settings=read_json_file(settings_path, {}),
+            audit_entries=audit_entries,
+        )
+    except Exception:
+        # Do not leave a half-filled database behind, it would be picked up on the next start
+        database.connection.close()
+        Database._instance = None
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(database.file_path + suffix):
+                os.remove(database.file_path + suffix)
+        raise
+
+
+class SQLiteTaskStore:
+    """Tasks storage backend that applies every mutation as targeted SQL statements."""
+
+    def __init__(self):
+        self.database = Database()
+        self._pending = []
+
+    def load(self):
+        return self.database.load_tasks()
+
+    def open(self):
+        pass
+
+    def append(self, operation, **details):
+        """Queue a mutation; queued mutations are committed together by flush()."""
+        with self.database.lock:
+            self._pending.extend(self.database.task_statements(operation, **details))
+
+    def flush(self):
+        """Commit the queued mutations in one transaction, they stay queued if it fails."""
+        with self.database.lock:
+            statements, self._pending = self._pending, []
+            if statements:
+                try:
+                    self.database.transaction(statements)
+                except Exception:
+                    # Ahead of anything queued meanwhile, the mutations are replayed in their order
+                    self._pending[:0] = statements
+                    raise
@@ -0,0 +1,35 @@
+import os
+import stat
+import tempfile
+
+# Read once, setting the umask to read it is not safe while other threads create files
+_umask = os.umask(0)
+os.umask(_umask)
+
+
+def atomic_write(file_path, data):
+    """Write data to file_path through a temporary file so readers never see a partial file.
+
+    The file keeps its permissions, a new one gets those of open(), mkstemp creates the
+    temporary file readable by its owner only.
+    """
+    directory = os.path.dirname(file_path) or "."
+    os.makedirs(directory, exist_ok=True)
+
+    base_name = os.path.basename(file_path)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{base_name}_", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        try:
+            mode = stat.S_IMODE(os.stat(file_path).st_mode)
+        except FileNotFoundError:
+            mode = 0o666 & ~_umask
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
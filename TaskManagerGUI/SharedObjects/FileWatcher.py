@@ -0,0 +1,185 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import sys
+import threading
+import time
+from Logging import Logger
+
+# inotify event masks, see <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = os.O_NONBLOCK
+
+
+def file_signature(file_path):
+    """Return what identifies the current version of a file, or None if it does not exist."""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+def diff_dicts(old, new):
+    """Return the keys that were added, changed and removed between two dicts."""
+    return {
+        "added": [key for key in new if key not in old],
+        "changed": [key for key in new if key in old and new[key] != old[key]],
+        "removed": [key for key in old if key not in new],
+    }
+
+
+class Inotify:
+    """Minimal ctypes binding of inotify, used to wake a watcher as soon as a directory or a file changes."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(IN_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.directories = set()
+
+    @classmethod
+    def create(cls):
+        """Return an Inotify instance, or None where inotify is not available."""
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            return cls()
+        except (OSError, AttributeError):
+            return None
+
+    def add_directory(self, directory):
+        if directory in self.directories:
+            return
+        self.add_watch(directory, IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE)
+        self.directories.add(directory)
+
+    def add_watch(self, path, mask):
+        """Wake wait() on the events of mask for a directory or a file."""
+        if self._add_watch(self.fd, os.fsencode(path), mask) < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+
+    def wait(self, timeout):
+        """Block until a watched directory changes or timeout expires, returns True on a change."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return False
+        # The events themselves are not needed, every watched file is checked anyway
+        try:
+            while os.read(self.fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FileWatcher:
+    """Detects external changes to configuration files and reloads them off the UI thread.
+
+    Files are polled every poll_interval seconds, which also catches changes made on
+    network shares. On Linux inotify additionally wakes the watcher right after a local
+    change. A change is handed to the reload callback of the file; when that returns a
+    diff (see diff_dicts) the subscribers of the file are notified with it.
+    """
+    _instance = None  # Class-level variable to store the single instance
+    poll_interval = 2.0  # Seconds between two checks when nothing wakes the watcher
+    settle_delay = 0.2  # Seconds to wait after a wake up so a writer can finish
+
+    def __new__(cls, *args, **kwargs):
+        """Override __new__ to ensure only one instance of FileWatcher exists."""
+        if not cls._instance:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self.logger = Logger()
+            self.lock = threading.Lock()
+            self._watches = {}  # Absolute path -> [reload callback, last known signature]
+            self._subscribers = {}  # Absolute path -> callbacks receiving the diff
+            self._inotify = Inotify.create()
+            self._thread = None
+            self._initialized = True
+
+    def watch(self, file_path, reload):
+        """Call reload() whenever file_path is changed by someone else."""
+        path = os.path.abspath(file_path)
+        with self.lock:
+            self._watches[path] = [reload, file_signature(path)]
+            if self._inotify is not None:
+                try:
+                    directory = os.path.dirname(path)
+                    os.makedirs(directory, exist_ok=True)
+                    self._inotify.add_directory(directory)
+                except OSError as e:
+                    self.logger.warning(f"Falling back to polling for {file_path}: {e}")
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._watch_loop, daemon=True)
+                self._thread.start()
+
+    def subscribe(self, file_path, callback):
+        """Call callback(changes) after an external change of file_path was applied."""
+        with self.lock:
+            self._subscribers.setdefault(os.path.abspath(file_path), []).append(callback)
+
+    def unsubscribe(self, file_path, callback):
+        with self.lock:
+            callbacks = self._subscribers.get(os.path.abspath(file_path), [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def acknowledge(self, file_path):
+        """Record a write made by this application so it is not reported as an external change."""
+        path = os.path.abspath(file_path)
+        with self.lock:
+            if path in self._watches:
+                self._watches[path][1] = file_signature(path)
+
+    def check(self):
+        """Reload every watched file that changed since it was last seen."""
+        with self.lock:
+            changed = []
+            for path, watch in self._watches.items():
+                signature = file_signature(path)
+                if signature != watch[1]:
+                    watch[1] = signature
+                    changed.append((path, watch[0]))
+
+        for path, reload in changed:
+            try:
+                changes = reload()
+            except Exception as e:
+                self.logger.error(f"Failed to reload {path}: {e}")
+                continue
+
+            if changes and any(changes.values()):
+                self.logger.info(f"Reloaded {path} after an external change")
+                with self.lock:
+                    callbacks = list(self._subscribers.get(path, []))
+                for callback in callbacks:
+                    try:
+                        callback(changes)
+                    except Exception as e:
+                        self.logger.error(f"Failed to notify a subscriber of {path}: {e}")
+
+    def _watch_loop(self):
+        while True:
+            if self._inotify is not None and self._inotify.wait(self.poll_interval):
+                time.sleep(self.settle_delay)
+            elif self._inotify is None:
+                time.sleep(self.poll_interval)
+            self.check()
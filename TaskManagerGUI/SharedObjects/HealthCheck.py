@@ -2,27 +2,39 @@ import os
 import json
 from tkinter import messagebox
 from Logging import Logger
+from SharedObjects.Database import Database
+from SharedObjects.FileUtils import atomic_write
+from SharedObjects.FileWatcher import FileWatcher, diff_dicts
 
 
 def save_healthcheck_dict(healthcheck_dict, filepath='config/healthcheck.json'):
     """Save the healthcheck options back to the JSON file."""
-    with open(filepath, "w") as file:
-        json.dump(healthcheck_dict, file, indent=4)
+    atomic_write(filepath, json.dumps(healthcheck_dict, indent=4))
+    FileWatcher().acknowledge(filepath)
 
 
 class HealthCheck:
     _instance = None  # Class-level variable to store the single instance
+    file_path = 'config/healthcheck.json'
 
     def __new__(cls, *args, **kwargs):
         """Override __new__ to ensure only one instance of HealthCheck exists."""
         if not cls._instance:
             cls._instance = super().__new__(cls)
+            cls._instance._initialized = False  # Add a flag to track initialization
         return cls._instance
 
     def __init__(self):
-        self.healthcheck_dict = self.load_healthcheck_dict()
-        # Initialize the logger
-        self.logger = Logger()
+        # Loading again would hide the changes read from the file from the watcher and its subscribers
+        if not self._initialized:
+            # Initialize the logger
+            self.logger = Logger()
+            self.database = Database() if Database.enabled() else None
+            self.healthcheck_dict = self.load_healthcheck_dict()
+            if self.database is None:
+                # Pick up changes made to healthcheck.json by other users of a shared config
+                FileWatcher().watch(self.file_path, self.reload)
+            self._initialized = True
 
 
     def get_config(self, key, default=None):
@@ -40,7 +52,7 @@ class HealthCheck:
             messagebox.showinfo("Duplicate Key", f"Option '{key}' already exists.")
         else:
             self.healthcheck_dict[key] = config
-            save_healthcheck_dict(self.healthcheck_dict)
+            self.save_option(key)
 
     def edit_option(self, key, new_config):
         """Edit an existing health check option."""
@@ -51,7 +63,7 @@ class HealthCheck:
 
         # Update the option
         self.healthcheck_dict[key] = new_config
-        save_healthcheck_dict(self.healthcheck_dict)
+        self.save_option(key)
 
     def delete_option(self, key):
         """Delete an existing health check option."""
@@ -60,9 +72,41 @@ class HealthCheck:
             messagebox.showinfo("Option Not Found", f"No option found for '{key}'.")
             return
         del self.healthcheck_dict[key]
-        save_healthcheck_dict(self.healthcheck_dict)
+        if self.database is not None:
+            self.database.delete_healthcheck(key)
+        else:
+            save_healthcheck_dict(self.healthcheck_dict)
+
+    def save_option(self, key):
+        """Persist a single option, the SQLite store only writes that row."""
+        if self.database is not None:
+            self.database.save_healthcheck(key, self.healthcheck_dict[key])
+        else:
+            save_healthcheck_dict(self.healthcheck_dict)
+
+    def reload(self):
+        """Apply the changes made to healthcheck.json by someone else, returns the changed options."""
+        if self.database is not None or not os.path.exists(self.file_path):
+            return None
+
+        try:
+            with open(self.file_path, "r") as file:
+                new_dict = json.load(file)
+        except (OSError, json.JSONDecodeError) as e:
+            self.logger.warning(f"Ignoring the change of {self.file_path}: {e}")
+            return None
+
+        changes = diff_dicts(self.healthcheck_dict, new_dict)
+        for key in changes["removed"]:
+            del self.healthcheck_dict[key]
+        for key in changes["added"] + changes["changed"]:
+            self.healthcheck_dict[key] = new_dict[key]
+        return changes
 
     def load_healthcheck_dict(self, filepath='config/healthcheck.json'):
+        if self.database is not None:
+            return self.database.load_healthchecks()
+
         healthcheck_dict = {}
         if os.path.exists(filepath):
             with open(filepath, "r") as file:
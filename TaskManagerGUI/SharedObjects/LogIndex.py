@@ -0,0 +1,272 @@
+import locale
+import os
+import sqlite3
+import threading
+from Logging import Logger
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    log_file TEXT NOT NULL UNIQUE,
+    indexed_bytes INTEGER NOT NULL,
+    line_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS lines (
+    id INTEGER PRIMARY KEY,  -- rowid of the line in line_text
+    file_id INTEGER NOT NULL,
+    line INTEGER NOT NULL,
+    offset INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_lines_file ON lines(file_id);
+-- Contentless: the text stays in the logs, a hit is read back from its offset
+CREATE VIRTUAL TABLE IF NOT EXISTS line_text USING fts5(text, content='');
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class LogIndex:
+    """Full text index of the lines of the execution logs, kept in Logs/log_index.db.
+
+    A background thread tokenises what was appended to the logs since its last pass into
+    an SQLite FTS5 table, one row per line, so finding the runs that printed a message
+    does not read the logs. Lines of removed logs stay in the FTS table (a contentless
+    table cannot delete them) but no longer join to a file; once they outnumber the live
+    lines the index is rebuilt.
+    """
+    _instance = None  # Class-level variable to store the single instance
+    file_path = "Logs/log_index.db"
+    log_dir = "Execution_Logs"
+    chunk_size = 4 * 1024 * 1024  # Bytes of a log read at once
+
+    def __new__(cls, *args, **kwargs):
+        """Override __new__ to ensure only one instance of LogIndex exists."""
+        if not cls._instance:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self.logger = Logger()
+            self.lock = threading.Lock()
+            self.encoding = locale.getpreferredencoding(False)  # The logs are written in the locale encoding
+            os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+            # Shared by the indexer thread and the searches, access goes through self.lock
+            self.connection = sqlite3.connect(self.file_path, check_same_thread=False, isolation_level=None)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.executescript(SCHEMA)
+            self.update_requested = threading.Event()
+            self.listeners = []  # Called without arguments after every pass that indexed something
+            self._thread = None
+            self._initialized = True
+
+    def subscribe(self, callback):
+        self.listeners.append(callback)
+
+    def request_update(self):
+        """Index the logs written since the last pass, in the indexer thread."""
+        self.update_requested.set()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._index_loop, daemon=True)
+            self._thread.start()
+
+    def _index_loop(self):
+        while True:
+            self.update_requested.wait()
+            self.update_requested.clear()
+            try:
+                changed = self.update()
+            except (OSError, sqlite3.Error) as e:
+                self.logger.error(f"Failed to index the execution logs: {e}")
+                continue
+            if changed:
+                for callback in list(self.listeners):
+                    try:
+                        callback()
+                    except Exception as e:
+                        self.logger.error(f"Failed to notify a listener of the log index: {e}")
+
+    def update(self):
+        """Index the new logs and the lines appended to the known ones, forget the removed logs.
+
+        Returns whether anything changed.
+        """
+        with self.lock:
+            files = {row[1]: row for row in
+                     self.connection.execute("SELECT id, log_file, indexed_bytes, line_count FROM files")}
+        if self._orphaned_lines() > max(1000, self._live_lines()):
+            self.rebuild()
+            files = {}
+
+        sizes = {}
+        if os.path.isdir(self.log_dir):
+            with os.scandir(self.log_dir) as entries:
+                for entry in entries:
+                    try:
+                        if entry.name.endswith(".log") and entry.is_file():
+                            sizes[f"{self.log_dir}/{entry.name}"] = entry.stat().st_size
+                    except OSError:
+                        continue
+
+        changed = False
+        for log_file in files.keys() - sizes.keys():
+            self._remove(files.pop(log_file))
+            changed = True
+        for log_file, size in sizes.items():
+            known = files.get(log_file)
+            if known is not None and size < known[2]:
+                # Rewritten from the start, index it again
+                self._remove(known)
+                known = None
+            if known is None or size > known[2]:
+                changed |= self._index_file(log_file, known)
+        return changed
+
+    def _index_file(self, log_file, known):
+        """Index the complete lines of a log after the part indexed before, one transaction per chunk."""
+        file_id, offset, line = (known[0], known[2], known[3]) if known else (None, 0, 0)
+        indexed = False
+        try:
+            with open(log_file, "rb") as file:
+                file.seek(offset)
+                while True:
+                    data = file.read(self.chunk_size)
+                    end = data.rfind(b"\n") + 1
+                    if not end:
+                        # A partial last line is indexed once it is complete, or once the chunk is full
+                        if len(data) < self.chunk_size:
+                            break
+                        end = len(data)
+                    rows = []
+                    for raw_line in data[:end].splitlines(keepends=True):
+                        rows.append((line, offset, raw_line.decode(self.encoding, errors="replace")))
+                        line += 1
+                        offset += len(raw_line)
+                    file_id = self._store(log_file, file_id, rows, offset, line)
+                    indexed = True
+                    if len(data) < self.chunk_size:
+                        break
+                    file.seek(offset)
+        except OSError as e:
+            self.logger.warning(f"Failed to index {log_file}: {e}")
+        return indexed
+
+    def _store(self, log_file, file_id, rows, indexed_bytes, line_count):
+        """Add (line, offset, text) rows of a log to the index, returns the id of the log."""
+        with self.lock:
+            self.connection.execute("BEGIN")
+            try:
+                if file_id is None:
+                    file_id = self.connection.execute("INSERT INTO files (log_file, indexed_bytes, line_count) "
+                                                      "VALUES (?, 0, 0)", (log_file,)).lastrowid
+                # Never reuse the rowid of an orphaned line, its tokens are still in line_text
+                first_id = self._meta("next_line_id", 1)
+                self.connection.executemany("INSERT INTO lines (id, file_id, line, offset) VALUES (?, ?, ?, ?)",
+                                            ((first_id + i, file_id, row[0], row[1]) for i, row in enumerate(rows)))
+                self.connection.executemany("INSERT INTO line_text (rowid, text) VALUES (?, ?)",
+                                            ((first_id + i, row[2]) for i, row in enumerate(rows)))
+                self.connection.execute("UPDATE files SET indexed_bytes = ?, line_count = ? WHERE id = ?",
+                                        (indexed_bytes, line_count, file_id))
+                self._set_meta("next_line_id", first_id + len(rows))
+                self.connection.execute("COMMIT")
+            except sqlite3.Error:
+                self.connection.execute("ROLLBACK")
+                raise
+        return file_id
+
+    def _remove(self, file_row):
+        """Forget a log, its lines are left in the FTS table until the next rebuild."""
+        with self.lock:
+            self.connection.execute("BEGIN")
+            try:
+                self.connection.execute("DELETE FROM lines WHERE file_id = ?", (file_row[0],))
+                self.connection.execute("DELETE FROM files WHERE id = ?", (file_row[0],))
+                self._set_meta("orphaned_lines", self._meta("orphaned_lines", 0) + file_row[3])
+                self.connection.execute("COMMIT")
+            except sqlite3.Error:
+                self.connection.execute("ROLLBACK")
+                raise
+
+    def rebuild(self):
+        """Drop the whole index, the next pass indexes every log again."""
+        with self.lock:
+            self.connection.execute("BEGIN")
+            try:
+                self.connection.execute("INSERT INTO line_text (line_text) VALUES ('delete-all')")
+                self.connection.execute("DELETE FROM lines")
+                self.connection.execute("DELETE FROM files")
+                self.connection.execute("DELETE FROM meta")
+                self.connection.execute("COMMIT")
+            except sqlite3.Error:
+                self.connection.execute("ROLLBACK")
+                raise
+        self.logger.info("The log index is rebuilt")
+
+    def _meta(self, key, default):
+        row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return int(row[0]) if row else default
+
+    def _set_meta(self, key, value):
+        self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def _orphaned_lines(self):
+        with self.lock:
+            return self._meta("orphaned_lines", 0)
+
+    def _live_lines(self):
+        with self.lock:
+            return self.connection.execute("SELECT COALESCE(SUM(line_count), 0) FROM files").fetchone()[0]
+
+    @staticmethod
+    def match_expression(query):
+        """Turn the words typed by the user into an FTS5 query: every word, as typed, on the same line.
+
+        Each word is a quoted phrase, so "ORA-00060" finds the tokens "ora" and "00060" next to each other.
+        """
+        return " ".join('"' + word.replace('"', '""') + '"' for word in query.split())
+
+    def search(self, query, limit=1000):
+        """Return the lines of the logs matching the query, as dicts with log_file, line (from 1) and text.
+
+        The logs indexed last, usually the newest, come first; the hits of a log in line order.
+        """
+        expression = self.match_expression(query)
+        if not expression:
+            return []
+        with self.lock:
+            # Walking the FTS rowids backwards needs no sort, lines are numbered in the order they were indexed
+            rows = self.connection.execute(
+                "SELECT files.id, files.log_file, lines.line, lines.offset FROM line_text "
+                "JOIN lines ON lines.id = line_text.rowid JOIN files ON files.id = lines.file_id "
+                "WHERE line_text MATCH ? ORDER BY line_text.rowid DESC LIMIT ?",
+                (expression, limit)
+            ).fetchall()
+        rows.sort(key=lambda row: (-row[0], row[2]))
+
+        hits = []
+        file, file_name = None, None
+        try:
+            for _, log_file, line, offset in rows:
+                if log_file != file_name:
+                    # The hits of a log are consecutive, each log is opened once
+                    if file is not None:
+                        file.close()
+                    file_name = log_file
+                    try:
+                        file = open(log_file, "rb")
+                    except OSError:
+                        file = None
+                text = ""
+                if file is not None:
+                    file.seek(offset)
+                    text = file.readline(1000).decode(self.encoding, errors="replace").rstrip("\r\n")
+                hits.append({"log_file": log_file, "line": line + 1, "text": text})
+        finally:
+            if file is not None:
+                file.close()
+        return hits
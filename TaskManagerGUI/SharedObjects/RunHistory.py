@@ -0,0 +1,262 @@
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from Logging import Logger
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    environment TEXT,
+    trigger TEXT NOT NULL,
+    schedule_id TEXT,
+    status TEXT NOT NULL,
+    started TEXT NOT NULL,
+    finished TEXT,
+    duration REAL,
+    returncode INTEGER,
+    log_file TEXT,
+    bytes INTEGER,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_started ON runs(started);
+CREATE INDEX IF NOT EXISTS idx_runs_name ON runs(name, started);
+CREATE INDEX IF NOT EXISTS idx_runs_status ON runs(status, started);
+CREATE INDEX IF NOT EXISTS idx_runs_log_file ON runs(log_file);
+
+-- Every log file of Execution_Logs as last scanned or written, see sync_log_dir
+CREATE TABLE IF NOT EXISTS log_files (
+    log_file TEXT PRIMARY KEY,
+    bytes INTEGER,
+    mtime REAL,
+    started TEXT
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+COLUMNS = ("id", "run_id", "kind", "name", "environment", "trigger", "schedule_id", "status", "started", "finished",
+           "duration", "returncode", "log_file", "bytes", "error")
+
+# Execution logs are named <name>_<YYYYMMDD>_<HHMMSS>[_<n>].log
+LOG_NAME_PATTERN = re.compile(r"^(?P<name>.*)_(?P<timestamp>\d{8}_\d{6})(?:_\d+)?\.log$")
+
+
+class RunHistory:
+    """Indexed record of every task and health check run, kept in Logs/run_history.db.
+
+    The Logs frame queries it by name, date range and status instead of listing and
+    stat-ing the execution logs. Timestamps are stored as local ISO strings, which
+    sort chronologically.
+
+    The log files are indexed as well, with the modification time of Execution_Logs
+    they were scanned at: logs added or removed by someone else are picked up by
+    sync_log_dir, which only lists the directory when that time changed.
+    """
+    _instance = None  # Class-level variable to store the single instance
+    file_path = "Logs/run_history.db"
+    log_dir = "Execution_Logs"
+
+    def __new__(cls, *args, **kwargs):
+        """Override __new__ to ensure only one instance of RunHistory exists."""
+        if not cls._instance:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self.logger = Logger()
+            self.lock = threading.Lock()
+            self.scan_lock = threading.Lock()  # One scan of Execution_Logs at a time
+            os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+            # The connection is shared by the UI, the scheduler and the run threads, access goes through self.lock
+            self.connection = sqlite3.connect(self.file_path, check_same_thread=False, isolation_level=None)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.executescript(SCHEMA)
+            self._initialized = True
+
+    def add(self, kind, name, status, started, finished=None, trigger="manual", log_file=None, error=None,
+            schedule_id=None, environment=None, run_id=None, returncode=None):
+        """Record a run, or a scheduled fire that was skipped.
+
+        started and finished are ISO timestamps; the size of the log is read once, here.
+        """
+        try:
+            stat = os.stat(log_file) if log_file else None
+        except OSError:
+            stat = None
+        size = stat.st_size if stat else None
+        try:
+            self.insert([self.make_row(kind, name, status, started, finished, trigger, log_file, size, error,
+                                       schedule_id, environment, run_id, returncode)],
+                        [(log_file, size, stat.st_mtime, started)] if stat else ())
+        except sqlite3.Error as e:
+            self.logger.error(f"Failed to record the run of {name}: {e}")
+
+    @staticmethod
+    def make_row(kind, name, status, started, finished=None, trigger="manual", log_file=None, size=None,
+                 error=None, schedule_id=None, environment=None, run_id=None, returncode=None):
+        duration = None
+        if finished is not None:
+            duration = (datetime.fromisoformat(finished) - datetime.fromisoformat(started)).total_seconds()
+        return (run_id, kind, name, environment, trigger, schedule_id, status, started, finished, duration,
+                returncode, log_file, size, error)
+
+    def insert(self, rows, log_files=()):
+        """Insert rows made by make_row and (log file, size, mtime, started) entries in one transaction.
+
+        A recorded run replaces the "unknown" run a scan added for its log while it was still running.
+        """
+        with self.lock:
+            self.connection.execute("BEGIN")
+            try:
+                self.connection.executemany("DELETE FROM runs WHERE log_file = ? AND status = 'unknown'",
+                                            [(row[11],) for row in rows if row[11] and row[6] != "unknown"])
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO log_files (log_file, bytes, mtime, started) VALUES (?, ?, ?, ?)", log_files
+                )
+                self.connection.executemany(
+                    "INSERT INTO runs (run_id, kind, name, environment, trigger, schedule_id, status, started, "
+                    "finished, duration, returncode, log_file, bytes, error) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+                )
+                self.connection.execute("COMMIT")
+            except sqlite3.Error:
+                self.connection.execute("ROLLBACK")
+                raise
+
+    def get_entries(self, search=None, name=None, kind=None, status=None, since=None, until=None, limit=None,
+                    log_files=None):
+        """Return the recorded runs, newest first.
+
+        search matches part of the name, name the whole name; since and until are dates, both included;
+        log_files limits the runs to those of the given logs.
+        """
+        conditions, parameters = [], []
+        if search:
+            conditions.append("name LIKE ? ESCAPE '\\'")
+            parameters.append("%" + re.sub(r"([\\%_])", r"\\\1", search) + "%")
+        if name is not None:
+            conditions.append("name = ?")
+            parameters.append(name)
+        if kind is not None:
+            conditions.append("kind = ?")
+            parameters.append(kind)
+        if status is not None:
+            conditions.append("status = ?")
+            parameters.append(status)
+        if since is not None:
+            conditions.append("started >= ?")
+            parameters.append(since.isoformat())
+        if until is not None:
+            conditions.append("started < ?")
+            parameters.append((until + timedelta(days=1)).isoformat())
+        if log_files is not None:
+            # Thousands of names would pass the limit of bound parameters of older SQLite builds (999)
+            conditions.append("log_file IN (SELECT log_file FROM temp.wanted_logs)")
+
+        query = f"SELECT {', '.join(COLUMNS)} FROM runs"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY started DESC, id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            parameters.append(limit)
+
+        with self.lock:
+            if log_files is not None:
+                self.connection.execute("CREATE TEMP TABLE IF NOT EXISTS wanted_logs (log_file TEXT PRIMARY KEY)")
+                self.connection.execute("DELETE FROM temp.wanted_logs")
+                self.connection.executemany("INSERT OR IGNORE INTO temp.wanted_logs (log_file) VALUES (?)",
+                                            ((log_file,) for log_file in log_files))
+            rows = self.connection.execute(query, parameters).fetchall()
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def get_statuses(self):
+        with self.lock:
+            return [row[0] for row in self.connection.execute("SELECT DISTINCT status FROM runs ORDER BY status")]
+
+    def forget_log(self, log_file):
+        """Drop the runs of a deleted log file."""
+        with self.lock:
+            self.connection.execute("DELETE FROM runs WHERE log_file = ?", (log_file,))
+            self.connection.execute("DELETE FROM log_files WHERE log_file = ?", (log_file,))
+
+    def sync_log_dir(self):
+        """Record the logs added to Execution_Logs by someone else and forget the removed ones.
+
+        Nothing is read when the modification time of the directory did not change since the
+        last scan; otherwise the directory is listed once and only the new files are stat-ed.
+        Runs on any thread, returns whether the directory was scanned.
+        """
+        with self.scan_lock:
+            try:
+                dir_mtime = str(os.stat(self.log_dir).st_mtime_ns)
+            except OSError:
+                return False
+            with self.lock:
+                row = self.connection.execute("SELECT value FROM meta WHERE key = 'log_dir_mtime'").fetchone()
+                if row and row[0] == dir_mtime:
+                    return False
+                known = {row[0] for row in self.connection.execute("SELECT log_file FROM log_files")}
+                recorded = {row[0] for row in
+                            self.connection.execute("SELECT DISTINCT log_file FROM runs WHERE log_file IS NOT NULL")}
+
+            seen, new_files, new_runs = set(), [], []
+            with os.scandir(self.log_dir) as entries:
+                for entry in entries:
+                    match = LOG_NAME_PATTERN.match(entry.name)
+                    if not match:
+                        continue
+                    log_file = f"{self.log_dir}/{entry.name}"
+                    seen.add(log_file)
+                    if log_file in known:
+                        continue  # Adding or removing a file changes the directory, writing to one does not
+                    try:
+                        if not entry.is_file():
+                            continue
+                        stat = entry.stat()  # Cached by the DirEntry on Windows
+                        started = datetime.strptime(match.group("timestamp"), "%Y%m%d_%H%M%S").isoformat()
+                    except (OSError, ValueError):
+                        continue
+                    new_files.append((log_file, stat.st_size, stat.st_mtime, started))
+                    if log_file not in recorded:
+                        # A log of a run that was never recorded, its outcome is unknown
+                        new_runs.append(self.make_row("task", match.group("name"), "unknown", started,
+                                                      log_file=log_file, size=stat.st_size))
+            removed = [(log_file,) for log_file in known - seen]
+
+            with self.lock:
+                self.connection.execute("BEGIN")
+                try:
+                    self.connection.executemany("INSERT OR REPLACE INTO log_files (log_file, bytes, mtime, started) "
+                                                "VALUES (?, ?, ?, ?)", new_files)
+                    self.connection.executemany("DELETE FROM log_files WHERE log_file = ?", removed)
+                    # Runs keep their outcome without their log, runs only known from their log go with it
+                    self.connection.executemany("DELETE FROM runs WHERE log_file = ? AND status = 'unknown'", removed)
+                    self.connection.executemany("UPDATE runs SET log_file = NULL, bytes = NULL WHERE log_file = ?",
+                                                removed)
+                    self.connection.executemany(
+                        "INSERT INTO runs (run_id, kind, name, environment, trigger, schedule_id, status, started, "
+                        "finished, duration, returncode, log_file, bytes, error) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", new_runs
+                    )
+                    # The time read before listing, a change during the scan is picked up by the next one
+                    self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('log_dir_mtime', ?)",
+                                            (dir_mtime,))
+                    self.connection.execute("COMMIT")
+                except sqlite3.Error:
+                    self.connection.execute("ROLLBACK")
+                    raise
+            if new_runs or removed:
+                self.logger.info(f"{len(new_runs)} logs added and {len(removed)} removed outside of the application")
+            return True
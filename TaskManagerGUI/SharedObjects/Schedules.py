@@ -0,0 +1,171 @@
+import json
+import os
+import threading
+import uuid
+from Logging import Logger
+from SharedObjects.CronExpression import CronExpression
+from SharedObjects.FileUtils import atomic_write
+from SharedObjects.FileWatcher import FileWatcher, diff_dicts
+
+
+class Schedules:
+    """Recurring runs of tasks and health checks, stored in config/schedules.json.
+
+    A schedule is a dict with an "id", a "kind" ("task" or "healthcheck"), the name of
+    its "target", either a "cron" expression or an "interval" in seconds, an "overlap"
+    policy for fires while the previous run is still going, and "enabled". Health check
+    schedules also name the "environment" they run on.
+    """
+    _instance = None  # Class-level variable to store the single instance
+    file_path = "config/schedules.json"
+
+    KINDS = ("task", "healthcheck")
+    SKIP = "skip"  # Drop the fire
+    QUEUE = "queue"  # Run once more after the current run ends
+    CONCURRENT = "concurrent"  # Start another run right away
+    OVERLAP_POLICIES = (SKIP, QUEUE, CONCURRENT)
+
+    def __new__(cls, *args, **kwargs):
+        """Override __new__ to ensure only one instance of Schedules exists."""
+        if not cls._instance:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self.logger = Logger()
+            self.lock = threading.RLock()
+            self.listeners = []  # Called without arguments after every change
+            self.schedules = self.load_schedules()
+            # Pick up changes made to schedules.json by other users of a shared config
+            FileWatcher().watch(self.file_path, self.reload)
+            self._initialized = True
+
+    def load_schedules(self):
+        if os.path.exists(self.file_path):
+            try:
+                with open(self.file_path, "r") as file:
+                    return json.load(file).get("schedules", [])
+            except json.JSONDecodeError:
+                self.logger.error(f"{self.file_path} is not in a valid format. No schedules were loaded.")
+        return []
+
+    def save_schedules(self):
+        with self.lock:
+            atomic_write(self.file_path, json.dumps({"schedules": self.schedules}, indent=4))
+            FileWatcher().acknowledge(self.file_path)
+        self._notify()
+
+    def reload(self):
+        """Apply the changes made to schedules.json by someone else, returns the changed schedule ids."""
+        try:
+            with open(self.file_path, "r") as file:
+                new_schedules = json.load(file).get("schedules", [])
+        except (OSError, json.JSONDecodeError) as e:
+            self.logger.warning(f"Ignoring the change of {self.file_path}: {e}")
+            return None
+
+        with self.lock:
+            changes = diff_dicts({s["id"]: s for s in self.schedules}, {s["id"]: s for s in new_schedules})
+            self.schedules = new_schedules
+        self._notify()
+        return changes
+
+    def subscribe(self, callback):
+        self.listeners.append(callback)
+
+    def _notify(self):
+        for callback in list(self.listeners):
+            try:
+                callback()
+            except Exception as e:
+                self.logger.error(f"Failed to notify a listener of the schedules: {e}")
+
+    def get_schedules(self):
+        with self.lock:
+            return list(self.schedules)
+
+    def get_schedule(self, schedule_id):
+        with self.lock:
+            return next((s for s in self.schedules if s["id"] == schedule_id), None)
+
+    def get_schedules_for(self, kind, target):
+        with self.lock:
+            return [s for s in self.schedules if s["kind"] == kind and s["target"] == target]
+
+    @classmethod
+    def validate(cls, schedule):
+        """Raise ValueError if the schedule cannot be run."""
+        if schedule.get("kind") not in cls.KINDS:
+            raise ValueError(f"Unknown schedule kind: {schedule.get('kind')!r}")
+        if not schedule.get("target"):
+            raise ValueError("A schedule needs a target")
+        if schedule.get("overlap", cls.SKIP) not in cls.OVERLAP_POLICIES:
+            raise ValueError(f"Overlap policy must be one of {', '.join(cls.OVERLAP_POLICIES)}")
+        if bool(schedule.get("cron")) == bool(schedule.get("interval")):
+            raise ValueError("A schedule needs either a cron expression or an interval")
+        if schedule.get("cron"):
+            CronExpression(schedule["cron"])
+        elif not isinstance(schedule["interval"], (int, float)) or schedule["interval"] < 1:
+            raise ValueError("The interval must be a number of seconds of at least 1")
+        if schedule["kind"] == "healthcheck" and not schedule.get("environment"):
+            raise ValueError("A health check schedule needs an environment")
+
+    def add_schedule(self, kind, target, cron=None, interval=None, overlap=SKIP, environment=None):
+        """Validate, store and return a new schedule."""
+        schedule = {
+            "id": uuid.uuid4().hex[:12],
+            "kind": kind,
+            "target": target,
+            "cron": cron,
+            "interval": interval,
+            "overlap": overlap,
+            "enabled": True,
+        }
+        if environment:
+            schedule["environment"] = environment
+        self.validate(schedule)
+
+        with self.lock:
+            self.schedules.append(schedule)
+        self.save_schedules()
+        return schedule
+
+    def delete_schedule(self, schedule_id):
+        with self.lock:
+            self.schedules = [s for s in self.schedules if s["id"] != schedule_id]
+        self.save_schedules()
+
+    def rename_target(self, kind, old_name, new_name):
+        """Keep the schedules of a renamed task or health check."""
+        with self.lock:
+            renamed = [s for s in self.schedules if s["kind"] == kind and s["target"] == old_name]
+            for schedule in renamed:
+                schedule["target"] = new_name
+        if renamed:
+            self.save_schedules()
+
+    def delete_target(self, kind, name):
+        """Drop the schedules of a deleted task or health check."""
+        with self.lock:
+            kept = [s for s in self.schedules if not (s["kind"] == kind and s["target"] == name)]
+            changed = len(kept) != len(self.schedules)
+            self.schedules = kept
+        if changed:
+            self.save_schedules()
+
+    @staticmethod
+    def parse_when(text):
+        """Split the "when" of a schedule as typed by the user into (cron, interval)."""
+        text = text.strip()
+        if text.isdigit():
+            return None, int(text)
+        return text, None
+
+    @staticmethod
+    def describe(schedule):
+        """Return a short human readable description of a schedule."""
+        when = f"cron '{schedule['cron']}'" if schedule.get("cron") else f"every {schedule['interval']}s"
+        where = f" on {schedule['environment']}" if schedule.get("environment") else ""
+        return f"{when}{where}, {schedule.get('overlap', Schedules.SKIP)} when still running"
@@ -1,23 +1,39 @@
 import json
 import os
 from Logging import Logger
+from SharedObjects.Database import Database
+from SharedObjects.FileUtils import atomic_write
+from SharedObjects.FileWatcher import FileWatcher, diff_dicts
 
 class Settings:
     _instance = None  # Class-level variable to store the single instance
+    file_path = "config/settings.json"
 
     def __new__(cls, *args, **kwargs):
         """Override __new__ to ensure only one instance of Settings exists."""
         if not cls._instance:
-            cls._instance = super(Settings, cls).__new__(cls, *args, **kwargs)
+            cls._instance = super(Settings, cls).__new__(cls)
+            cls._instance._initialized = False  # Add a flag to track initialization
         return cls._instance
 
-    def __init__(self, file_path="config/settings.json"):
-        self.file_path = file_path
-        self.settings = self.load_settings()
-        self.logger = Logger()
+    def __init__(self, file_path=None):
+        # Loading again would hide the changes read from the file from the watcher and its subscribers
+        if not self._initialized:
+            if file_path is not None:
+                self.file_path = file_path
+            self.logger = Logger()
+            self.database = Database() if Database.enabled() else None
+            self.settings = self.load_settings()
+            if self.database is None:
+                # Pick up changes made to settings.json by other users of a shared config
+                FileWatcher().watch(self.file_path, self.reload)
+            self._initialized = True
 
     def load_settings(self):
         """Load settings from a JSON file. If the file doesn't exist, return an empty dictionary."""
+        if self.database is not None:
+            return self.database.load_settings()
+
         if os.path.exists(self.file_path):
             with open(self.file_path, "r") as file:
                 try:
@@ -26,6 +42,25 @@ class Settings:
                     self.logger.info("Invalid JSON format. Starting with empty settings.")
         return {}
 
+    def reload(self):
+        """Apply the changes made to settings.json by someone else, returns the changed keys."""
+        if self.database is not None or not os.path.exists(self.file_path):
+            return None
+
+        try:
+            with open(self.file_path, "r") as file:
+                new_settings = json.load(file)
+        except (OSError, json.JSONDecodeError) as e:
+            self.logger.warning(f"Ignoring the change of {self.file_path}: {e}")
+            return None
+
+        changes = diff_dicts(self.settings, new_settings)
+        for key in changes["removed"]:
+            del self.settings[key]
+        for key in changes["added"] + changes["changed"]:
+            self.settings[key] = new_settings[key]
+        return changes
+
     def get(self, key, default=None):
         """Get a setting value with a default fallback."""
         return self.settings.get(key, default)
@@ -40,19 +75,30 @@ class Settings:
     def add_or_update(self, key, value):
         """Add or update a setting and save the changes."""
         self.settings[key] = value
-        self.save_settings()
+        if self.database is not None:
+            self.database.save_setting(key, value)
+        else:
+            self.save_settings()
 
     def delete(self, key):
         """Delete a setting if it exists and save the changes."""
         if key in self.settings:
             del self.settings[key]
-            self.save_settings()
+            if self.database is not None:
+                self.database.delete_setting(key)
+            else:
+                self.save_settings()
             self.logger.info(f"Key '{key}' has been deleted.")
         else:
             self.logger.info(f"Key '{key}' does not exist.")
 
     def save_settings(self):
         """Save the current settings to the JSON file."""
-        with open(self.file_path, "w") as file:
-            json.dump(self.settings, file, indent=4)
+        if self.database is not None:
+            for key, value in self.settings.items():
+                self.database.save_setting(key, value)
+            return
+
+        atomic_write(self.file_path, json.dumps(self.settings, indent=4))
+        FileWatcher().acknowledge(self.file_path)
 
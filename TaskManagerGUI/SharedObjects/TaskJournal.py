@@ -0,0 +1,204 @@
+import json
+import os
+import threading
+from Logging import Logger
+from SharedObjects.FileUtils import atomic_write
+
+
+def same_command(command, other):
+    """Compare two commands by id when both have one, otherwise by content."""
+    if command.get("id") and other.get("id"):
+        return command["id"] == other["id"]
+    return command == other
+
+
+def replay(tasks, entries):
+    """Apply journal entries, in order, to a list of tasks and return it."""
+    task_index = {}
+    for task in tasks:
+        task_index.setdefault(task["name"], task)
+
+    for entry in entries:
+        operation = entry.get("op")
+
+        if operation == "add_task":
+            task = {"name": entry["name"], "commands": []}
+            tasks.append(task)
+            task_index[task["name"]] = task
+
+        elif operation == "rename_task":
+            task = task_index.pop(entry["old"], None)
+            if task is not None:
+                task["name"] = entry["new"]
+                task_index[entry["new"]] = task
+
+        elif operation == "delete_task":
+            task = task_index.pop(entry["name"], None)
+            if task is not None:
+                tasks = [t for t in tasks if t is not task]
+
+        elif operation in ("add_command", "set_commands"):
+            task = task_index.get(entry["task"])
+            if task is None:
+                task = {"name": entry["task"], "commands": []}
+                tasks.append(task)
+                task_index[task["name"]] = task
+            if operation == "add_command":
+                task["commands"].append(entry["command"])
+            else:
+                task["commands"] = entry["commands"]
+
+        elif operation == "update_command":
+            task = task_index.get(entry["task"])
+            if task is not None:
+                task["commands"] = [entry["new"] if same_command(cmd, entry["old"]) else cmd for cmd in task["commands"]]
+
+        elif operation == "delete_command":
+            task = task_index.get(entry["task"])
+            if task is not None:
+                matches = [cmd for cmd in task["commands"] if same_command(cmd, entry["command"])]
+                if matches:
+                    task["commands"].remove(matches[0])
+
+    return tasks
+
+
+class TaskJournal:
+    """Append-only JSON-lines journal of task mutations.
+
+    tasks.json acts as the snapshot: it records the sequence number of the last journal
+    entry it contains ("journal_seq"). Once the journal grows past compact_threshold bytes
+    a background thread writes a fresh snapshot and drops the entries it covers.
+    """
+
+    compact_threshold = 1024 * 1024  # Bytes of journal before a compaction is triggered
+
+    def __init__(self, snapshot_path, get_tasks, lock):
+        self.snapshot_path = snapshot_path
+        self.journal_path = os.path.splitext(snapshot_path)[0] + ".journal"
+        self.segment_path = self.journal_path + ".compacting"
+        self.get_tasks = get_tasks  # Returns the live task list, called with lock held
+        self.lock = lock  # Shared with Tasks so that appends and snapshots never interleave
+        self.logger = Logger()
+
+        self.seq = 0
+        self._file = None
+        self._compact_event = threading.Event()
+        self._compactor = None
+
+    @staticmethod
+    def exists(snapshot_path):
+        """Return True if journal entries are left next to the given snapshot."""
+        journal_path = os.path.splitext(snapshot_path)[0] + ".journal"
+        return os.path.exists(journal_path) or os.path.exists(journal_path + ".compacting")
+
+    def load(self):
+        """Return the snapshot tasks with every newer journal entry replayed on top."""
+        data = {}
+        if os.path.exists(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, "r") as file:
+                    data = json.load(file)
+            except json.JSONDecodeError:
+                self.logger.error(f"{self.snapshot_path} is not in a valid format. Replaying the journal only.")
+
+        tasks = data.get("tasks", [])
+        snapshot_seq = data.get("journal_seq")
+
+        if snapshot_seq is None and os.path.exists(self.snapshot_path):
+            # The snapshot was written outside journal mode, so it is newer than any leftover journal
+            self.discard()
+            snapshot_seq = 0
+            atomic_write(self.snapshot_path, json.dumps({"tasks": tasks, "journal_seq": 0}, indent=4))
+
+        self.seq = snapshot_seq or 0
+        entries = [entry for entry in self.read_entries() if entry["seq"] > self.seq]
+        if entries:
+            tasks = replay(tasks, entries)
+            self.seq = entries[-1]["seq"]
+            self.logger.info(f"Replayed {len(entries)} journal entries on top of {self.snapshot_path}")
+
+        return tasks
+
+    def read_entries(self):
+        """Read the entries of the compaction segment and the journal, in order."""
+        entries = []
+        for path in (self.segment_path, self.journal_path):
+            if not os.path.exists(path):
+                continue
+            with open(path, "r") as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A crash during an append can leave a partial last line behind
+                        self.logger.warning(f"Skipping malformed journal entry in {path}")
+                        continue
+                    entries.append(entry)
+        return entries
+
+    def open(self):
+        """Open the journal for appending and start the background compactor."""
+        self._file = open(self.journal_path, "a")
+        self._compactor = threading.Thread(target=self._compaction_loop, daemon=True)
+        self._compactor.start()
+
+        # Finish a compaction that was interrupted by a crash
+        if os.path.exists(self.segment_path):
+            self._compact_event.set()
+
+    def append(self, operation, **details):
+        """Append a single mutation to the journal."""
+        with self.lock:
+            self.seq += 1
+            entry = {"seq": self.seq, "op": operation, **details}
+            self._file.write(json.dumps(entry) + "\n")
+            self._file.flush()
+
+            if self._file.tell() > self.compact_threshold:
+                self._compact_event.set()
+
+    def flush(self):
+        """Force the appended entries to disk."""
+        with self.lock:
+            if self._file is not None and not self._file.closed:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+
+    def close(self):
+        """Flush and close the journal file."""
+        self.flush()
+        with self.lock:
+            if self._file is not None:
+                self._file.close()
+
+    def discard(self):
+        """Delete the journal and any unfinished compaction segment."""
+        for path in (self.segment_path, self.journal_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def compact(self):
+        """Write a new snapshot and drop the journal entries it contains."""
+        with self.lock:
+            data = json.dumps({"tasks": self.get_tasks(), "journal_seq": self.seq}, indent=4)
+            # Move the current journal aside so that new appends go to a fresh file
+            if not os.path.exists(self.segment_path):
+                self._file.close()
+                os.replace(self.journal_path, self.segment_path)
+                self._file = open(self.journal_path, "a")
+
+        # The slow part happens without the lock, appends keep going to the new journal
+        atomic_write(self.snapshot_path, data)
+        # Every entry of the segment is now part of the snapshot
+        os.remove(self.segment_path)
+        self.logger.info(f"Compacted task journal into {self.snapshot_path}")
+
+    def _compaction_loop(self):
+        while True:
+            self._compact_event.wait()
+            self._compact_event.clear()
+            try:
+                self.compact()
+            except Exception as e:
+                self.logger.error(f"Failed to compact the task journal: {e}")
@@ -0,0 +1,195 @@
+import heapq
+import re
+import threading
+from collections import Counter
+from SharedObjects.CommandRenderer import CommandRenderer
+from SharedObjects.Tasks import Tasks
+
+# Task names are split into words on these characters for word prefix matches
+WORD_SEPARATORS = re.compile(r"[\s_\-.:/]+")
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TaskSearch:
+    """Ranked search over the task names and the command lines of the tasks.
+
+    Trigram postings of the lowercase names and command lines narrow a query down to a
+    few candidates before any string is compared. The postings are updated on the first
+    search after the tasks changed, for the tasks Tasks.changes_since reports only.
+
+    Matches are ranked: the exact name, names starting with the query, names with a word
+    starting with it, names containing it, tasks with a command containing it. When none
+    of these match, the fuzzy_limit names most similar to the query by their trigrams are
+    returned, which catches typos. Ties are broken by the length of the name, then alphabetically.
+    """
+    _instance = None  # Class-level variable to store the single instance
+    fuzzy_threshold = 0.6  # Least trigram similarity (Dice coefficient) of a fuzzy match
+    fuzzy_limit = 10  # Most names a fuzzy search returns
+
+    def __new__(cls, *args, **kwargs):
+        """Override __new__ to ensure only one instance of TaskSearch exists."""
+        if not cls._instance:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self.tasks_manager = Tasks()
+            self.renderer = CommandRenderer()
+            self.lock = threading.Lock()
+            self.revision = None  # Tasks.revision the index is up to date with
+            self.names = {}  # Task name -> lowercase name
+            self.name_gram_counts = {}  # Task name -> number of trigrams of its lowercase name, for fuzzy matches
+            self.spaced_names = {}  # Task name -> " " + lowercase words of the name, for word prefix matches
+            self.order = {}  # Task name -> position in the tie-break order
+            self.sorted_names = []
+            self.name_grams = {}  # Trigram -> names containing it
+            self.short_grams = {}  # Character and character pair -> names containing it, for short queries
+            self.command_texts = {}  # Task name -> lowercase command lines
+            self.command_grams = {}  # Trigram -> names of the tasks with a command containing it
+            self._initialized = True
+
+    def _refresh(self):
+        """Bring the postings up to date with the tasks, re-indexing the changed tasks only."""
+        revision, tasks, complete = self.tasks_manager.changes_since(self.revision)
+        if revision == self.revision:
+            return
+
+        if complete:
+            # First build, or more changes than Tasks keeps: the tasks not returned are gone
+            tasks.update((name, None) for name in self.command_texts.keys() - tasks.keys())
+
+        added = removed = False
+        for name, commands in tasks.items():
+            old_text = self.command_texts.get(name)
+            if commands is None:
+                if old_text is not None:
+                    self._remove_postings(self.command_grams, name, trigrams(self.command_texts.pop(name)))
+                    self._remove_name(name)
+                    removed = True
+                continue
+
+            # Rendering is memoised by the CommandRenderer, only edited commands are rendered again
+            text = "\n".join(self.renderer.render(command) for command in commands).lower()
+            if old_text == text:
+                continue
+            if old_text is None:
+                self._add_name(name)
+                added = True
+            else:
+                self._remove_postings(self.command_grams, name, trigrams(old_text))
+            self.command_texts[name] = text
+            for gram in trigrams(text):
+                self.command_grams.setdefault(gram, set()).add(name)
+
+        if removed or added:
+            self.sorted_names = sorted(self.names, key=str.lower)
+            self.order = {name: index for index, name in
+                          enumerate(sorted(self.names, key=lambda name: (len(name), self.names[name], name)))}
+        self.revision = revision
+
+    def prepare(self):
+        """Build the postings in a background thread, so the first search does not wait for them."""
+        def build():
+            with self.lock:
+                self._refresh()
+
+        threading.Thread(target=build, daemon=True).start()
+
+    @staticmethod
+    def _short_grams(lower):
+        return {lower[i:i + n] for n in (1, 2) for i in range(len(lower) - n + 1)}
+
+    def _add_name(self, name):
+        lower = name.lower()
+        self.names[name] = lower
+        self.spaced_names[name] = " " + " ".join(WORD_SEPARATORS.split(lower))
+        grams = trigrams(lower)
+        self.name_gram_counts[name] = len(grams)
+        for gram in grams:
+            self.name_grams.setdefault(gram, set()).add(name)
+        for gram in self._short_grams(lower):
+            self.short_grams.setdefault(gram, set()).add(name)
+
+    def _remove_name(self, name):
+        lower = self.names.pop(name)
+        del self.spaced_names[name]
+        del self.name_gram_counts[name]
+        self._remove_postings(self.name_grams, name, trigrams(lower))
+        self._remove_postings(self.short_grams, name, self._short_grams(lower))
+
+    @staticmethod
+    def _remove_postings(postings, name, grams):
+        for gram in grams:
+            names = postings.get(gram)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del postings[gram]
+
+    @staticmethod
+    def _candidates(postings, grams):
+        """Return the names in the postings of every gram, starting from the smallest posting."""
+        sets = sorted((postings.get(gram, ()) for gram in grams), key=len)
+        if not sets or not sets[0]:
+            return set()
+        return set(sets[0]).intersection(*sets[1:])
+
+    def search(self, query, include_commands=True):
+        """Return the names of the tasks matching the query, best matches first.
+
+        An empty query returns every task name in alphabetical order.
+        """
+        query = query.strip().lower()
+        with self.lock:
+            self._refresh()
+            if not query:
+                return list(self.sorted_names)
+
+            if len(query) < 3:
+                name_matches = self.short_grams.get(query, set())
+                command_matches = set()
+            else:
+                grams = trigrams(query)
+                name_matches = {name for name in self._candidates(self.name_grams, grams)
+                                if query in self.names[name]}
+                command_matches = set()
+                if include_commands:
+                    command_matches = {name for name in self._candidates(self.command_grams, grams) - name_matches
+                                       if query in self.command_texts[name]}
+                if not name_matches and not command_matches:
+                    return self._fuzzy_search(grams)
+
+            # Ranks: exact name, name prefix, word prefix, name substring, command substring
+            word_query = " " + query
+            names, spaced_names = self.names, self.spaced_names
+            exact = [name for name in name_matches if names[name] == query]
+            prefix = [name for name in name_matches if names[name].startswith(query) and names[name] != query]
+            rest = [name for name in name_matches if not names[name].startswith(query)]
+            word = [name for name in rest if word_query in spaced_names[name]]
+            substring = [name for name in rest if word_query not in spaced_names[name]]
+
+            ranked = []
+            for bucket in (exact, prefix, word, substring, command_matches):
+                ranked.extend(sorted(bucket, key=self.order.__getitem__))
+            return ranked
+
+    def _fuzzy_search(self, grams):
+        """Return the few names closest to the query by their trigrams, for queries with a typo.
+
+        Similarity is the Dice coefficient of the trigram sets, so a long name sharing only a
+        common word with the query does not match.
+        """
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.name_grams.get(gram, ()))
+        ranked = []
+        for name, count in shared.items():
+            similarity = 2 * count / (len(grams) + self.name_gram_counts[name])
+            if similarity >= self.fuzzy_threshold:
+                ranked.append((-similarity, self.order[name], name))
+        return [name for _, _, name in heapq.nsmallest(self.fuzzy_limit, ranked)]
@@ -1,10 +1,32 @@
+import atexit
 import json
 import os
+import threading
+import uuid
+from collections import deque
+from contextlib import contextmanager
 from tkinter import messagebox
 from Logging import Logger
+from SharedObjects import Settings
+from SharedObjects.CommandRenderer import CommandRenderer
+from SharedObjects.FileUtils import atomic_write
+from SharedObjects.FileWatcher import FileWatcher, diff_dicts
+from SharedObjects.TaskJournal import TaskJournal
+from SharedObjects.Database import Database, SQLiteTaskStore
 
 class Tasks:
     _instance = None  # Class-level variable to store the single instance
+    file_path = "config/tasks.json"
+    save_delay = 0.5  # Seconds without further changes before pending changes are written
+    max_retry_delay = 60  # Longest wait in seconds before saving again after a failed save
+    change_log_size = 1000  # Revisions whose changed task names are kept for changes_since
+
+    # Conflict policies for import_tasks
+    OVERRIDE = "override"
+    APPEND = "append"
+    SKIP = "skip"
+    ASK = "ask"
+
     empty_dict = {
         "prefix": "",
         "path": "",
@@ -20,17 +42,48 @@ class Tasks:
         return cls._instance
 
     def __init__(self):
+        self.logger = Logger()
+
         if not self._initialized:  # Initialize only if not already initialized
-            self.tasks = self.load_tasks()
-            self._initialized = True  # Set the flag to True after initialization
+            self._lock = threading.RLock()
+            self._write_lock = threading.Lock()  # Serializes flushes so an older snapshot never wins
+            self._dirty = False
+            self._batch_depth = 0
+            self._save_timer = None
+            self._retry_delay = None  # Wait before the next attempt, while saving fails
+            self.revision = 0  # Incremented on every change of the in-memory tasks, see TaskSearch
+            self._change_log = deque(maxlen=self.change_log_size)  # (revision, names of the tasks it changed)
+            self.store = None  # Storage backend, None when tasks.json is rewritten as a whole
+            self._disk_data = None  # Content of tasks.json as last read or written, in json mode
+            self.renderer = CommandRenderer()
+            self.storage_mode = "sqlite" if Database.enabled() else Settings().get("tasks_storage", "json")
 
-        self.logger = Logger()
+            if self.storage_mode == "sqlite":
+                self.store = SQLiteTaskStore()
+            elif self.storage_mode == "journal":
+                self.store = TaskJournal(self.file_path, self.get_tasks, self._lock)
+
+            if self.store is not None:
+                self.tasks = self.store.load()
+                self.store.open()
+            else:
+                self.tasks = self.load_tasks()
+                self._disk_data = json.dumps({"tasks": self.tasks}, indent=4)
+                if TaskJournal.exists(self.file_path):
+                    self._fold_journal()
+            self._persist_new_ids(self.rebuild_index())
+            if self.store is None:
+                # Pick up changes made to tasks.json by other users of a shared config
+                FileWatcher().watch(self.file_path, self.reload)
+            # Make sure pending changes reach the disk when the application exits
+            atexit.register(self.flush)
+            self._initialized = True  # Set the flag to True after initialization
 
     def load_tasks(self):
         """Load tasks from the tasks.json file."""
-        if os.path.exists("config/tasks.json"):
+        if os.path.exists(self.file_path):
             try:
-                with open("config/tasks.json", "r") as file:
+                with open(self.file_path, "r") as file:
                     data = json.load(file)
                     return data.get("tasks", [])
             except json.JSONDecodeError:
@@ -43,151 +96,512 @@ class Tasks:
                 self.logger.error(f"Unexpected error loading tasks.json: {e}")
         return []
 
-    def save_tasks(self):
-        """Save the current tasks to tasks.json."""
-        with open("config/tasks.json", "w") as file:
-            json.dump({"tasks": self.tasks}, file, indent=4)
+    def _fold_journal(self):
+        """Apply a journal left behind by journal mode and go back to a plain tasks.json."""
+        journal = TaskJournal(self.file_path, self.get_tasks, self._lock)
+        self.tasks = journal.load()
+        self._dirty = True
+        self.flush()
+        journal.discard()
+
+    def rebuild_index(self):
+        """Rebuild the name -> task, rendered command -> command and id -> command lookup indexes.
+
+        Returns the names of the tasks whose commands had to be given a new id.
+        """
+        self._task_index = {}
+        self._command_index = {}
+        self._command_ids = {}  # Command id -> (task, command)
+        self.renderer.clear()
+        new_ids = set()
+        for task in self.tasks:
+            # Keep the first task of a duplicated name, the same one a linear scan would return
+            if task["name"] not in self._task_index:
+                self._task_index[task["name"]] = task
+                if self._index_commands(task):
+                    new_ids.add(task["name"])
+        return new_ids
+
+    def _index_commands(self, task):
+        """Rebuild the command indexes of a single task, returns True if a command got a new id."""
+        self._command_index[task["name"]] = {}
+        new_ids = False
+        for command in task["commands"]:
+            new_ids |= self._register_command(task, command)
+        return new_ids
+
+    def _unindex_commands(self, task):
+        """Drop the ids of a task's commands before they are replaced or deleted."""
+        for command in task["commands"]:
+            if self._command_ids.get(command.get("id"), (None, None))[1] is command:
+                del self._command_ids[command["id"]]
+                self.renderer.invalidate(command["id"])
+
+    def _register_command(self, task, command):
+        """Index a command of a task, giving it a unique id if it has none. Returns True for a new id."""
+        command_id = command.get("id")
+        owner = self._command_ids.get(command_id)
+        new_id = not command_id or (owner is not None and owner[1] is not command)
+        if new_id:
+            command["id"] = self._new_command_id()
+        self._command_ids[command["id"]] = (task, command)
+        # Keep the first match, the same one a linear scan would return
+        self._command_index[task["name"]].setdefault(self.generate_command_from_parts(command), command)
+        return new_id
+
+    def _new_command_id(self):
+        """Return a compact command id that is not used yet."""
+        while True:
+            command_id = uuid.uuid4().hex[:12]
+            if command_id not in self._command_ids:
+                return command_id
+
+    def _persist_new_ids(self, task_names):
+        """Save the ids given to commands that were loaded without one."""
+        with self.batch():
+            with self._lock:
+                for task_name in task_names:
+                    self._changed("set_commands", task=task_name, commands=self._task_index[task_name]["commands"])
+
+    def reload(self):
+        """Apply the changes made to tasks.json by someone else to the in-memory tasks.
+
+        The file is compared with its content as last read or written, so only the tasks
+        changed on disk are replaced and pending local changes to other tasks are kept.
+        Returns the names of the added, changed and removed tasks, or None.
+        """
+        if self.store is not None:
+            return None
+
+        try:
+            with open(self.file_path, "r") as file:
+                data = file.read()
+            new_tasks = json.loads(data).get("tasks", [])
+        except (OSError, json.JSONDecodeError) as e:
+            self.logger.warning(f"Ignoring the change of {self.file_path}: {e}")
+            return None
+
+        with self._lock:
+            old_tasks = self._by_name(json.loads(self._disk_data).get("tasks", []) if self._disk_data else [])
+            new_tasks = self._by_name(new_tasks)
+            changes = diff_dicts(old_tasks, new_tasks)
+
+            for task_name in changes["removed"]:
+                task = self._task_index.pop(task_name, None)
+                if task is not None:
+                    self._unindex_commands(task)
+                    del self._command_index[task_name]
+                    self.tasks = [t for t in self.tasks if t is not task]
+
+            new_ids = set()
+            for task_name in changes["added"] + changes["changed"]:
+                task = self._task_index.get(task_name)
+                if task is None:
+                    task = {"name": task_name, "commands": []}
+                    self.tasks.append(task)
+                    self._task_index[task_name] = task
+                else:
+                    self._unindex_commands(task)
+                task["commands"] = new_tasks[task_name].get("commands", [])
+                if self._index_commands(task):
+                    new_ids.add(task_name)
+
+            self._disk_data = data
+            self.revision += 1
+            self._change_log.append((self.revision, frozenset(changes["added"] + changes["changed"] +
+                                                              changes["removed"])))
+
+        self._persist_new_ids(new_ids)
+        return changes
+
+    @staticmethod
+    def _by_name(tasks):
+        """Map task names to tasks, keeping the first task of a duplicated name as rebuild_index does."""
+        tasks_by_name = {}
+        for task in tasks:
+            tasks_by_name.setdefault(task["name"], task)
+        return tasks_by_name
+
+    def _changed(self, operation, **details):
+        """Persist a mutation through the active storage mode."""
+        if self.store is not None:
+            # Journal and SQLite modes only record the mutation instead of rewriting every task
+            self.store.append(operation, **details)
+        if operation == "rename_task":
+            changed = (details["old"], details["new"])
+        else:
+            changed = (details.get("task", details.get("name")),)
+        self.save_tasks(changed)
+
+    def save_tasks(self, changed=()):
+        """Mark the tasks as modified and schedule a write to the storage.
+
+        Changes are coalesced: the file is written once the store has been idle for
+        save_delay seconds, or once the outermost batch() block exits. changed names
+        the tasks that were modified, for changes_since.
+        """
+        with self._lock:
+            self.revision += 1
+            self._change_log.append((self.revision, frozenset(changed)))
+            self._dirty = True
+            if self._batch_depth:
+                return
+
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+            self._save_timer = threading.Timer(self.save_delay, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    @contextmanager
+    def batch(self):
+        """Group several mutations so that they are written to disk only once."""
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                flush_now = self._batch_depth == 0 and self._dirty
+            if flush_now:
+                self.flush()
+
+    def flush(self):
+        """Write pending changes to the storage; tasks.json is replaced atomically."""
+        with self._write_lock:
+            with self._lock:
+                if self._save_timer is not None:
+                    self._save_timer.cancel()
+                    self._save_timer = None
+
+                if not self._dirty:
+                    return
+                self._dirty = False
+
+                if self.store is not None:
+                    try:
+                        self.store.flush()
+                    except Exception as e:
+                        self.logger.error(f"Failed to save tasks to {self.storage_mode} storage: {e}")
+                        self._schedule_retry()
+                    else:
+                        self._retry_delay = None
+                    return
+
+                data = json.dumps({"tasks": self.tasks}, indent=4)
+                self._disk_data = data
+
+            try:
+                # Write to a temporary file first so a crash can never leave a truncated tasks.json behind
+                atomic_write(self.file_path, data)
+                FileWatcher().acknowledge(self.file_path)
+            except Exception as e:
+                self.logger.error(f"Failed to save {self.file_path}: {e}")
+                with self._lock:
+                    self._schedule_retry()
+            else:
+                with self._lock:
+                    self._retry_delay = None
+
+    def _schedule_retry(self):
+        """Keep the changes pending after a failed save and try again later, waiting longer every time."""
+        self._dirty = True
+        if self._retry_delay is None:
+            self._retry_delay = self.save_delay
+        else:
+            self._retry_delay = min(self._retry_delay * 2, self.max_retry_delay)
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+        self._save_timer = threading.Timer(self._retry_delay, self.flush)
+        self._save_timer.daemon = True
+        self._save_timer.start()
 
     def add_task(self, task_name):
         """Add a new task with the given task name."""
-        self.tasks.append({"name": task_name, "commands": []})
-        self.save_tasks()
+        with self._lock:
+            task = {"name": task_name, "commands": []}
+            self.tasks.append(task)
+            self._task_index[task_name] = task
+            self._command_index[task_name] = {}
+            self._changed("add_task", name=task_name)
 
     def rename_task(self, old_name, new_name):
         """Rename a task in the task manager."""
-        for task in self.get_tasks():
-            if task["name"] == old_name:
+        with self._lock:
+            task = self._task_index.pop(old_name, None)
+            if task is not None:
                 task["name"] = new_name
-                self.save_tasks()
-                break
+                self._task_index[new_name] = task
+                self._command_index[new_name] = self._command_index.pop(old_name)
+                self._changed("rename_task", old=old_name, new=new_name)
 
     def add_command(self, task_name, command_dict):
         """Adds a new command to the task with the given task_name."""
-        task_found = False
-        for task in self.tasks:
-            if task["name"] == task_name:
+        with self._lock:
+            task = self._task_index.get(task_name)
+            if task is not None:
                 task["commands"].append(command_dict)
-                task_found = True
-                break
-
-        if not task_found:
-            # If the task doesn't exist, create it with the given command
-            self.tasks.append({"name": task_name, "commands": [command_dict]})
+                self._register_command(task, command_dict)
+            else:
+                # If the task doesn't exist, create it with the given command
+                task = {"name": task_name, "commands": [command_dict]}
+                self.tasks.append(task)
+                self._task_index[task_name] = task
+                self._index_commands(task)
 
-        self.save_tasks()
+            self._changed("add_command", task=task_name, command=command_dict)
+            return command_dict["id"]
 
     def delete_task(self, task_name):
         """Delete a task by its name."""
-        task_found = False
-        # Lets delete its commands first
-        for task in self.tasks:
-            if task["name"] == task_name:
-                del task["commands"]
-                task_found = True
-                break
-
-        if task_found:
-            self.tasks = [task for task in self.tasks if task["name"] != task_name]
-            self.save_tasks()
+        with self._lock:
+            task = self._task_index.pop(task_name, None)
+            if task is not None:
+                self._unindex_commands(task)
+                del self._command_index[task_name]
+                self.tasks = [t for t in self.tasks if t is not task]
+                self._changed("delete_task", name=task_name)
 
     def update_task(self, task_name, command_dict):
         """Update the commands for an existing task."""
-        for task in self.tasks:
-            if task["name"] == task_name:
+        with self._lock:
+            task = self._task_index.get(task_name)
+            if task is not None:
+                self._unindex_commands(task)
                 task["commands"] = command_dict
-                self.save_tasks()
-                break
+                self._index_commands(task)
+                self._changed("set_commands", task=task_name, commands=command_dict)
 
     def delete_command(self, task_name, command_dict):
         """Deletes a command from the task with the given task_name."""
-        for task in self.tasks:
-            if task["name"] == task_name:
-                if command_dict in task["commands"]:
-                    task["commands"].remove(command_dict)
-                    self.save_tasks()
-                    return True
-        return False
+        with self._lock:
+            task, command = self._find_command(task_name, command_dict)
+            if command is None:
+                return False
+            return self.delete_command_by_id(command["id"])
 
     def update_command(self, task_name, old_command_dict, new_command_dict):
         """Updates a command for the task with the given task_name."""
-        for task in self.tasks:
-            if task["name"] == task_name:
-                if old_command_dict in task["commands"]:
-                    task["commands"] = [new_command_dict if cmd == old_command_dict else cmd for cmd in task["commands"]]
-                    self.save_tasks()
+        with self._lock:
+            task, command = self._find_command(task_name, old_command_dict)
+            if command is not None:
+                self.update_command_by_id(command["id"], new_command_dict)
+
+    def _find_command(self, task_name, command_dict):
+        """Locate a command of a task by its id, or by content for dicts without one."""
+        task = self._task_index.get(task_name)
+        if task is None:
+            return None, None
+
+        task_of_command, command = self.find_command(command_dict.get("id"))
+        if task_of_command is task:
+            return task, command
+
+        for command in task["commands"]:
+            if {k: v for k, v in command.items() if k != "id"} == command_dict:
+                return task, command
+        return task, None
+
+    def find_command(self, command_id):
+        """Return the (task, command) pair of a command id, or (None, None)."""
+        return self._command_ids.get(command_id, (None, None))
+
+    def delete_command_by_id(self, command_id):
+        """Delete the command with the given id."""
+        with self._lock:
+            task, command = self.find_command(command_id)
+            if command is None:
+                return False
+
+            self._unindex_commands(task)
+            task["commands"] = [cmd for cmd in task["commands"] if cmd is not command]
+            self._index_commands(task)
+            self._changed("delete_command", task=task["name"], command=command)
+            return True
+
+    def update_command_by_id(self, command_id, new_command_dict):
+        """Replace the command with the given id, the new command keeps the id."""
+        with self._lock:
+            task, command = self.find_command(command_id)
+            if command is None:
+                return False
+
+            new_command_dict = {**new_command_dict, "id": command_id}
+            self._unindex_commands(task)
+            task["commands"] = [new_command_dict if cmd is command else cmd for cmd in task["commands"]]
+            self._index_commands(task)
+            self._changed("update_command", task=task["name"], old=command, new=new_command_dict)
+            return True
 
     def get_tasks(self):
         """Return the list of all tasks."""
         return self.tasks
 
+    def changes_since(self, revision):
+        """Return (revision, tasks, complete) for what changed after revision, taken under the lock.
+
+        tasks maps the name of every changed task to a copy of its command list, or to None
+        when it was removed. When revision is None or older than the kept changes, every
+        task is returned and complete is True: tasks that are not in it were removed.
+        """
+        with self._lock:
+            if revision == self.revision:
+                return revision, {}, False
+            complete = revision is None or not self._change_log or self._change_log[0][0] > revision + 1
+            if complete:
+                names = self._task_index.keys()
+            else:
+                names = set().union(*(changed for logged, changed in self._change_log if logged > revision))
+            tasks = {}
+            for name in names:
+                task = self._task_index.get(name)
+                tasks[name] = None if task is None else list(task["commands"])
+            return self.revision, tasks, complete
+
     def get_task(self, task_name):
-        for task in self.tasks:
-            if task["name"] == task_name:
-                return task
-        return None
+        """Return the task with the given name or None."""
+        return self._task_index.get(task_name)
 
     def get_command(self, task_name, command_name):
-        for task in self.tasks:
-            if task["name"] == task_name:
-                for command in task["commands"]:
-                    if command_name == self.generate_command_from_parts(command):
-                        return command
-        return self.empty_dict
+        """Return the command of a task whose rendered text matches command_name."""
+        return self._command_index.get(task_name, {}).get(command_name, self.empty_dict)
 
     def add_bulk_tasks(self, new_tasks):
-        """Add multiple tasks from a list of tasks with options to override or append commands."""
-        for task in new_tasks.get("tasks"):
-            task_name = task.get("name")
-            commands = task.get("commands", [])
-
-            # Check if the task already exists
-            existing_task = next((t for t in self.tasks if t["name"] == task_name), None)
-
-            if existing_task:
-                # Show popup to decide between override or append
-                user_choice = messagebox.askyesnocancel(
-                    "Task Conflict",
-                    f"The task '{task_name}' already exists.\n\n"
-                    "Do you want to:\n"
-                    "- Yes: Override the task and its commands\n"
-                    "- No: Append the commands to the existing task\n"
-                    "- Cancel: Skip this task"
-                )
+        """Add multiple tasks from a list of tasks, asking the user how to handle existing tasks."""
+        return self.import_tasks(new_tasks, policy=self.ASK, resolve=self.ask_conflict_policy)
 
-                if user_choice is None:
-                    # User chose Cancel, skip this task
-                    continue
-                elif user_choice:  # User chose Yes
-                    # Override the task and commands
-                    self.delete_task(task_name)  # Remove the existing task
-                    self.add_task(task_name)  # Add the new task
-                    for command in commands:
-                        self.add_command(task_name, command)
-                else:  # User chose No
-                    # Append commands to the existing task
-                    for command in commands:
-                        if command not in existing_task["commands"]:
-                            self.add_command(task_name, command)
-            else:
-                # Task does not exist, add it and all its commands
-                self.add_task(task_name)
-                for command in commands:
-                    self.add_command(task_name, command)
+    def find_conflicts(self, new_tasks):
+        """Return the names of imported tasks that already exist, invalid entries are left to import_tasks."""
+        tasks = new_tasks.get("tasks", []) if isinstance(new_tasks, dict) else []
+        if not isinstance(tasks, list):
+            return []
+        return [task["name"] for task in tasks
+                if isinstance(task, dict) and isinstance(task.get("name"), str) and task["name"] in self._task_index]
+
+    @classmethod
+    def validate_command(cls, command):
+        """Raise ValueError unless command is a dict with the string parts a command is rendered from."""
+        if not isinstance(command, dict):
+            raise ValueError(f"Invalid command in import, expected an object: {command!r}")
+        for key in cls.empty_dict:
+            if not isinstance(command.get(key), str):
+                raise ValueError(f"Invalid command in import, '{key}' must be a string: {command!r}")
+        if "id" in command and not isinstance(command["id"], str):
+            raise ValueError(f"Invalid command in import, 'id' must be a string: {command!r}")
+
+    def import_tasks(self, new_tasks, policy=APPEND, resolve=None):
+        """Import tasks in a single transaction without any user interaction.
+
+        policy decides what happens to tasks that already exist. It is either one of
+        OVERRIDE, APPEND, SKIP or ASK for all conflicts, or a dict of task name -> policy
+        (conflicts missing from the dict are appended). ASK calls resolve(task_name),
+        which must return OVERRIDE, APPEND or SKIP. All decisions are made before the
+        first change, the tasks are written to disk once, and a dict with the names of
+        the added, overridden, appended and skipped tasks is returned.
+
+        An invalid entry raises ValueError before anything changes; should applying the
+        import fail anyway, the tasks are restored and nothing is written.
+        """
+        tasks = new_tasks.get("tasks", []) if isinstance(new_tasks, dict) else None
+        if not isinstance(tasks, list):
+            raise ValueError("Invalid import, expected an object with a list of tasks")
+
+        # Validate the import and resolve every conflict before anything is modified
+        plan = []
+        for task in tasks:
+            task_name = task.get("name") if isinstance(task, dict) else None
+            commands = task.get("commands", []) if isinstance(task, dict) else None
+            if not isinstance(task_name, str) or not task_name.strip() or not isinstance(commands, list):
+                raise ValueError(f"Invalid task entry in import: {task!r}")
+            for command in commands:
+                self.validate_command(command)
+
+            choice = None
+            if task_name in self._task_index:
+                choice = policy.get(task_name, self.APPEND) if isinstance(policy, dict) else policy
+                if choice == self.ASK:
+                    choice = resolve(task_name) if resolve else self.SKIP
+                if choice not in (self.OVERRIDE, self.APPEND, self.SKIP):
+                    raise ValueError(f"Unknown import policy for task '{task_name}': {choice!r}")
+            # Copies, the ids given to the commands must not leak into the caller's data
+            plan.append((task_name, [dict(command) for command in commands], choice))
+
+        summary = {"added": [], "overridden": [], "appended": [], "skipped": []}
+        with self.batch():
+            with self._lock:
+                # What is needed to put the tasks back if applying the import fails half way
+                old_tasks = list(self.tasks)
+                old_commands = {}
+                changed = []
+                try:
+                    for task_name, commands, choice in plan:
+                        if choice == self.SKIP:
+                            summary["skipped"].append(task_name)
+                            continue
+
+                        task = self._task_index.get(task_name)
+                        if task is None:
+                            task = {"name": task_name, "commands": commands}
+                            self.tasks.append(task)
+                            self._task_index[task_name] = task
+                            summary["added"].append(task_name)
+                        else:
+                            old_commands.setdefault(task_name, (task, task["commands"]))
+                            self._unindex_commands(task)
+                            if choice == self.OVERRIDE:
+                                task["commands"] = commands
+                                summary["overridden"].append(task_name)
+                            else:
+                                # Hash the commands so deduplication does not scan the command list
+                                seen = {self._command_key(command) for command in task["commands"]}
+                                task["commands"] = list(task["commands"])
+                                for command in commands:
+                                    key = self._command_key(command)
+                                    if key not in seen:
+                                        seen.add(key)
+                                        task["commands"].append(command)
+                                summary["appended"].append(task_name)
+
+                        self._index_commands(task)
+                        changed.append(task)
+                except Exception:
+                    # Nothing was recorded as changed yet, so nothing reaches the storage
+                    self.tasks = old_tasks
+                    for task, commands in old_commands.values():
+                        task["commands"] = commands
+                    self.rebuild_index()
+                    raise
+
+                for task in changed:
+                    self._changed("set_commands", task=task["name"], commands=task["commands"])
+
+        self.logger.info("Imported tasks: " + ", ".join(f"{len(names)} {result}" for result, names in summary.items()))
+        return summary
+
+    @staticmethod
+    def _command_key(command_dict):
+        """Return a hashable key identifying a command by its content, ignoring its id."""
+        return json.dumps({k: v for k, v in command_dict.items() if k != "id"}, sort_keys=True)
+
+    def ask_conflict_policy(self, task_name):
+        """Ask the user how to import a task that already exists."""
+        user_choice = messagebox.askyesnocancel(
+            "Task Conflict",
+            f"The task '{task_name}' already exists.\n\n"
+            "Do you want to:\n"
+            "- Yes: Override the task and its commands\n"
+            "- No: Append the commands to the existing task\n"
+            "- Cancel: Skip this task"
+        )
+
+        if user_choice is None:
+            return self.SKIP
+        return self.OVERRIDE if user_choice else self.APPEND
 
     def generate_command_from_parts(self, command_dict):
         """Generate a command string from its dictionary parts."""
 
         if not isinstance(command_dict, dict):
             return self.empty_dict
-
-        prefix = command_dict.get("prefix", "").strip()
-        path = command_dict.get("path", "").strip()
-        executable = command_dict.get("executable", "").strip()
-        arguments = command_dict.get("arguments", "").strip()
-
-        # Construct the full command
-        if path:
-            command = f"{prefix} {os.path.join(path, executable)} {arguments}".strip()
-        else:
-            command = f"{prefix} {executable} {arguments}".strip()
-        return command
\ No newline at end of file
+        return self.renderer.render(command_dict)
\ No newline at end of file
@@ -0,0 +1,90 @@
+import threading
+from collections import deque
+from Logging import Logger
+
+
+class UIDispatcher:
+    """Runs widget updates posted by background threads on the Tk thread.
+
+    Tk is not thread safe, so worker, file watcher and scheduler threads never touch a
+    widget: they post a callback here and a single after() poll on the Tk thread runs
+    the posted callbacks in order. Callbacks posted with a key replace the pending
+    callback with the same key, e.g. only the latest progress of a run is drawn.
+    """
+    _instance = None  # Class-level variable to store the single instance
+    poll_interval = 50  # Milliseconds between two drains of the queue
+
+    def __new__(cls, *args, **kwargs):
+        """Override __new__ to ensure only one instance of UIDispatcher exists."""
+        if not cls._instance:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self.logger = Logger()
+            self.lock = threading.Lock()
+            self.queue = deque()  # (key, callback, args), the callback of keyed entries is in self.latest
+            self.latest = {}  # Key -> (callback, args) of the pending keyed entry
+            self.root = None
+            self._initialized = True
+
+    def start(self, root):
+        """Start draining the queue on the Tk thread of root, callbacks posted earlier run first."""
+        if self.root is None:
+            self.root = root
+            self.root.after(self.poll_interval, self._poll)
+
+    def post(self, callback, *args, key=None):
+        """Run callback(*args) on the Tk thread, from any thread."""
+        with self.lock:
+            if key is not None:
+                pending = key in self.latest
+                self.latest[key] = (callback, args)
+                if pending:
+                    return  # Keeps its place in the queue, with the new callback
+            self.queue.append((key, callback, args))
+
+    def call(self, callback, *args):
+        """Run callback(*args) on the Tk thread and return its result, e.g. the answer of a message box.
+
+        Blocks the calling thread until the callback has run; exceptions are raised in the caller.
+        """
+        if threading.current_thread() is threading.main_thread():
+            return callback(*args)
+
+        done = threading.Event()
+        outcome = {}
+
+        def run():
+            try:
+                outcome["result"] = callback(*args)
+            except Exception as e:
+                outcome["error"] = e
+            finally:
+                done.set()
+
+        self.post(run)
+        done.wait()
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["result"]
+
+    def _poll(self):
+        # Schedule the next poll first: a callback opening a modal dialog runs a nested event loop
+        self.root.after(self.poll_interval, self._poll)
+        with self.lock:
+            entries = self.queue
+            self.queue = deque()
+            batch = []
+            for key, callback, args in entries:
+                if key is not None:
+                    callback, args = self.latest.pop(key)
+                batch.append((callback, args))
+
+        for callback, args in batch:
+            try:
+                callback(*args)
+            except Exception as e:
+                self.logger.error(f"UI update {getattr(callback, '__name__', callback)} failed: {e}")
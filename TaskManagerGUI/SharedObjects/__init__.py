@@ -4,9 +4,38 @@ Shared object package
 This package contains shared object used in all the Frames
 """
 
+import importlib
+
 from .Settings import Settings
 from .Tasks import Tasks
-from .Environments import Environments
-from .EnvironmentCredentials import EnvironmentCredentials
 from .HealthCheck import HealthCheck
-from .OracleDB import OracleDB
\ No newline at end of file
+from .Database import Database
+from .AuditLog import AuditLog
+from .CommandRenderer import CommandRenderer
+from .FileWatcher import FileWatcher
+from .CronExpression import CronExpression
+from .Schedules import Schedules
+from .RunHistory import RunHistory
+from .LogIndex import LogIndex
+from .TaskSearch import TaskSearch
+from .UIDispatcher import UIDispatcher
+
+# These import customtkinter, cryptography and oracledb, so they are only loaded on first
+# use; headless entry points such as run.py never pay for them
+_lazy_objects = {
+    "Environments": ".Environments",
+    "EnvironmentCredentials": ".EnvironmentCredentials",
+    "OracleDB": ".OracleDB",
+}
+
+__all__ = ["Settings", "Tasks", "HealthCheck", "Database", "AuditLog", "CommandRenderer", "FileWatcher",
+           "CronExpression", "Schedules", "RunHistory", "LogIndex",
+           "TaskSearch", "UIDispatcher", *_lazy_objects]
+
+
+def __getattr__(name):
+    if name in _lazy_objects:
+        shared_object = getattr(importlib.import_module(_lazy_objects[name], __name__), name)
+        globals()[name] = shared_object  # Replaces the submodule that the import bound to the same name
+        return shared_object
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,446 @@
+import locale
+import mmap
+import os
+import threading
+import time
+import tkinter
+from array import array
+from bisect import bisect_right
+import customtkinter as ctk
+from SharedObjects.FileWatcher import Inotify, IN_MODIFY
+
+
+class MappedLog:
+    """A log file mapped in memory, with the number of lines before every block of it.
+
+    The newlines of each block_size bytes are counted by index() in a background thread,
+    at the speed of bytes.count, so the start of any line is found by a binary search on
+    the blocks and a scan of a single block. Memory use is 8 bytes per block whatever
+    the number of lines, and the text is only read for the lines that are shown.
+
+    update() takes in what a running task appended since: only the new blocks are
+    counted, so following a log costs as much as its new output, not its size.
+    """
+    block_size = 64 * 1024
+
+    def __init__(self, log_file_path):
+        self.path = log_file_path
+        self.encoding = locale.getpreferredencoding(False)  # The logs are written in the locale encoding
+        self.file = open(log_file_path, "rb")
+        self.data = b""
+        self.size = 0
+        self.block_newlines = array("Q", [0])  # Newlines before block i, for the counted blocks
+        self.closed = False
+        # Every mapping made, the viewer may still read a replaced one so they are all closed by close()
+        self.mappings = []
+        self.mappings_lock = threading.Lock()
+        size = os.fstat(self.file.fileno()).st_size
+        if size:  # An empty file cannot be mapped
+            self.data = self._map(size)
+            self.size = size
+
+    def _map(self, size):
+        """Map the first size bytes of the file, raises ValueError once closed."""
+        with self.mappings_lock:
+            if self.closed:
+                raise ValueError("The log is closed")
+            data = mmap.mmap(self.file.fileno(), size, access=mmap.ACCESS_READ)
+            self.mappings.append(data)
+            return data
+
+    def _count_blocks(self, data, block_newlines):
+        """Append to block_newlines the newlines of the complete blocks of data not counted yet."""
+        while not self.closed:
+            start = (len(block_newlines) - 1) * self.block_size
+            if start + self.block_size > len(data):
+                break
+            block_newlines.append(block_newlines[-1] + data[start:start + self.block_size].count(b"\n"))
+
+    def index(self):
+        """Count the newlines of the complete blocks not counted yet."""
+        try:
+            self._count_blocks(self.data, self.block_newlines)
+        except ValueError:
+            pass  # Closed while counting
+
+    def update(self):
+        """Map and count what was written to the file since the last call, returns whether it changed.
+
+        Call it from the thread running index(), after index() returned. The new blocks are
+        counted before the new size is published, so the line count never goes back.
+        """
+        try:
+            size = os.fstat(self.file.fileno()).st_size
+            if size == self.size:
+                return False
+            # A smaller file was rewritten from the start, its lines are counted again
+            block_newlines = self.block_newlines if size > self.size else array("Q", [0])
+            data = self._map(size) if size else b""
+            self._count_blocks(data, block_newlines)
+        except ValueError:
+            return False  # Closed meanwhile
+        self.block_newlines = block_newlines
+        self.data, self.size = data, size
+        return True
+
+    def indexed(self):
+        return (len(self.block_newlines) - 1) * self.block_size + self.block_size > self.size
+
+    def _count_newlines(self, start, end):
+        count = 0
+        for chunk_start in range(start, end, self.block_size):
+            count += self.data[chunk_start:min(chunk_start + self.block_size, end)].count(b"\n")
+        return count
+
+    def newlines_before(self, offset):
+        block = min(offset // self.block_size, len(self.block_newlines) - 1)
+        return self.block_newlines[block] + self._count_newlines(block * self.block_size, offset)
+
+    def line_count(self):
+        """Return the number of lines, only those of the counted blocks while index() is running."""
+        if not self.indexed():
+            return self.block_newlines[-1]
+        partial_line = 1 if self.size and self.data[self.size - 1] != ord("\n") else 0
+        return self.newlines_before(self.size) + partial_line
+
+    def line_of(self, offset):
+        """Return the line (from 0) of a byte offset."""
+        return self.newlines_before(offset)
+
+    def line_start(self, line):
+        """Return the byte offset of a line (from 0), or the size of the file past the last line."""
+        if line <= 0:
+            return 0
+        newline = line - 1  # The newline ending the previous line
+        block = bisect_right(self.block_newlines, newline) - 1
+        position = block * self.block_size
+        remaining = newline - self.block_newlines[block]
+        while True:
+            found = self.data.find(b"\n", position)
+            if found < 0:
+                return self.size
+            if remaining == 0:
+                return found + 1
+            remaining -= 1
+            position = found + 1
+
+    def read_lines(self, first_line, count, max_chars):
+        """Return the text of count lines from first_line, each cut at max_chars characters."""
+        lines = []
+        position = self.line_start(first_line)
+        while len(lines) < count and position < self.size:
+            end = self.data.find(b"\n", position)
+            if end < 0:
+                end = self.size
+            raw_line = self.data[position:min(end, position + max_chars * 4)]
+            lines.append(raw_line.decode(self.encoding, errors="replace").rstrip("\r")[:max_chars])
+            position = end + 1
+        return lines
+
+    def find(self, text, offset):
+        """Return the offset of the next occurrence of text (ignoring case) from offset, wrapping around, or -1."""
+        needle = text.encode(self.encoding, errors="replace").lower()
+        found = self._find_between(needle, offset, self.size)
+        if found < 0 and offset > 0:
+            found = self._find_between(needle, 0, min(self.size, offset + len(needle) - 1))
+        return found
+
+    def _find_between(self, needle, start, end):
+        # Chunks overlap by the length of the needle less one, so a match across two chunks is found
+        chunk_size = 64 * self.block_size
+        for chunk_start in range(start, end, chunk_size):
+            chunk_end = min(end, chunk_start + chunk_size + len(needle) - 1)
+            found = self.data[chunk_start:chunk_end].lower().find(needle)
+            if found >= 0:
+                return chunk_start + found
+        return -1
+
+    def close(self):
+        """Unmap the log before closing it, Windows cannot delete or rewrite a mapped file."""
+        with self.mappings_lock:
+            self.closed = True
+            for data in self.mappings:
+                data.close()  # A count running in the watcher thread stops with a ValueError
+            self.mappings = []
+            self.data = b""
+            self.file.close()
+
+
+class LogViewer(ctk.CTkFrame):
+    """Shows a log of any size, only the lines in view are read and put in the textbox.
+
+    The log is memory-mapped and its lines are counted in a background thread, so the
+    viewer opens at once and its memory use stays flat. It can jump to a line, find the
+    next match of a text (case insensitive) and go to the end.
+
+    In follow mode the log of a running task is watched, with inotify where available and
+    by polling otherwise, and the view stays on its last lines as they are written.
+    Scrolling back up stops following.
+    """
+    max_line_chars = 2000  # Longer lines are cut
+    poll_interval = 200  # Milliseconds between two redraws, while counting or following
+    follow_poll_interval = 0.5  # Seconds between two checks of a followed log when nothing wakes the watcher
+
+    def __init__(self, parent, log_file_path, line=None, follow=False, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.log = MappedLog(log_file_path)
+        self.shown_size = None  # Size of the log when it was last drawn
+        self.follow_requested = threading.Event()  # Set while following, the watcher thread waits on it
+        self.first_line = 0  # Line shown at the top, from 0
+        self.visible_lines = 30
+        self.marked_line = None  # Highlighted line, from 0
+        self.pending_line = None if line is None else line - 1  # Shown once the lines are counted
+        self.find_text = None
+        self.searching = False
+        self.find_offset = 0  # Where the next search starts
+        self.poll_after_id = None
+        self.find_after_id = None
+
+        toolbar = ctk.CTkFrame(self, fg_color="transparent")
+        toolbar.pack(fill=ctk.X, pady=(0, 5))
+        self.line_entry = ctk.CTkEntry(toolbar, width=90, placeholder_text="Line")
+        self.line_entry.pack(side=ctk.LEFT)
+        self.line_entry.bind("<Return>", lambda event: self.go_to_entered_line())
+        ctk.CTkButton(toolbar, text="Go", width=50, command=self.go_to_entered_line).pack(side=ctk.LEFT, padx=(5, 15))
+        self.find_entry = ctk.CTkEntry(toolbar, width=200, placeholder_text="Find")
+        self.find_entry.pack(side=ctk.LEFT)
+        self.find_entry.bind("<Return>", lambda event: self.find_next())
+        ctk.CTkButton(toolbar, text="Find Next", width=90, command=self.find_next).pack(side=ctk.LEFT, padx=(5, 15))
+        ctk.CTkButton(toolbar, text="Go to End", width=90, command=self.go_to_end).pack(side=ctk.LEFT, padx=(0, 15))
+        self.follow_var = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(toolbar, text="Follow", variable=self.follow_var,
+                        command=lambda: self.set_following(self.follow_var.get())).pack(side=ctk.LEFT)
+        self.status_label = ctk.CTkLabel(toolbar, text="", anchor="e")
+        self.status_label.pack(side=ctk.RIGHT, padx=5)
+
+        self.scrollbar = ctk.CTkScrollbar(self, command=self.on_scrollbar)
+        self.scrollbar.pack(side=ctk.RIGHT, fill=ctk.Y)
+        self.textbox = ctk.CTkTextbox(self, wrap="none", font=("Courier New", 12), activate_scrollbars=False)
+        self.textbox.pack(side=ctk.LEFT, fill=ctk.BOTH, expand=True)
+        self.textbox.tag_config("marked", background="#5a4a00")
+        self.line_height = ctk.CTkFont(family="Courier New", size=12).metrics("linespace")
+
+        # The textbox only holds the lines in view, scrolling is done here
+        self.textbox.bind("<Configure>", self.on_resize)
+        self.textbox.bind("<MouseWheel>", lambda event: self.scroll_by(-3 if event.delta > 0 else 3))
+        self.textbox.bind("<Button-4>", lambda event: self.scroll_by(-3))
+        self.textbox.bind("<Button-5>", lambda event: self.scroll_by(3))
+        self.textbox.bind("<Prior>", lambda event: self.scroll_by(-(self.visible_lines - 1)))
+        self.textbox.bind("<Next>", lambda event: self.scroll_by(self.visible_lines - 1))
+        self.textbox.bind("<Up>", lambda event: self.scroll_by(-1))
+        self.textbox.bind("<Down>", lambda event: self.scroll_by(1))
+        self.textbox.bind("<Control-Home>", lambda event: self.scroll_to(0))
+        self.textbox.bind("<Control-End>", lambda event: self.go_to_end())
+
+        threading.Thread(target=self.watch_log, daemon=True).start()
+        if follow:
+            self.set_following(True)
+        # Closing the popup with its X button destroys the widgets in Tk without calling destroy()
+        tkinter.Frame.bind(self, "<Destroy>", self.close_log, "+")
+        self.poll_log()
+
+    def destroy(self):
+        self.close_log()
+        super().destroy()
+
+    def close_log(self, event=None):
+        """Unmap and close the log, stop the watcher thread and the redraws."""
+        if self.log.closed:
+            return
+        self.log.close()
+        self.follow_requested.set()  # Lets the watcher thread see the log is closed
+        for after_id in (self.poll_after_id, self.find_after_id):
+            if after_id is not None:
+                self.after_cancel(after_id)
+        self.poll_after_id = self.find_after_id = None
+
+    def watch_log(self):
+        """Count the lines of the log, then take in what is appended to it while it is followed."""
+        self.log.index()
+        inotify = None
+        polling = False  # inotify is not available for this log
+        try:
+            while True:
+                self.follow_requested.wait()
+                if self.log.closed:
+                    break
+                if inotify is None and not polling:
+                    inotify = Inotify.create()
+                    if inotify is not None:
+                        try:
+                            inotify.add_watch(self.log.path, IN_MODIFY)
+                        except OSError:
+                            inotify.close()
+                            inotify = None
+                    polling = inotify is None
+
+                if inotify is not None:
+                    inotify.wait(self.follow_poll_interval)  # Also polls, for logs on network shares
+                else:
+                    time.sleep(self.follow_poll_interval)
+                self.log.update()
+                # A task printing line by line would wake the watcher for every line, the view is only redrawn
+                # every poll_interval anyway
+                time.sleep(self.poll_interval / 1000)
+        finally:
+            if inotify is not None:
+                inotify.close()
+
+    def poll_log(self):
+        """Redraw while the lines are counted and after the log grew, at most every poll_interval."""
+        if self.log.closed:
+            return
+        if self.log.indexed() and self.pending_line is not None:
+            line, self.pending_line = self.pending_line, None
+            self.show_line(line)
+        elif not self.log.indexed() or self.log.size != self.shown_size:
+            if self.follow_requested.is_set():
+                self.first_line = self.log.line_count()  # render() keeps the last page in view
+            self.render()
+        self.poll_after_id = self.after(self.poll_interval, self.poll_log)
+
+    def set_following(self, following):
+        self.follow_var.set(following)
+        if following:
+            self.follow_requested.set()
+            self.go_to_end()
+        else:
+            self.follow_requested.clear()
+        self.render()
+
+    def on_resize(self, event):
+        self.visible_lines = max(1, event.height // self.line_height + 1)
+        self.render()
+
+    def on_scrollbar(self, action, *args):
+        """Handle the "moveto" and "scroll" commands of the scrollbar."""
+        if action == "moveto":
+            self.scroll_to(round(float(args[0]) * self.log.line_count()))
+        elif action == "scroll":
+            step = self.visible_lines - 1 if args[1] == "pages" else 1
+            self.scroll_by(int(args[0]) * max(1, step))
+
+    def scroll_by(self, lines):
+        self.scroll_to(self.first_line + lines)
+        return "break"  # The textbox must not scroll its few lines itself
+
+    def scroll_to(self, first_line):
+        if self.follow_requested.is_set() and first_line < self.last_first_line(self.log.line_count()):
+            self.set_following(False)  # Moving away from the end stops following, like less
+        self.first_line = first_line
+        self.render()
+        return "break"
+
+    def show_line(self, line):
+        """Mark a line (from 0) and scroll it to the middle of the view."""
+        self.marked_line = line
+        self.scroll_to(line - self.visible_lines // 2)
+
+    def go_to_entered_line(self):
+        try:
+            line = int(self.line_entry.get().strip())
+        except ValueError:
+            self.status_label.configure(text="Enter a line number")
+            return
+        self.show_line(max(0, min(line, self.log.line_count()) - 1))
+
+    def go_to_end(self):
+        self.scroll_to(self.log.line_count())
+        return "break"
+
+    def find_next(self):
+        """Find the next occurrence of the text, from the last match or from the top of the view.
+
+        The search reads the file in a thread, it can take a second in a log of hundreds of MB.
+        """
+        text = self.find_entry.get()
+        if not text or self.searching:
+            return
+        if text != self.find_text:
+            self.find_text = text
+            self.find_offset = self.log.line_start(self.first_line)
+
+        self.searching = True
+        self.status_label.configure(text="Searching...")
+        result = {}
+        offset = self.find_offset
+        threading.Thread(target=lambda: result.setdefault("found", self.log.find(text, offset)), daemon=True).start()
+        self.find_after_id = self.after(50, self.show_found, text, result)
+
+    def show_found(self, text, result):
+        if "found" not in result:
+            self.find_after_id = self.after(50, self.show_found, text, result)
+            return
+        self.find_after_id = None
+        self.searching = False
+        found = result["found"]
+        if found < 0:
+            self.status_label.configure(text=f"'{text}' not found")
+            return
+        self.find_offset = found + 1
+        line = self.log.line_of(found)
+        if self.first_line <= line < self.first_line + self.visible_lines - 1:
+            self.marked_line = line  # Already in view, do not jump
+            self.render()
+        else:
+            self.show_line(line)
+
+    def last_first_line(self, total):
+        """Return the first line in view when the last lines are."""
+        return max(0, total - self.visible_lines + 1)
+
+    def render(self):
+        """Put the lines in view in the textbox and update the scrollbar and the line count."""
+        self.shown_size = self.log.size
+        total = self.log.line_count()
+        self.first_line = min(max(0, self.first_line), self.last_first_line(total))
+        lines = self.log.read_lines(self.first_line, self.visible_lines, self.max_line_chars)
+
+        self.textbox.configure(state="normal")
+        self.textbox.delete("1.0", "end")
+        self.textbox.insert("1.0", "\n".join(lines))
+        if self.marked_line is not None and 0 <= self.marked_line - self.first_line < len(lines):
+            row = self.marked_line - self.first_line + 1
+            self.textbox.tag_add("marked", f"{row}.0", f"{row}.end")
+        self.textbox.configure(state="disabled")
+
+        if total:
+            self.scrollbar.set(self.first_line / total, min(1.0, (self.first_line + self.visible_lines) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        state = "" if self.log.indexed() else ", counting..."
+        if self.follow_requested.is_set():
+            state += ", following"
+        self.status_label.configure(text=f"Lines {self.first_line + 1 if lines else 0}-"
+                                         f"{self.first_line + len(lines)} of {total:,}{state}")
+
+
+def show_log_viewer(parent, log_file_path, title=None, line=None, follow=False, buttons=()):
+    """Show a log in a modal popup centred on parent, returns once the popup is closed.
+
+    line (from 1) is shown and highlighted, follow starts in follow mode; buttons are
+    (text, command) pairs added below the log.
+    """
+    log_window = ctk.CTkToplevel(parent)
+    log_window.title(title or os.path.basename(log_file_path))
+
+    # Center the popup in the parent window
+    popup_width = 900
+    popup_height = 550
+    position_x = parent.winfo_rootx() + (parent.winfo_width() - popup_width) // 2
+    position_y = parent.winfo_rooty() + (parent.winfo_height() - popup_height) // 2
+    log_window.geometry(f"{popup_width}x{popup_height}+{position_x}+{position_y}")
+
+    # Make the popup modal
+    log_window.transient(parent.winfo_toplevel())
+    log_window.grab_set()
+    log_window.focus_force()
+    log_window.lift()
+
+    for text, command in buttons:
+        ctk.CTkButton(log_window, text=text, command=command).pack(side=ctk.BOTTOM, pady=(5, 20), fill="x", padx=20)
+    viewer = LogViewer(log_window, log_file_path, line=line, follow=follow)
+    viewer.pack(fill="both", expand=True, padx=10, pady=10)
+
+    # Wait for the popup to close
+    log_window.wait_window()
@@ -0,0 +1,95 @@
+import customtkinter as ctk
+
+
+class VirtualButtonList(ctk.CTkFrame):
+    """Scrollable column of buttons for long lists, only the visible rows have a widget.
+
+    A pool of buttons just large enough to fill the frame is reused while scrolling: each
+    button is reconfigured with the text and state of the item it now shows. Items are
+    (key, text) pairs, command(key) is called when the button of an item is clicked and
+    is_disabled(key) tells whether the button of an item is disabled.
+    """
+
+    def __init__(self, parent, command, is_disabled=lambda key: False, row_height=38, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.command = command
+        self.is_disabled = is_disabled
+        self.row_height = row_height  # Button height plus padding
+
+        self.items = []
+        self.first_row = 0  # Index of the item shown by the first button
+        self.buttons = []  # The pool, button i shows self.items[self.first_row + i]
+        self.shown = []  # (key, text, state) shown by each button, unchanged buttons are not redrawn
+
+        self.canvas_frame = ctk.CTkFrame(self, fg_color="transparent")
+        self.canvas_frame.pack(side=ctk.LEFT, fill=ctk.BOTH, expand=True)
+        self.scrollbar = ctk.CTkScrollbar(self, command=self.on_scrollbar)
+        self.scrollbar.pack(side=ctk.RIGHT, fill=ctk.Y)
+
+        self.canvas_frame.bind("<Configure>", self.on_resize)
+        self.bind_wheel(self.canvas_frame)
+
+    def bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", self.on_mouse_wheel)  # Windows and macOS
+        widget.bind("<Button-4>", lambda event: self.scroll_to(self.first_row - 3))  # Linux
+        widget.bind("<Button-5>", lambda event: self.scroll_to(self.first_row + 3))
+
+    def set_items(self, items):
+        """Show a new list of (key, text) items, keeping the scroll position when possible."""
+        self.items = list(items)
+        self.scroll_to(self.first_row)
+
+    def refresh(self):
+        """Show the current state of the items, e.g. after is_disabled changed for one of them."""
+        self.render()
+
+    def on_resize(self, event):
+        """Grow or shrink the pool of buttons to the number of rows that fit."""
+        visible_rows = max(1, event.height // self.row_height + 1)
+        while len(self.buttons) < visible_rows:
+            button = ctk.CTkButton(self.canvas_frame, text="")
+            self.bind_wheel(button)
+            self.buttons.append(button)
+            self.shown.append(None)
+        while len(self.buttons) > visible_rows:
+            self.buttons.pop().destroy()
+            self.shown.pop()
+        self.scroll_to(self.first_row)
+
+    def on_mouse_wheel(self, event):
+        self.scroll_to(self.first_row - (1 if event.delta > 0 else -1) * 3)
+
+    def on_scrollbar(self, action, *args):
+        """Handle the "moveto" and "scroll" commands of the scrollbar."""
+        if action == "moveto":
+            self.scroll_to(round(float(args[0]) * len(self.items)))
+        elif action == "scroll":
+            step = len(self.buttons) - 1 if args[1] == "pages" else 1
+            self.scroll_to(self.first_row + int(args[0]) * max(1, step))
+
+    def scroll_to(self, first_row):
+        # The last page is full rather than ending with empty rows
+        last_first_row = max(0, len(self.items) - len(self.buttons) + 1)
+        self.first_row = min(max(0, first_row), last_first_row)
+        self.render()
+
+    def render(self):
+        """Configure the pooled buttons for the items in view and hide the unused ones."""
+        for index, button in enumerate(self.buttons):
+            item_index = self.first_row + index
+            if item_index < len(self.items):
+                key, text = self.items[item_index]
+                shown = (key, text, "disabled" if self.is_disabled(key) else "normal")
+                if shown != self.shown[index]:
+                    button.configure(text=text, command=lambda key=key: self.command(key), state=shown[2])
+                    button.place(relx=0.02, y=index * self.row_height + 5, relwidth=0.96)
+                    self.shown[index] = shown
+            elif self.shown[index] is not None:
+                button.place_forget()
+                self.shown[index] = None
+
+        if self.items:
+            self.scrollbar.set(self.first_row / len(self.items),
+                               min(1.0, (self.first_row + len(self.buttons) - 1) / len(self.items)))
+        else:
+            self.scrollbar.set(0.0, 1.0)
@@ -8,4 +8,6 @@ using customtkinter, including the CustomComboBox widget.
 from .CustomCombobox import CustomComboBox
 from .RestartDialogBox import RestartMessageDialog
 from .CustomInputDialog import CustomInputDialog
-from .HealthCheckDialog import HealthCheckDialog
\ No newline at end of file
+from .HealthCheckDialog import HealthCheckDialog
+from .VirtualButtonList import VirtualButtonList
+from .LogViewer import LogViewer, show_log_viewer
@@ -0,0 +1,115 @@
+"""
+Headless task runner
+
+Runs tasks of the Task Runner without starting the GUI, for CI and scheduled jobs.
+Run it from this directory, like main.pyw, so that config/ and Execution_Logs/ are shared:
+
+    python run.py <task> [<task> ...] [--parallel N]
+    python run.py --list
+"""
+
+import argparse
+import sys
+import threading
+import time
+from datetime import datetime
+from SharedObjects import Settings, Tasks, RunHistory
+from Execution import TaskRun
+
+POLL_INTERVAL = 0.1  # Seconds between two reads of the output buffer
+
+
+def print_output(run, position):
+    """Print the output lines produced since position and return the new position."""
+    position, lines = run.output.read_since(position)
+    for line in lines:
+        print(line)
+    sys.stdout.flush()
+    return position
+
+
+def record_run(run, started):
+    """Add the run to the run history shown in the Logs of the application."""
+    RunHistory().add("task", run.name, run.status, started, datetime.now().isoformat(timespec="seconds"),
+                     trigger=run.trigger, log_file=run.log_file_path, error=run.error, run_id=run.id,
+                     returncode=run.returncode)
+
+
+def run_task(task, parallel, command_mode):
+    """Run a task like the Task Runner does and return the exit code of the run."""
+    run = TaskRun(task["name"], task["commands"], max_parallel=parallel, command_mode=command_mode)
+    run.trigger = "cli"
+    started = datetime.now().isoformat(timespec="seconds")
+    thread = threading.Thread(target=run.run, daemon=True)
+    thread.start()
+
+    position = 0
+    try:
+        while thread.is_alive():
+            thread.join(POLL_INTERVAL)
+            position = print_output(run, position)
+    except KeyboardInterrupt:
+        run.cancel()
+        thread.join()
+        print_output(run, position)
+        record_run(run, started)
+        print(f"Task {run.name} was cancelled, log: {run.log_file_path}", file=sys.stderr)
+        return 130
+
+    record_run(run, started)
+    if run.status == TaskRun.SUCCEEDED:
+        print(f"Task {run.name} has been completed successfully, log: {run.log_file_path}", file=sys.stderr)
+        return 0
+
+    print(run.error, file=sys.stderr)
+    if run.log_file_path:
+        print(f"Log: {run.log_file_path}", file=sys.stderr)
+    # Report the exit code of the failed command, as a shell running it would
+    if run.returncode is None or run.returncode == 0:
+        return 1
+    return run.returncode if run.returncode > 0 else 128 - run.returncode
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run Task Runner tasks without the GUI.")
+    parser.add_argument("tasks", nargs="*", metavar="task", help="names of the tasks to run, in order")
+    parser.add_argument("--parallel", type=int, metavar="N",
+                        help="commands of a task that may run at once (default: max_parallel_commands setting or 4)")
+    parser.add_argument("--list", action="store_true", help="list the available tasks and exit")
+    args = parser.parse_args(argv)
+
+    start = time.time()
+    tasks_manager = Tasks()
+
+    if args.list:
+        for task in sorted(tasks_manager.get_tasks(), key=lambda task: task["name"].lower()):
+            print(f"{task['name']} ({len(task['commands'])} commands)")
+        return 0
+
+    if not args.tasks:
+        parser.error("at least one task is required")
+    if args.parallel is not None and args.parallel < 1:
+        parser.error("--parallel must be at least 1")
+
+    # Resolve every name first so a typo fails before anything runs
+    tasks = []
+    for task_name in args.tasks:
+        task = tasks_manager.get_task(task_name)
+        if task is None:
+            print(f"Unknown task: {task_name}", file=sys.stderr)
+            return 2
+        tasks.append(task)
+
+    parallel = args.parallel or Settings().get("max_parallel_commands", 4)
+    command_mode = Settings().get("command_mode", TaskRun.SHELL)
+    for task in tasks:
+        exit_code = run_task(task, parallel, command_mode)
+        if exit_code != 0:
+            return exit_code
+
+    print(f"Finished in {time.time() - start:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,35 @@
+import os
+import sys
+
+import pytest
+
+# The application imports its packages relative to the TaskManagerGUI directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Execution import RunManager, Scheduler  # noqa: E402
+from SharedObjects import (AuditLog, CommandRenderer, Database, FileWatcher, HealthCheck, LogIndex,  # noqa: E402
+                           RunHistory, Schedules, Settings, Tasks, TaskSearch, UIDispatcher)
+
+SINGLETONS = [RunManager, Scheduler, AuditLog, CommandRenderer, Database, FileWatcher, HealthCheck, LogIndex,
+              RunHistory, Schedules, Settings, Tasks, TaskSearch, UIDispatcher]
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Run every test in an empty application directory with fresh shared objects.
+
+    The shared objects use paths relative to the working directory (config/, Logs/,
+    Execution_Logs/), as the application does.
+    """
+    monkeypatch.chdir(tmp_path)
+    for cls in SINGLETONS:
+        monkeypatch.setattr(cls, "_instance", None)
+    yield tmp_path
+
+
+@pytest.fixture
+def tasks():
+    """A Tasks store backed by config/tasks.json, flushed before the next test changes directory."""
+    tasks = Tasks()
+    yield tasks
+    tasks.flush()
@@ -0,0 +1,39 @@
+from datetime import datetime
+
+import pytest
+
+from SharedObjects import CronExpression
+
+
+@pytest.mark.parametrize("expression, moment, expected", [
+    ("*/15 * * * *", datetime(2026, 3, 1, 10, 7, 30), datetime(2026, 3, 1, 10, 15)),
+    ("*/15 * * * *", datetime(2026, 3, 1, 10, 45), datetime(2026, 3, 1, 11, 0)),
+    ("0 9 * * 1-5", datetime(2026, 3, 6, 9, 0), datetime(2026, 3, 9, 9, 0)),  # Friday 9:00 -> Monday
+    ("30 2 1 * *", datetime(2026, 12, 15), datetime(2027, 1, 1, 2, 30)),
+    ("0 0 29 2 *", datetime(2026, 1, 1), datetime(2028, 2, 29)),
+    ("0 12 * * 7", datetime(2026, 3, 2), datetime(2026, 3, 8, 12, 0)),  # 7 is Sunday
+    ("5/20 8-10/2 * * *", datetime(2026, 3, 1, 8, 50), datetime(2026, 3, 1, 10, 5)),
+    ("@daily", datetime(2026, 3, 1, 0, 0), datetime(2026, 3, 2)),
+])
+def test_next_after(expression, moment, expected):
+    assert CronExpression(expression).next_after(moment) == expected
+
+
+def test_day_of_month_or_day_of_week():
+    # Both restricted: the 13th or any Friday
+    cron = CronExpression("0 0 13 * 5")
+
+    assert cron.next_after(datetime(2026, 3, 1)) == datetime(2026, 3, 6)
+    assert cron.next_after(datetime(2026, 3, 10)) == datetime(2026, 3, 13)
+
+
+@pytest.mark.parametrize("expression", ["* * * *", "60 * * * *", "* 24 * * *", "5-1 * * * *", "*/0 * * * *",
+                                        "a * * * *", "* * 0 * *", "* * * 13 *", "* * * * 8"])
+def test_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronExpression(expression)
+
+
+def test_expression_that_never_fires():
+    with pytest.raises(ValueError, match="never fires"):
+        CronExpression("0 0 30 2 *").next_after(datetime(2026, 1, 1))
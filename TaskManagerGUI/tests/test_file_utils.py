@@ -0,0 +1,34 @@
+import os
+import stat
+
+import pytest
+
+from SharedObjects import FileUtils
+from SharedObjects.FileUtils import atomic_write
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="Windows has no permission bits")
+
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_new_file_gets_the_mode_of_open():
+    atomic_write("config/tasks.json", "{}")
+
+    with open("config/tasks.json") as file:
+        assert file.read() == "{}"
+    assert mode("config/tasks.json") == 0o666 & ~FileUtils._umask
+    assert os.listdir("config") == ["tasks.json"]  # No temporary file is left
+
+
+def test_existing_file_keeps_its_mode():
+    with open("settings.json", "w") as file:
+        file.write("old")
+    os.chmod("settings.json", 0o664)
+
+    atomic_write("settings.json", "new")
+
+    assert mode("settings.json") == 0o664
+    with open("settings.json") as file:
+        assert file.read() == "new"
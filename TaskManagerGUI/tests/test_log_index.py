@@ -0,0 +1,84 @@
+import os
+
+import pytest
+
+from SharedObjects import LogIndex
+
+
+def write_log(name, text, mode="w"):
+    with open(f"Execution_Logs/{name}", mode) as log_file:
+        log_file.write(text)
+
+
+@pytest.fixture
+def index():
+    os.makedirs("Execution_Logs")
+    return LogIndex()
+
+
+@pytest.mark.parametrize("query, expression", [
+    ("ORA-00060", '"ORA-00060"'),
+    ("  deadlock   detected ", '"deadlock" "detected"'),
+    ('say "hi"', '"say" """hi"""'),
+    ("", ""),
+])
+def test_match_expression(query, expression):
+    assert LogIndex.match_expression(query) == expression
+
+
+def test_search_finds_lines_of_every_log(index):
+    write_log("a_20260301_100000.log", "start\nORA-00060: deadlock detected\nend\n")
+    write_log("b_20260302_100000.log", "ora 00060 twice\nfine\nORA-00060 again\n")
+
+    assert index.update()
+    assert not index.update()
+
+    hits = index.search("ora-00060")
+    assert sorted((hit["log_file"], hit["line"]) for hit in hits) == [
+        ("Execution_Logs/a_20260301_100000.log", 2),
+        ("Execution_Logs/b_20260302_100000.log", 1),
+        ("Execution_Logs/b_20260302_100000.log", 3),
+    ]
+    assert "ORA-00060: deadlock detected" in [hit["text"] for hit in hits]
+    assert [hit["line"] for hit in index.search("DEADLOCK   detected")] == [2]
+    assert [hit["line"] for hit in index.search("detected deadlock")] == [2]  # Every word, in any order
+    assert index.search("deadlock twice") == []  # Not on the same line
+    assert index.search("   ") == []
+    assert len(index.search("00060", limit=2)) == 2
+
+
+def test_hits_of_a_log_are_in_line_order(index):
+    write_log("a_20260301_100000.log", "".join(f"step {number} failed\n" for number in range(20)))
+    index.update()
+
+    assert [hit["line"] for hit in index.search("failed")] == list(range(1, 21))
+
+
+def test_appended_lines_are_indexed_once_complete(index):
+    write_log("run_20260301_100000.log", "first line\nsecond")
+    index.update()
+    assert index.search("second") == []
+
+    write_log("run_20260301_100000.log", " half\nthird line\n", mode="a")
+    assert index.update()
+
+    assert [(hit["line"], hit["text"]) for hit in index.search("second")] == [(2, "second half")]
+    assert [hit["line"] for hit in index.search("line")] == [1, 3]
+
+
+def test_removed_and_rewritten_logs(index):
+    write_log("old_20260301_100000.log", "needle in the old log\n")
+    write_log("run_20260302_100000.log", "a long first version with the needle\nand more\n")
+    index.update()
+
+    os.remove("Execution_Logs/old_20260301_100000.log")
+    write_log("run_20260302_100000.log", "short\n")
+    assert index.update()
+
+    assert index.search("needle") == []
+    assert [hit["text"] for hit in index.search("short")] == ["short"]
+
+    index.rebuild()
+    assert index.search("short") == []
+    index.update()
+    assert [hit["text"] for hit in index.search("short")] == ["short"]
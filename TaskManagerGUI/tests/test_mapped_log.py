@@ -0,0 +1,61 @@
+import pytest
+
+from custom_widgets.LogViewer import MappedLog
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    # Several blocks with a few lines, so the counted and the scanned parts are both used
+    monkeypatch.setattr(MappedLog, "block_size", 16)
+
+
+def write_log(path, lines):
+    with open(path, "w") as log_file:
+        log_file.writelines(f"{line}\n" for line in lines)
+
+
+def test_lines_are_counted_and_read(small_blocks):
+    write_log("run.log", [f"line {number}" for number in range(100)])
+    log = MappedLog("run.log")
+    log.index()
+
+    assert log.indexed()
+    assert log.line_count() == 100
+    assert log.read_lines(41, 3, max_chars=100) == ["line 41", "line 42", "line 43"]
+    assert log.read_lines(98, 5, max_chars=4) == ["line", "line"]
+    assert log.line_of(log.find("LINE 57", 0)) == 57
+    assert log.find("line 3\n", log.line_start(50)) == log.line_start(3)  # Wraps around
+    assert log.find("missing", 0) == -1
+    log.close()
+
+
+def test_update_takes_in_appended_lines(small_blocks):
+    write_log("run.log", [])
+    log = MappedLog("run.log")
+    log.index()
+    assert log.line_count() == 0
+
+    with open("run.log", "a") as log_file:
+        log_file.write("first\nsecond\nthird without newline")
+
+    assert log.update()
+    assert not log.update()
+    assert log.line_count() == 3
+    assert log.read_lines(2, 1, max_chars=100) == ["third without newline"]
+    log.close()
+
+
+def test_close_unmaps_every_mapping(small_blocks):
+    write_log("run.log", ["first"])
+    log = MappedLog("run.log")
+    with open("run.log", "a") as log_file:
+        log_file.write("second\n")
+    log.update()
+    mappings = list(log.mappings)
+
+    log.close()
+
+    assert len(mappings) == 2
+    assert all(data.closed for data in mappings)
+    assert log.file.closed
+    assert not log.update()
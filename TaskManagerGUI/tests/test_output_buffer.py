@@ -0,0 +1,52 @@
+import threading
+
+from Execution import OutputBuffer
+
+
+def test_readers_get_only_new_lines():
+    buffer = OutputBuffer()
+    assert buffer.read_since(0) == (0, [])
+
+    buffer.append("first")
+    buffer.append("second")
+    position, lines = buffer.read_since(0)
+    assert (position, lines) == (2, ["first", "second"])
+
+    buffer.append("third")
+    assert buffer.read_since(position) == (3, ["third"])
+    assert buffer.read_since(3) == (3, [])
+
+
+def test_slow_reader_gets_the_lines_still_buffered():
+    buffer = OutputBuffer(max_lines=3)
+    for number in range(10):
+        buffer.append(str(number))
+
+    assert buffer.read_since(0) == (10, ["7", "8", "9"])
+    assert buffer.read_since(8) == (10, ["8", "9"])
+    assert len(buffer.lines) == 3
+
+
+def test_concurrent_writers_and_reader():
+    buffer = OutputBuffer(max_lines=100)
+    received = []
+
+    def write(prefix):
+        for number in range(1000):
+            buffer.append(f"{prefix}{number}")
+
+    writers = [threading.Thread(target=write, args=[prefix]) for prefix in "ab"]
+    for writer in writers:
+        writer.start()
+    position = 0
+    while any(writer.is_alive() for writer in writers):
+        position, lines = buffer.read_since(position)
+        received.extend(lines)
+    for writer in writers:
+        writer.join()
+    position, lines = buffer.read_since(position)
+    received.extend(lines)
+
+    assert position == 2000
+    assert len(received) == len(set(received)) <= 2000
+    assert received[-1] in ("a999", "b999")
@@ -0,0 +1,143 @@
+import os
+from datetime import date
+
+import pytest
+
+from SharedObjects import RunHistory
+
+
+@pytest.fixture
+def history():
+    history = RunHistory()
+    history.add("task", "backup", "succeeded", "2026-03-01T10:00:00", "2026-03-01T10:00:30")
+    history.add("task", "backup_db", "failed", "2026-03-02T23:59:59", "2026-03-03T00:00:10")
+    history.add("healthcheck", "Ping 100%", "succeeded", "2026-03-03T08:00:00", environment="PROD")
+    return history
+
+
+def names(runs):
+    return [run["name"] for run in runs]
+
+
+def test_entries_are_newest_first(history):
+    runs = history.get_entries()
+
+    assert names(runs) == ["Ping 100%", "backup_db", "backup"]
+    assert runs[2]["duration"] == 30
+    assert runs[0]["environment"] == "PROD"
+
+
+def test_filters(history):
+    assert names(history.get_entries(search="backup")) == ["backup_db", "backup"]
+    assert names(history.get_entries(name="backup")) == ["backup"]
+    assert names(history.get_entries(kind="healthcheck")) == ["Ping 100%"]
+    assert names(history.get_entries(status="failed")) == ["backup_db"]
+    assert names(history.get_entries(limit=1)) == ["Ping 100%"]
+
+
+def test_search_matches_like_wildcards_literally(history):
+    assert names(history.get_entries(search="%")) == ["Ping 100%"]
+    assert names(history.get_entries(search="p_db")) == ["backup_db"]
+    assert history.get_entries(search="p_d_") == []
+
+
+def test_date_range_includes_both_days(history):
+    assert names(history.get_entries(since=date(2026, 3, 2), until=date(2026, 3, 2))) == ["backup_db"]
+    assert names(history.get_entries(since=date(2026, 3, 2))) == ["Ping 100%", "backup_db"]
+    assert names(history.get_entries(until=date(2026, 3, 1))) == ["backup"]
+
+
+def test_entries_of_logs(history):
+    os.makedirs("Execution_Logs")
+    with open("Execution_Logs/deploy_20260304_120000.log", "w") as log_file:
+        log_file.write("done\n")
+    history.add("task", "deploy", "succeeded", "2026-03-04T12:00:00",
+                log_file="Execution_Logs/deploy_20260304_120000.log")
+
+    runs = history.get_entries(log_files=["Execution_Logs/deploy_20260304_120000.log", "Execution_Logs/other.log"])
+
+    assert names(runs) == ["deploy"]
+    assert runs[0]["bytes"] == 5
+    assert history.get_entries(log_files=[]) == []
+
+
+def test_statuses_and_forget_log(history):
+    history.add("task", "deploy", "succeeded", "2026-03-04T12:00:00", log_file="Execution_Logs/deploy.log")
+
+    assert history.get_statuses() == ["failed", "succeeded"]
+    history.forget_log("Execution_Logs/deploy.log")
+    assert "deploy" not in names(history.get_entries())
+
+
+def touch_log(name, text=""):
+    with open(f"Execution_Logs/{name}", "w") as log_file:
+        log_file.write(text)
+
+
+def changed_dir(step):
+    # Some file systems keep the time of the directory in coarse steps, the scan must see each change
+    os.utime("Execution_Logs", ns=(step * 10 ** 9, step * 10 ** 9))
+
+
+def test_sync_records_unknown_runs_once():
+    history = RunHistory()
+    os.makedirs("Execution_Logs")
+    touch_log("backup_20260301_100000.log", "ok\n")
+    touch_log("backup_20260301_100000_1.log")
+    touch_log("notes.txt")
+    changed_dir(1)
+
+    assert history.sync_log_dir()
+    assert not history.sync_log_dir()  # The directory did not change
+
+    runs = history.get_entries()
+    assert [(run["name"], run["status"], run["started"]) for run in runs] == [
+        ("backup", "unknown", "2026-03-01T10:00:00"), ("backup", "unknown", "2026-03-01T10:00:00")]
+    assert sorted(run["log_file"] for run in runs) == [
+        "Execution_Logs/backup_20260301_100000.log", "Execution_Logs/backup_20260301_100000_1.log"]
+
+
+def test_sync_keeps_recorded_runs_and_forgets_removed_logs():
+    history = RunHistory()
+    os.makedirs("Execution_Logs")
+    touch_log("deploy_20260302_120000.log", "done\n")
+    touch_log("old_20260101_000000.log")
+    history.add("task", "deploy", "failed", "2026-03-02T12:00:00", log_file="Execution_Logs/deploy_20260302_120000.log")
+    changed_dir(1)
+    history.sync_log_dir()
+
+    assert [(run["name"], run["status"]) for run in history.get_entries()] == [("deploy", "failed"), ("old", "unknown")]
+
+    os.remove("Execution_Logs/deploy_20260302_120000.log")
+    os.remove("Execution_Logs/old_20260101_000000.log")
+    changed_dir(2)
+    assert history.sync_log_dir()
+
+    runs = history.get_entries()
+    assert [(run["name"], run["status"], run["log_file"]) for run in runs] == [("deploy", "failed", None)]
+
+
+def test_recorded_run_replaces_unknown_run():
+    history = RunHistory()
+    os.makedirs("Execution_Logs")
+    touch_log("deploy_20260302_120000.log")
+    changed_dir(1)
+    history.sync_log_dir()
+
+    history.add("task", "deploy", "succeeded", "2026-03-02T12:00:00", "2026-03-02T12:00:05",
+                log_file="Execution_Logs/deploy_20260302_120000.log")
+
+    assert [(run["name"], run["status"]) for run in history.get_entries()] == [("deploy", "succeeded")]
+
+
+def test_entries_of_thousands_of_logs(history):
+    log_files = [f"Execution_Logs/run_{number}.log" for number in range(5000)]
+    for number in (0, 2500, 4999):
+        history.add("task", f"run {number}", "succeeded", f"2026-04-01T10:{number % 60:02}:00",
+                    log_file=log_files[number])
+
+    assert sorted(run["name"] for run in history.get_entries(log_files=log_files)) == ["run 0", "run 2500",
+                                                                                      "run 4999"]
+    # The names of an earlier call do not leak into the next one
+    assert [run["name"] for run in history.get_entries(log_files=log_files[1:2])] == []
+    assert len(history.get_entries()) == 6
@@ -0,0 +1,109 @@
+import importlib
+import threading
+import types
+
+import pytest
+
+from Execution import Scheduler
+from SharedObjects import Schedules
+
+scheduler_module = importlib.import_module("Execution.Scheduler")
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock(1_000_000.0)
+    monkeypatch.setattr(scheduler_module, "time", types.SimpleNamespace(time=clock.time))
+    return clock
+
+
+def next_fires(scheduler):
+    return {schedule_id: fire_time for schedule_id, (fire_time, _) in scheduler.next_fires.items()}
+
+
+def test_changes_keep_the_next_fire_of_unchanged_schedules(clock):
+    scheduler = Scheduler()
+    schedules = Schedules()
+    every_minute = schedules.add_schedule("task", "a", interval=60)
+    hourly = schedules.add_schedule("task", "b", cron="@hourly")
+    assert next_fires(scheduler)[every_minute["id"]] == 1_000_060.0
+
+    # Changes that come more often than the interval, e.g. reloads of the file, do not delay the fire
+    for _ in range(5):
+        clock.now += 30
+        schedules.reload()
+    assert next_fires(scheduler)[every_minute["id"]] == 1_000_060.0
+    assert hourly["id"] in next_fires(scheduler)
+
+    # An edited schedule starts from the time of the edit
+    with schedules.lock:
+        schedules.get_schedule(every_minute["id"])["interval"] = 120
+    schedules.save_schedules()
+    assert next_fires(scheduler)[every_minute["id"]] == clock.now + 120
+
+    # A disabled schedule is dropped, and starts over once enabled again
+    with schedules.lock:
+        schedules.get_schedule(every_minute["id"])["enabled"] = False
+    schedules.save_schedules()
+    assert every_minute["id"] not in next_fires(scheduler)
+    assert sorted(scheduler.heap) == sorted((t, i) for i, t in next_fires(scheduler).items())
+
+
+def test_pop_due_pushes_the_next_fire(clock):
+    scheduler = Scheduler()
+    schedule = Schedules().add_schedule("task", "a", interval=10)
+    clock.now += 35  # Missed fires are not made up for
+
+    with scheduler.condition:
+        due = scheduler._pop_due(clock.now)
+
+    assert [s["id"] for s in due] == [schedule["id"]]
+    assert scheduler.heap == [(clock.now + 10, schedule["id"])]
+
+
+def test_pop_due_drops_a_schedule_that_never_fires_again(clock, monkeypatch):
+    scheduler = Scheduler()
+    schedule = Schedules().add_schedule("task", "a", interval=10)
+    monkeypatch.setattr(scheduler, "next_fire_time", lambda schedule, after: (_ for _ in ()).throw(ValueError("no")))
+    clock.now += 10
+
+    with scheduler.condition:
+        due = scheduler._pop_due(clock.now)
+
+    assert [s["id"] for s in due] == [schedule["id"]]
+    assert scheduler.heap == [] and scheduler.next_fires == {}
+
+
+def test_timer_thread_survives_a_failing_fire(monkeypatch):
+    scheduler = Scheduler()
+    fires = []
+    second_fire = threading.Event()
+
+    def fire(schedule):
+        fires.append(schedule["id"])
+        if len(fires) == 1:
+            raise RuntimeError("handler bug")
+        second_fire.set()
+
+    monkeypatch.setattr(scheduler, "fire", fire)
+    schedules = Schedules()
+    schedule = schedules.add_schedule("task", "a", interval=1)
+    with scheduler.condition:
+        # Due now rather than in a second, start() keeps the fire time of the unchanged schedule
+        scheduler.next_fires[schedule["id"]] = (0.0, scheduler.timing(schedule))
+    scheduler.start()
+
+    try:
+        assert second_fire.wait(5)
+        assert len(fires) == 2
+    finally:
+        # The thread cannot be stopped, without schedules it sleeps for good
+        schedules.delete_schedule(schedule["id"])
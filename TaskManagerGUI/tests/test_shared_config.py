@@ -0,0 +1,44 @@
+import json
+import os
+import time
+
+import pytest
+
+from SharedObjects import FileWatcher, HealthCheck, Settings
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        json.dump(data, file)
+
+
+def wait_for(received):
+    # The watcher thread may apply the change before this check() does
+    FileWatcher().check()
+    deadline = time.monotonic() + 5
+    while not received and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return received
+
+
+@pytest.mark.parametrize("shared_object, file_path, first, second, read, expected", [
+    (Settings, "config/settings.json", {"theme": "dark"}, {"theme": "light", "sidebar_side": "right"},
+     lambda settings: settings.get("sidebar_side"), "right"),
+    (HealthCheck, "config/healthcheck.json", {"Ping": {"users": "a"}}, {"Ping": {"users": "a"}, "Sessions": {}},
+     lambda healthcheck: healthcheck.get_options(), ["Ping", "Sessions"]),
+])
+def test_external_change_reaches_subscribers_after_another_constructor_call(shared_object, file_path, first,
+                                                                            second, read, expected):
+    write_json(file_path, first)
+    instance = shared_object()
+    received = []
+    FileWatcher().subscribe(file_path, received.append)
+
+    write_json(file_path, second)
+    # Loading the file again here would hide the change from the watcher
+    assert shared_object() is instance
+
+    assert wait_for(received)
+    assert received[0]["added"]
+    assert read(instance) == expected
@@ -0,0 +1,20 @@
+import pytest
+
+from Execution import build_command_graph, sequential_nodes
+
+
+def graph_of(*commands):
+    return build_command_graph([{"executable": "true", **command} for command in commands])[1]
+
+
+@pytest.mark.parametrize("commands, alone", [
+    ([{}, {}, {}], {"0", "1", "2"}),
+    ([{}, {"group": "g"}, {"group": "g"}, {}], {"0", "3"}),
+    ([{"id": "a"}, {"id": "b", "depends_on": ["a"]}, {"id": "c", "depends_on": ["a"]}], {"a"}),
+    ([{"id": "a"}, {"id": "b", "depends_on": []}], set()),
+    ([{"id": "a", "depends_on": ["b"]}, {"id": "b", "depends_on": []}, {"id": "c", "depends_on": ["a"]}],
+     {"a", "b", "c"}),
+    ([], set()),
+])
+def test_sequential_nodes(commands, alone):
+    assert sequential_nodes(graph_of(*commands)) == alone
@@ -0,0 +1,139 @@
+import importlib
+import os
+import sys
+import threading
+from datetime import datetime
+
+import pytest
+
+from Execution import TaskRun
+
+# The package binds the name TaskRun to the class, the module is needed to patch what it imported
+task_run_module = importlib.import_module("Execution.TaskRun")
+
+
+class FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2026, 1, 2, 3, 4, 5)
+
+
+def test_runs_started_in_the_same_second_get_their_own_log(monkeypatch):
+    monkeypatch.setattr(task_run_module, "datetime", FrozenDatetime)
+    paths = []
+    lock = threading.Lock()
+
+    def create():
+        path = TaskRun("nightly build", []).create_log_file()
+        with lock:
+            paths.append(path)
+
+    threads = [threading.Thread(target=create) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(paths)) == 8
+    assert "Execution_Logs/nightly_build_20260102_030405.log" in paths
+    assert "Execution_Logs/nightly_build_20260102_030405_7.log" in paths
+    assert all(os.path.getsize(path) == 0 for path in paths)
+
+
+def test_an_existing_log_is_not_truncated(monkeypatch):
+    monkeypatch.setattr(task_run_module, "datetime", FrozenDatetime)
+    first = TaskRun("a", []).create_log_file()
+    with open(first, "w") as log_file:
+        log_file.write("output of the first run\n")
+
+    second = TaskRun("a", []).create_log_file()
+
+    assert second != first
+    with open(first) as log_file:
+        assert log_file.read() == "output of the first run\n"
+
+
+def test_run_writes_the_output_to_its_log():
+    run = TaskRun("echo", [{"prefix": "", "path": "", "executable": "echo", "arguments": "hello"}])
+
+    assert run.run() == TaskRun.SUCCEEDED
+    with open(run.log_file_path) as log_file:
+        assert "hello" in log_file.read()
+
+
+def test_a_task_that_cannot_be_scheduled_has_no_log():
+    run = TaskRun("cycle", [{"prefix": "", "path": "", "executable": "echo", "arguments": "", "id": "a",
+                             "depends_on": ["a"]}])
+
+    assert run.run() == TaskRun.FAILED
+    assert run.log_file_path is None
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="memory is measured on Linux only")
+def test_peak_memory_is_the_commands_own():
+    # A large parent, as the GUI is; its memory must not be reported for the commands it starts
+    ballast = bytearray(300 * 1024 * 1024)
+    for offset in range(0, len(ballast), 4096):
+        ballast[offset] = 1
+    python = {"prefix": "", "path": "", "executable": sys.executable}
+    run = TaskRun("memory", [
+        {**python, "arguments": '-c "import time; time.sleep(0.3)"'},
+        {**python, "arguments": '-c "import time; b = bytearray(150 * 1024 * 1024); time.sleep(0.5)"'},
+    ])
+
+    assert run.run() == TaskRun.SUCCEEDED
+    small, large = sorted(run.usage, key=lambda entry: entry["position"])
+    assert small["max_rss_kb"] < 100 * 1024
+    assert 150 * 1024 < large["max_rss_kb"] < 250 * 1024
+    del ballast
+
+
+def python_command(code, **fields):
+    return {"prefix": "", "path": "", "executable": sys.executable, "arguments": f'-c "{code}"', **fields}
+
+
+def test_output_of_a_command_running_alone_is_in_the_log_while_it_runs():
+    # The command waits for the test to see its first line in the log
+    run = TaskRun("follow", [
+        python_command("import os, time; print('first', flush=True); "
+                       "[time.sleep(0.01) for _ in iter(lambda: os.path.exists('seen'), True)]"),
+        python_command("print('second')"),
+    ])
+    thread = threading.Thread(target=run.run)
+    thread.start()
+    try:
+        for _ in range(500):
+            if run.log_file_path and os.path.exists(run.log_file_path):
+                with open(run.log_file_path) as log_file:
+                    if "first" in log_file.read():
+                        break
+            threading.Event().wait(0.01)
+        else:
+            pytest.fail("The output of the running command is not in its log")
+    finally:
+        open("seen", "w").close()
+        thread.join()
+
+    assert run.status == TaskRun.SUCCEEDED
+    assert not [name for name in os.listdir("Execution_Logs") if name.endswith(".part")]
+    with open(run.log_file_path) as log_file:
+        lines = log_file.read().splitlines()
+    assert lines[:4] == [f"===== [1/2] {run.renderer.render(run.commands[0])} =====", "first",
+                         f"===== [2/2] {run.renderer.render(run.commands[1])} =====", "second"]
+
+
+def test_parallel_commands_keep_their_output_in_one_section():
+    run = TaskRun("parallel", [
+        python_command("import time; [(print('a', i, flush=True), time.sleep(0.02)) for i in range(3)]", group="g"),
+        python_command("import time; [(print('b', i, flush=True), time.sleep(0.02)) for i in range(3)]", group="g"),
+        python_command("print('after')"),
+    ])
+
+    assert run.run() == TaskRun.SUCCEEDED
+
+    with open(run.log_file_path) as log_file:
+        sections = log_file.read().split("=====")
+    outputs = sorted(section.strip().splitlines() for section in sections[2:6:2])
+    assert outputs == [["a 0", "a 1", "a 2"], ["b 0", "b 1", "b 2"]]
+    assert sections[6].strip() == "after"
+    assert not [name for name in os.listdir("Execution_Logs") if name.endswith(".part")]
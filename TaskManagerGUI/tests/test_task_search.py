@@ -0,0 +1,84 @@
+import pytest
+
+from SharedObjects import TaskSearch
+
+
+def command(arguments, executable="make"):
+    return {"prefix": "", "path": "", "executable": executable, "arguments": arguments}
+
+
+@pytest.fixture
+def search(tasks):
+    for name, arguments in [("backup", "all"), ("backup_db", "db"), ("nightly build", "build"),
+                            ("deploy", "deploy --env prod"), ("db_restore", "restore")]:
+        tasks.add_command(name, command(arguments))
+    return TaskSearch()
+
+
+def test_ranking(search):
+    assert search.search("") == ["backup", "backup_db", "db_restore", "deploy", "nightly build"]
+    # Exact name, then name prefix
+    assert search.search("backup") == ["backup", "backup_db"]
+    # Name prefix, word prefix, substring, then a command containing it
+    assert search.search("db") == ["db_restore", "backup_db"]
+    assert search.search("build") == ["nightly build"]
+    assert search.search("prod") == ["deploy"]
+    assert search.search("prod", include_commands=False) == []
+
+
+def test_typos_find_close_names_only(search, tasks):
+    for number in range(50):
+        tasks.add_command(f"report_{number:04}", command("report"))
+
+    assert search.search("nightly buld") == ["nightly build"]
+    assert search.search("backup_bd") == ["backup", "backup_db"]
+    # Sharing a common word is not enough
+    assert search.search("report9999") == []
+    tasks.add_command("report_9998", command("report"))
+    assert search.search("report_9999")[0] == "report_9998"
+    assert len(search.search("report_99")) == 1
+    assert len(search.search("reprot_00")) <= search.fuzzy_limit
+
+
+def test_only_changed_tasks_are_indexed_again(search, tasks, monkeypatch):
+    search.search("")
+    tasks.add_command("deploy", command("rollback"))
+    tasks.rename_task("backup", "full backup")
+    tasks.delete_task("db_restore")
+    rendered = []
+    render = search.renderer.render
+    monkeypatch.setattr(search.renderer, "render", lambda command_dict: rendered.append(1) or render(command_dict))
+
+    assert search.search("rollback") == ["deploy"]
+    assert len(rendered) == 3  # The two commands of deploy and the one of the renamed task
+    assert search.search("backup") == ["backup_db", "full backup"]
+    assert search.search("restore") == []
+    assert search.search("") == ["backup_db", "deploy", "full backup", "nightly build"]
+
+
+def test_every_task_is_indexed_again_after_many_changes(search, tasks, monkeypatch):
+    search.search("")
+    monkeypatch.setattr(tasks, "_change_log", type(tasks._change_log)(maxlen=2))
+    tasks.delete_task("backup")
+    tasks.add_command("cleanup", command("clean"))
+    tasks.delete_task("deploy")
+
+    assert search.search("") == ["backup_db", "cleanup", "db_restore", "nightly build"]
+    assert search.search("clean") == ["cleanup"]
+
+
+def test_reload_reports_the_changed_tasks(tasks):
+    tasks.add_command("a", command("x"))
+    tasks.flush()
+    search = TaskSearch()
+    search.search("")
+
+    revision = tasks.revision
+    with open(tasks.file_path) as file:
+        data = file.read()
+    with open(tasks.file_path, "w") as file:
+        file.write(data.replace('"name": "a"', '"name": "b"'))
+    tasks.reload()
+
+    assert tasks.changes_since(revision)[1].keys() == {"a", "b"}
+    assert search.search("") == ["b"]
@@ -0,0 +1,119 @@
+import json
+
+import pytest
+
+from SharedObjects import Tasks
+
+
+def command(executable, arguments=""):
+    return {"prefix": "", "path": "", "executable": executable, "arguments": arguments}
+
+
+def saved_tasks():
+    with open(Tasks.file_path) as file:
+        return json.load(file)["tasks"]
+
+
+def names(tasks):
+    return [task["name"] for task in tasks.get_tasks()]
+
+
+def test_import_adds_new_tasks(tasks):
+    summary = tasks.import_tasks({"tasks": [{"name": "build", "commands": [command("make")]}]})
+
+    assert summary["added"] == ["build"]
+    assert tasks.get_task("build")["commands"][0]["id"]
+    assert [task["name"] for task in saved_tasks()] == ["build"]
+
+
+@pytest.mark.parametrize("policy, expected", [
+    (Tasks.OVERRIDE, ["make", "make test"]),
+    (Tasks.APPEND, ["make", "make test"]),
+    (Tasks.SKIP, ["make"]),
+])
+def test_import_conflict_policies(tasks, policy, expected):
+    tasks.import_tasks({"tasks": [{"name": "build", "commands": [command("make")]}]})
+    tasks.import_tasks({"tasks": [{"name": "build", "commands": [command("make"), command("make", "test")]}]},
+                       policy=policy)
+
+    rendered = [tasks.generate_command_from_parts(c) for c in tasks.get_task("build")["commands"]]
+    assert rendered == expected
+
+
+def test_import_policy_per_task_and_ask(tasks):
+    tasks.import_tasks({"tasks": [{"name": "a", "commands": [command("x")]},
+                                  {"name": "b", "commands": [command("x")]}]})
+    asked = []
+
+    summary = tasks.import_tasks({"tasks": [{"name": "a", "commands": [command("y")]},
+                                            {"name": "b", "commands": [command("y")]}]},
+                                 policy={"a": Tasks.ASK, "b": Tasks.OVERRIDE},
+                                 resolve=lambda name: asked.append(name) or Tasks.SKIP)
+
+    assert asked == ["a"]
+    assert summary["skipped"] == ["a"] and summary["overridden"] == ["b"]
+
+
+def test_import_does_not_alias_the_callers_commands(tasks):
+    new_tasks = {"tasks": [{"name": "a", "commands": [command("x")]}]}
+    tasks.import_tasks(new_tasks)
+
+    assert "id" not in new_tasks["tasks"][0]["commands"][0]
+
+
+@pytest.mark.parametrize("new_tasks", [
+    [],
+    {"tasks": {}},
+    # A valid task comes first, it must not be added either
+    {"tasks": [{"name": "b", "commands": []}, {"name": "", "commands": []}]},
+    {"tasks": [{"name": "b", "commands": []}, {"name": "a", "commands": "echo"}]},
+    {"tasks": [{"name": "b", "commands": []}, {"name": "a", "commands": ["echo hi"]}]},
+    {"tasks": [{"name": "b", "commands": []}, {"name": "a", "commands": [{"executable": "echo"}]}]},
+    {"tasks": [{"name": "b", "commands": []}, {"name": "a", "commands": [{**command("echo"), "arguments": 1}]}]},
+    {"tasks": [{"name": "b", "commands": []}, {"name": "a", "commands": [{**command("echo"), "id": 5}]}]},
+])
+def test_invalid_import_changes_nothing(tasks, new_tasks):
+    tasks.import_tasks({"tasks": [{"name": "a", "commands": [command("x")]}]})
+    before = saved_tasks()
+
+    with pytest.raises(ValueError):
+        tasks.import_tasks(new_tasks, policy=Tasks.OVERRIDE)
+
+    assert names(tasks) == ["a"]
+    assert saved_tasks() == before
+
+
+def test_find_conflicts_ignores_invalid_entries(tasks):
+    tasks.import_tasks({"tasks": [{"name": "a", "commands": []}]})
+
+    assert tasks.find_conflicts({"tasks": ["a", {"name": 1}, {"name": "a"}, {"name": "b"}]}) == ["a"]
+    assert tasks.find_conflicts([]) == []
+    assert tasks.find_conflicts({"tasks": "a"}) == []
+
+
+def test_failed_import_is_rolled_back(tasks, monkeypatch):
+    tasks.import_tasks({"tasks": [{"name": "a", "commands": [command("x")]}]})
+    before = saved_tasks()
+    index_commands = tasks._index_commands
+
+    def failing_index(task):
+        if task["name"] == "c":
+            raise RuntimeError("disk on fire")
+        return index_commands(task)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(tasks, "_index_commands", failing_index)
+        with pytest.raises(RuntimeError):
+            tasks.import_tasks({"tasks": [{"name": "a", "commands": [command("y")]},
+                                          {"name": "b", "commands": [command("z")]},
+                                          {"name": "c", "commands": [command("w")]}]}, policy=Tasks.OVERRIDE)
+
+    assert names(tasks) == ["a"]
+    assert [tasks.generate_command_from_parts(c) for c in tasks.get_task("a")["commands"]] == ["x"]
+    assert tasks.find_command(before[0]["commands"][0]["id"])[0] is tasks.get_task("a")
+    tasks.flush()
+    assert saved_tasks() == before
+
+    # The store still loads after the failed import
+    Tasks._instance = None
+    assert names(Tasks()) == ["a"]
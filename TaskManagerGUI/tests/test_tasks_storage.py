@@ -0,0 +1,80 @@
+import importlib
+import sqlite3
+
+import pytest
+
+from SharedObjects import Database, Tasks
+
+# The package binds the name Tasks to the class, the module is needed to patch what it imported
+tasks_module = importlib.import_module("SharedObjects.Tasks")
+
+
+def command(arguments):
+    return {"prefix": "", "path": "", "executable": "make", "arguments": arguments}
+
+
+@pytest.fixture
+def sqlite_tasks(monkeypatch):
+    Database()  # Creating the database switches the shared objects to SQLite
+    tasks = Tasks()
+    assert tasks.storage_mode == "sqlite"
+    monkeypatch.setattr(Tasks, "save_delay", 10)  # The test flushes itself
+    yield tasks
+    tasks.flush()
+
+
+def stored_tasks():
+    return {task["name"]: [c["arguments"] for c in task["commands"]] for task in Database().load_tasks()}
+
+
+def test_failed_commit_keeps_the_changes_and_retries(sqlite_tasks, monkeypatch):
+    sqlite_tasks.add_command("build", command("all"))
+    sqlite_tasks.flush()
+
+    failures = []
+    transaction = Database.transaction
+
+    def failing_once(database, statements):
+        if not failures:
+            failures.append(statements)
+            raise sqlite3.IntegrityError("UNIQUE constraint failed")
+        return transaction(database, statements)
+
+    monkeypatch.setattr(Database, "transaction", failing_once)
+    sqlite_tasks.add_command("build", command("test"))
+    sqlite_tasks.add_task("deploy")
+    sqlite_tasks.flush()
+
+    assert failures
+    assert sqlite_tasks._dirty
+    assert sqlite_tasks._save_timer is not None  # A retry is scheduled
+    assert stored_tasks() == {"build": ["all"]}
+
+    sqlite_tasks.add_command("deploy", command("prod"))  # Queued after the failed batch
+    sqlite_tasks.flush()
+
+    assert not sqlite_tasks._dirty
+    assert stored_tasks() == {"build": ["all", "test"], "deploy": ["prod"]}
+
+
+def test_failed_save_of_tasks_json_is_retried(tasks, monkeypatch):
+    monkeypatch.setattr(Tasks, "save_delay", 0.05)
+    calls = []
+    atomic_write = tasks_module.atomic_write
+
+    def failing_once(file_path, data):
+        calls.append(file_path)
+        if len(calls) == 1:
+            raise OSError("Network drive unavailable")
+        atomic_write(file_path, data)
+
+    monkeypatch.setattr(tasks_module, "atomic_write", failing_once)
+    tasks.add_command("build", command("all"))
+    tasks.flush()
+    assert tasks._dirty
+
+    tasks._save_timer.join(5)  # The retry
+    assert not tasks._dirty
+    assert len(calls) == 2
+    with open(tasks.file_path) as file:
+        assert '"all"' in file.read()